@@ -0,0 +1,99 @@
+# benchmarks/stats_benchmark.py
+"""
+compute_stats (un set por llamada) frente a compute_stats_batch (N sets en una
+pasada de NumPy): sets/segundo. Que dan exactamente lo mismo lo comprueba
+tests/test_stats_batch.py; aquí solo se cuentan las filas distintas como aviso.
+
+Sets aleatorios (semilla fija) con base stats 1..255, EVs 0..255, IVs 0..31,
+nivel 1..100 y las 25 naturalezas más vacía/desconocida, y además los extremos.
+
+Desde la raíz del repo:
+    python -m benchmarks.stats_benchmark                 # 100 000 sets
+    python -m benchmarks.stats_benchmark --sets 1000000 --seed 7
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+from pokemon_app.services.calculations import STAT_KEYS, compute_stats, compute_stats_batch
+from pokemon_app.utils.nature import NATURE_NAMES, nature_index
+
+# además de las 25: sin naturaleza, vacía y un nombre que no existe (neutras)
+_NATURES = list(NATURE_NAMES) + [None, "", "timid"]
+
+
+def random_sets(n: int, seed: int = 0) -> list[tuple]:
+    """[(base, evs, ivs, nivel, naturaleza)] con base/evs/ivs como tuplas en orden STAT_KEYS."""
+    rnd = random.Random(seed)
+    out = []
+    for nature in _NATURES:
+        for lo in (True, False):
+            b, e, i, lv = (1, 0, 0, 1) if lo else (255, 255, 31, 100)
+            out.append(((b,) * 6, (e,) * 6, (i,) * 6, lv, nature))
+    while len(out) < n:
+        out.append((
+            tuple(rnd.randint(1, 255) for _ in STAT_KEYS),
+            tuple(rnd.randint(0, 255) for _ in STAT_KEYS),
+            tuple(rnd.randint(0, 31) for _ in STAT_KEYS),
+            rnd.randint(1, 100),
+            rnd.choice(_NATURES),
+        ))
+    return out[:n]
+
+
+def bench_scalar(sets: list[tuple]) -> tuple[float, list]:
+    t = time.perf_counter()
+    out = []
+    for base, evs, ivs, level, nature in sets:
+        pd = SimpleNamespace(evs=dict(zip(STAT_KEYS, evs)), level=level, nature=nature)
+        st = compute_stats(pd, dict(zip(STAT_KEYS, base)), dict(zip(STAT_KEYS, ivs)))
+        out.append([st[k] for k in STAT_KEYS])
+    return time.perf_counter() - t, out
+
+
+def bench_batch(sets: list[tuple]) -> tuple[float, list]:
+    # las columnas se arman fuera del cronómetro: el batch recibe arrays ya hechos
+    base = [s[0] for s in sets]
+    evs = [s[1] for s in sets]
+    ivs = [s[2] for s in sets]
+    levels = [s[3] for s in sets]
+    natures = [nature_index(s[4]) for s in sets]
+    t = time.perf_counter()
+    res = compute_stats_batch(base, evs, ivs, levels, natures)
+    dt = time.perf_counter() - t
+    return dt, res.tolist()
+
+
+def run(n: int = 100_000, seed: int = 0) -> dict:
+    """{'sets': n, 'scalar': sets/s, 'batch': sets/s, 'mismatches': filas distintas}"""
+    sets = random_sets(n, seed)
+    dt_s, a = bench_scalar(sets)
+    dt_b, b = bench_batch(sets)
+    return {
+        "sets": len(sets),
+        "scalar": len(sets) / dt_s if dt_s else 0.0,
+        "batch": len(sets) / dt_b if dt_b else 0.0,
+        "mismatches": sum(1 for x, y in zip(a, b) if x != y),
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="compute_stats vs compute_stats_batch (sets/segundo e igualdad).")
+    ap.add_argument("--sets", type=int, default=100_000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    res = run(args.sets, args.seed)
+    print(f"sets: {res['sets']}")
+    print(f"compute_stats:       {res['scalar']:>12,.0f} sets/s")
+    print(f"compute_stats_batch: {res['batch']:>12,.0f} sets/s  (x{res['batch'] / max(res['scalar'], 1e-9):.1f})")
+    print(f"filas distintas: {res['mismatches']}")
+    return 0 if res["mismatches"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,393 @@
+# pokemon_app/db/data_store.py
+"""
+Almacén local de datos de referencia (PokéAPI): base stats, tipos, peso,
+movimientos, learnsets y habilidades.
+
+Sustituye a los JSON de data/ (base_stats.json, types_cache.json,
+moves_cache.json), que se reescribían enteros en cada fallo de caché. Ahora son
+tablas dex_* en la misma base SQLite, con búsquedas por clave primaria y upserts
+atómicos (INSERT ... ON CONFLICT DO UPDATE). Los JSON se importan una sola vez
+(marca "json_import" en data_store_meta).
+
+La fila "rev" de data_store_meta sube en cada escritura; los índices en memoria
+(type_index, get_move_info) la consultan para saber si deben recargar.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .base import Base, engine
+from .models import DataStoreMeta, DexAbility, DexLearnset, DexMove, DexSpecies
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+
+STAT_FIELDS = {"HP": "base_hp", "Atk": "base_atk", "Def": "base_def",
+               "SpA": "base_spa", "SpD": "base_spd", "Spe": "base_spe"}
+
+_TABLES = [DexSpecies.__table__, DexMove.__table__, DexLearnset.__table__,
+           DexAbility.__table__, DataStoreMeta.__table__]
+
+_ready = False
+_ready_lock = threading.Lock()
+
+
+def species_key(name: str) -> str:
+    return (name or "").strip().lower()
+
+
+def move_key(name: str) -> str:
+    return (name or "").strip().lower()
+
+
+# ---------- creación / importación ----------
+def ensure_store() -> None:
+    """Crea las tablas dex_* si faltan e importa los JSON la primera vez."""
+    global _ready
+    if _ready:
+        return
+    with _ready_lock:
+        if _ready:
+            return
+        Base.metadata.create_all(bind=engine, tables=_TABLES)
+        import_json_caches()
+        _ready = True
+
+
+def _get_meta(conn, key: str) -> Optional[str]:
+    return conn.execute(select(DataStoreMeta.value).where(DataStoreMeta.key == key)).scalar()
+
+
+def _set_meta(conn, key: str, value: str) -> None:
+    stmt = sqlite_insert(DataStoreMeta).values(key=key, value=value)
+    conn.execute(stmt.on_conflict_do_update(index_elements=["key"], set_={"value": stmt.excluded.value}))
+
+
+def _bump_rev(conn) -> None:
+    conn.execute(text(
+        "INSERT INTO data_store_meta (key, value) VALUES ('rev', '1') "
+        "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+    ))
+
+
+def revision() -> int:
+    """Contador de escrituras del almacén (0 si nunca se escribió)."""
+    ensure_store()
+    with engine.connect() as conn:
+        try:
+            return int(_get_meta(conn, "rev") or 0)
+        except ValueError:
+            return 0
+
+
+def _read_json(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f) or {}
+    except Exception:
+        return {}
+
+
+def parse_types_json(raw) -> dict[str, list[str]]:
+    """
+    Normaliza los dos formatos que hemos tenido en types_cache.json:
+    A) {"Corviknight": ["Steel","Flying"], ...}
+    B) estilo PokéAPI: {"corviknight": {"types":[{"type":{"name":"steel"}}, ...]}, ...}
+    Devuelve {nombre: tipos capitalizados}.
+    """
+    data: dict[str, list[str]] = {}
+    if not isinstance(raw, dict):
+        return data
+    for key, node in raw.items():
+        try:
+            if isinstance(node, (list, tuple)):
+                name, tnodes = key, node
+            elif isinstance(node, dict):
+                name = node.get("name") or node.get("species", {}).get("name") or key
+                tnodes = node.get("types") or []
+            else:
+                continue
+            types = []
+            for tn in tnodes:
+                # soporta {"type":{"name":"steel"}} o {"name":"steel"} o "steel"
+                if isinstance(tn, dict):
+                    tname = tn["type"].get("name", "") if isinstance(tn.get("type"), dict) else tn.get("name", "")
+                else:
+                    tname = tn
+                tname = str(tname).strip()
+                if tname:
+                    types.append(tname.capitalize())
+            if types and str(name).strip():
+                data[str(name).strip()] = types
+        except Exception:
+            continue
+    return data
+
+
+def import_json_caches(data_dir: str = DATA_DIR, force: bool = False) -> dict:
+    """
+    Vuelca base_stats.json, types_cache.json y moves_cache.json al almacén.
+    Solo corre una vez por base de datos (salvo force=True). Devuelve cuántas
+    filas importó de cada archivo.
+    """
+    Base.metadata.create_all(bind=engine, tables=_TABLES)
+    counts = {"species": 0, "types": 0, "moves": 0}
+    with engine.begin() as conn:
+        if not force and _get_meta(conn, "json_import"):
+            return counts
+
+        stats_rows = []
+        for name, bs in (_read_json(os.path.join(data_dir, "base_stats.json")) or {}).items():
+            if not isinstance(bs, dict):
+                continue
+            try:
+                row = {col: int(bs.get(k, bs.get(k.lower()))) for k, col in STAT_FIELDS.items()}
+            except (TypeError, ValueError):
+                continue
+            stats_rows.append({"key": species_key(name), "name": name, **row})
+        if stats_rows:
+            _upsert_species_rows(conn, stats_rows)
+
+        types_rows = [{"key": species_key(name), "name": name,
+                       "type1": types[0], "type2": types[1] if len(types) > 1 else None}
+                      for name, types in parse_types_json(_read_json(os.path.join(data_dir, "types_cache.json"))).items()]
+        if types_rows:
+            _upsert_species_rows(conn, types_rows)
+
+        move_rows = []
+        for name, meta in (_read_json(os.path.join(data_dir, "moves_cache.json")) or {}).items():
+            if isinstance(meta, dict):
+                move_rows.append(_move_row(meta.get("name") or name, meta))
+        if move_rows:
+            _upsert_move_rows(conn, move_rows)
+
+        counts = {"species": len(stats_rows), "types": len(types_rows), "moves": len(move_rows)}
+        _set_meta(conn, "json_import", datetime.utcnow().isoformat(timespec="seconds"))
+        _bump_rev(conn)
+    return counts
+
+
+# ---------- upserts ----------
+def _upsert_species_rows(conn, rows: list[dict]) -> None:
+    """Todas las filas deben traer las mismas columnas; solo esas se actualizan."""
+    now = datetime.utcnow()
+    rows = [{**r, "updated_at": now} for r in rows]
+    stmt = sqlite_insert(DexSpecies)
+    cols = [c for c in rows[0] if c != "key"]
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=["key"], set_={c: stmt.excluded[c] for c in cols}), rows)
+
+
+def _move_row(name: str, meta: dict) -> dict:
+    def _int(v):
+        try:
+            return int(v) if v is not None else None
+        except (TypeError, ValueError):
+            return None
+    return {
+        "key": move_key(name),
+        "name": name,
+        "type": str(meta.get("type") or "").capitalize() or None,
+        "power": _int(meta.get("power")),
+        "damage_class": str(meta.get("damage_class") or "").lower() or None,
+        "accuracy": _int(meta.get("accuracy")),
+    }
+
+
+def _upsert_move_rows(conn, rows: list[dict]) -> None:
+    now = datetime.utcnow()
+    rows = [{**r, "updated_at": now} for r in rows]
+    stmt = sqlite_insert(DexMove)
+    cols = [c for c in rows[0] if c != "key"]
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=["key"], set_={c: stmt.excluded[c] for c in cols}), rows)
+
+
+def _species_row(name: str, stats: Optional[dict], types: Optional[Iterable[str]],
+                 weight_kg: Optional[float]) -> dict:
+    row: dict = {"key": species_key(name), "name": name.strip()}
+    if stats:
+        row.update({col: int(stats[k]) for k, col in STAT_FIELDS.items()})
+    if types is not None:
+        tl = [str(t).capitalize() for t in types if t]
+        row.update(type1=tl[0] if tl else None, type2=tl[1] if len(tl) > 1 else None)
+    if weight_kg is not None:
+        row["weight_kg"] = float(weight_kg)
+    return row
+
+
+def _replace_abilities(conn, species: str, abilities: Iterable[tuple[str, bool]]) -> None:
+    key = species_key(species)
+    rows = {}
+    for name, hidden in abilities:
+        if name and name.strip():
+            rows[name.strip()] = {"species_key": key, "ability": name.strip(), "is_hidden": bool(hidden)}
+    conn.execute(delete(DexAbility).where(DexAbility.species_key == key))
+    if rows:
+        conn.execute(sqlite_insert(DexAbility), list(rows.values()))
+
+
+def upsert_species_data(
+    name: str,
+    stats: Optional[dict] = None,
+    types: Optional[Iterable[str]] = None,
+    weight_kg: Optional[float] = None,
+) -> None:
+    """Inserta o actualiza una especie; solo toca los campos que se pasan."""
+    ensure_store()
+    with engine.begin() as conn:
+        _upsert_species_rows(conn, [_species_row(name, stats, types, weight_kg)])
+        _bump_rev(conn)
+
+
+def store_batch(species: Iterable[dict] = (), moves: Iterable[dict] = ()) -> None:
+    """
+    Escribe muchas especies y movimientos en una sola transacción.
+    species: [{"name", "stats", "types", "weight_kg", "abilities"}] (campos opcionales salvo name)
+    moves:   [{"name", "type", "power", "damage_class", "accuracy"}]
+    """
+    ensure_store()
+    species = list(species); moves = list(moves)
+    if not species and not moves:
+        return
+    # executemany exige las mismas columnas en todas las filas: se agrupan
+    groups: dict[tuple, list[dict]] = {}
+    for sp in species:
+        row = _species_row(sp["name"], sp.get("stats"), sp.get("types"), sp.get("weight_kg"))
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    with engine.begin() as conn:
+        for rows in groups.values():
+            _upsert_species_rows(conn, rows)
+        for sp in species:
+            if sp.get("abilities"):
+                _replace_abilities(conn, sp["name"], sp["abilities"])
+        if moves:
+            _upsert_move_rows(conn, [_move_row(m["name"], m) for m in moves])
+        _bump_rev(conn)
+
+
+def upsert_move_data(info: dict) -> None:
+    """info con el formato de move_provider: name, type, power, damage_class, accuracy."""
+    ensure_store()
+    with engine.begin() as conn:
+        _upsert_move_rows(conn, [_move_row(info["name"], info)])
+        _bump_rev(conn)
+
+
+def set_learnset(species: str, moves: Iterable[str]) -> None:
+    """Reemplaza el learnset completo de la especie en una sola transacción."""
+    ensure_store()
+    key = species_key(species)
+    rows = [{"species_key": key, "move": m} for m in dict.fromkeys(m.strip() for m in moves if m and m.strip())]
+    with engine.begin() as conn:
+        conn.execute(delete(DexLearnset).where(DexLearnset.species_key == key))
+        if rows:
+            conn.execute(sqlite_insert(DexLearnset), rows)
+        _bump_rev(conn)
+
+
+def set_abilities(species: str, abilities: Iterable[tuple[str, bool]]) -> None:
+    """abilities: [(nombre, es_oculta)]; reemplaza las de la especie."""
+    ensure_store()
+    with engine.begin() as conn:
+        _replace_abilities(conn, species, abilities)
+        _bump_rev(conn)
+
+
+# ---------- consultas ----------
+def _stats_of(row) -> Optional[dict]:
+    vals = {k: getattr(row, col) for k, col in STAT_FIELDS.items()}
+    return vals if all(v for v in vals.values()) else None
+
+
+def _types_of(row) -> list[str]:
+    return [t for t in (row.type1, row.type2) if t]
+
+
+def get_species(name: str) -> Optional[dict]:
+    """{name, stats (o None), types, weight_kg} o None si la especie no está."""
+    ensure_store()
+    with engine.connect() as conn:
+        row = conn.execute(select(DexSpecies).where(DexSpecies.key == species_key(name))).first()
+    if row is None:
+        return None
+    return {"name": row.name, "stats": _stats_of(row), "types": _types_of(row), "weight_kg": row.weight_kg}
+
+
+def get_base_stats(name: str) -> Optional[dict]:
+    sp = get_species(name)
+    return sp["stats"] if sp else None
+
+
+def get_types(name: str) -> list[str]:
+    sp = get_species(name)
+    return sp["types"] if sp else []
+
+
+def get_weight_kg(name: str) -> Optional[float]:
+    sp = get_species(name)
+    return sp["weight_kg"] if sp else None
+
+
+def all_base_stats() -> dict[str, dict]:
+    """{nombre: base stats} de las especies con stats completas."""
+    ensure_store()
+    out = {}
+    with engine.connect() as conn:
+        for row in conn.execute(select(DexSpecies)):
+            st = _stats_of(row)
+            if st:
+                out[row.name] = st
+    return out
+
+
+def all_types() -> dict[str, list[str]]:
+    """{clave en minúsculas: tipos} de las especies con tipos conocidos."""
+    ensure_store()
+    with engine.connect() as conn:
+        rows = conn.execute(select(DexSpecies.key, DexSpecies.type1, DexSpecies.type2)
+                            .where(DexSpecies.type1.is_not(None))).all()
+    return {k: [t for t in (t1, t2) if t] for k, t1, t2 in rows}
+
+
+def _move_dict(row) -> dict:
+    return {"name": row.name, "type": row.type, "power": row.power,
+            "damage_class": row.damage_class, "accuracy": row.accuracy}
+
+
+def get_move(name: str) -> Optional[dict]:
+    ensure_store()
+    with engine.connect() as conn:
+        row = conn.execute(select(DexMove).where(DexMove.key == move_key(name))).first()
+    return _move_dict(row) if row is not None else None
+
+
+def all_moves() -> dict[str, dict]:
+    """{nombre: meta} con el mismo formato que tenía moves_cache.json."""
+    ensure_store()
+    with engine.connect() as conn:
+        return {row.name: _move_dict(row) for row in conn.execute(select(DexMove))}
+
+
+def get_learnset(species: str) -> Optional[list[str]]:
+    """Movimientos aprendibles guardados (None si nunca se descargaron)."""
+    ensure_store()
+    with engine.connect() as conn:
+        moves = conn.execute(select(DexLearnset.move)
+                             .where(DexLearnset.species_key == species_key(species))).scalars().all()
+    return sorted(moves, key=str.casefold) if moves else None
+
+
+def get_abilities(species: str) -> Optional[list[tuple[str, bool]]]:
+    """[(habilidad, es_oculta)] guardadas (None si nunca se descargaron)."""
+    ensure_store()
+    with engine.connect() as conn:
+        rows = conn.execute(select(DexAbility.ability, DexAbility.is_hidden)
+                            .where(DexAbility.species_key == species_key(species))).all()
+    return [(a, bool(h)) for a, h in rows] if rows else None
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from datetime import datetime
-from sqlalchemy import Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy import Integer, String, ForeignKey, DateTime, Text, Float, Boolean, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base
 
@@ -35,8 +35,39 @@ class PokemonSet(Base):
     raw_text: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
+    # stats finales precalculadas (se mantienen al guardar/editar; ver repository.apply_set_stats)
+    stat_hp: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    stat_atk: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    stat_def: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    stat_spa: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    stat_spd: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    stat_spe: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+
     species: Mapped[Species] = relationship(back_populates="sets")
 
+    # movimientos normalizados (espejo de moves_json; ver repository._sync_set_moves)
+    move_links: Mapped[list["SetMove"]] = relationship(
+        back_populates="pset", cascade="all, delete-orphan", order_by="SetMove.slot")
+
+class Move(Base):
+    """Movimientos que aparecen en sets guardados (dimensión para set_moves)."""
+    __tablename__ = "moves"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    key: Mapped[str] = mapped_column(String(64), unique=True)     # repository.set_move_key(name)
+    name: Mapped[str] = mapped_column(String(64))
+
+class SetMove(Base):
+    __tablename__ = "set_moves"
+    set_id: Mapped[int] = mapped_column(ForeignKey("pokemon_sets.id", ondelete="CASCADE"), primary_key=True)
+    slot: Mapped[int] = mapped_column(Integer, primary_key=True)
+    move_id: Mapped[int] = mapped_column(ForeignKey("moves.id"))
+
+    # "sets con X" = búsqueda por move_id
+    __table_args__ = (Index("ix_set_moves_move_set", "move_id", "set_id"),)
+
+    pset: Mapped[PokemonSet] = relationship(back_populates="move_links")
+    move: Mapped[Move] = relationship()
+
 class SpeedPreset(Base):
     __tablename__ = "speed_presets"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -50,3 +81,46 @@ class SpeedPreset(Base):
     ability_label: Mapped[str] = mapped_column(String(64), default="—")
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+# ---------- Datos de referencia (PokéAPI) — ver db/data_store.py ----------
+class DexSpecies(Base):
+    __tablename__ = "dex_species"
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)     # nombre en minúsculas
+    name: Mapped[str] = mapped_column(String(64))
+    base_hp: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    base_atk: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    base_def: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    base_spa: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    base_spd: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    base_spe: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    type1: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    type2: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    weight_kg: Mapped[float | None] = mapped_column(Float, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+class DexMove(Base):
+    __tablename__ = "dex_moves"
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)     # nombre en minúsculas
+    name: Mapped[str] = mapped_column(String(64))
+    type: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    power: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    damage_class: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    accuracy: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+class DexLearnset(Base):
+    __tablename__ = "dex_learnsets"
+    species_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    move: Mapped[str] = mapped_column(String(64), primary_key=True)
+
+class DexAbility(Base):
+    __tablename__ = "dex_abilities"
+    species_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    ability: Mapped[str] = mapped_column(String(64), primary_key=True)
+    is_hidden: Mapped[bool] = mapped_column(Boolean, default=False)
+
+class DataStoreMeta(Base):
+    __tablename__ = "data_store_meta"
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    value: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -1,30 +1,272 @@
 from __future__ import annotations
 
 import json
+import re
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Tuple, List, Optional
-from sqlalchemy import select, asc, desc, func, delete
+from itertools import chain
+from typing import Dict, Iterable, Tuple, List, Optional
+from sqlalchemy import select, asc, desc, func, delete, inspect, text, event, literal, tuple_, union_all
+from sqlalchemy import table, column, literal_column, or_
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 from .base import Base, engine, session_scope
-from .models import Species, PokemonSet, SpeedPreset
+from .models import Species, PokemonSet, SpeedPreset, Move, SetMove
+from .data_store import ensure_store
+from .set_records import ABILITY_CODES, ITEM_CODES, STAT_ORDER, SetRecord
+from ..models.pokemon import PokemonData
+from ..services.calculations import STAT_COLUMNS, compute_set_stats, compute_set_stats_batch, compute_stats
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    migrate_stat_columns()
+    backfill_set_stats()
+    create_filter_indexes()
+    backfill_set_moves()
+    create_search_index()
+    ensure_store()
+
+def migrate_stat_columns() -> None:
+    """Agrega las columnas stat_* (y el índice de stat_spe) a bases creadas antes de existir."""
+    existing = {c["name"] for c in inspect(engine).get_columns(PokemonSet.__tablename__)}
+    with engine.begin() as conn:
+        for col in STAT_COLUMNS.values():
+            if col not in existing:
+                conn.execute(text(f"ALTER TABLE {PokemonSet.__tablename__} ADD COLUMN {col} INTEGER"))
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_pokemon_sets_stat_spe ON {PokemonSet.__tablename__} (stat_spe)"
+        ))
+
+# columnas de filtro exacto: índice sin distinguir mayúsculas (col = ? COLLATE NOCASE)
+_NOCASE_COLUMNS = ("nature", "item", "ability", "tera_type")
+
+def create_filter_indexes() -> None:
+    """Índices COLLATE NOCASE de los filtros de list_sets (idempotente, también en bases antiguas)."""
+    table = PokemonSet.__tablename__
+    with engine.begin() as conn:
+        for col in _NOCASE_COLUMNS:
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_{col}_nocase ON {table} ({col} COLLATE NOCASE)"
+            ))
+
+def _set_evs_ivs(pset: PokemonSet) -> tuple[dict, dict]:
+    try:
+        evs = json.loads(pset.evs_json) if pset.evs_json else {}
+        ivs = json.loads(pset.ivs_json) if pset.ivs_json else {}
+    except Exception:
+        evs, ivs = {}, {}
+    return evs, ivs
+
+def _assign_set_stats(pset: PokemonSet, stats: Dict[str, int]) -> None:
+    for key, col in STAT_COLUMNS.items():
+        setattr(pset, col, int(stats[key]))
+
+def apply_set_stats(pset: PokemonSet, species: Species) -> None:
+    """Recalcula y asigna las columnas stat_* de un set a partir de sus EVs/IVs actuales."""
+    evs, ivs = _set_evs_ivs(pset)
+    _assign_set_stats(pset, compute_set_stats(species, pset.level, pset.nature, evs, ivs))
+
+def backfill_set_stats() -> int:
+    """Rellena (una sola vez) las stats de los sets que aún no las tienen. Devuelve cuántos tocó."""
+    done = 0
+    with session_scope() as s:
+        stmt = (select(PokemonSet, Species)
+                .join(Species, PokemonSet.species_id == Species.id)
+                .where(PokemonSet.stat_hp.is_(None)))
+        rows = s.execute(stmt).all()
+        try:
+            # todos de una vez (compute_set_stats_batch); si alguno no vale, set a set
+            stats = compute_set_stats_batch([(sp, pset.level, pset.nature, *_set_evs_ivs(pset))
+                                             for pset, sp in rows])
+            for (pset, _sp), st in zip(rows, stats):
+                _assign_set_stats(pset, st)
+            return len(rows)
+        except Exception:
+            pass
+        for pset, sp in rows:
+            try:
+                apply_set_stats(pset, sp)
+                done += 1
+            except Exception:
+                continue
+    return done
+
+# ---------- movimientos normalizados (moves / set_moves) ----------
+def set_move_key(name: str) -> str:
+    """'Fake Out', 'fake-out', ' FAKE  OUT ' -> 'fake out'."""
+    return re.sub(r"[\s\-]+", " ", (name or "").strip().lower()).strip()
+
+def _sync_set_moves(session: Session, pset: PokemonSet, known: Dict[str, Move]) -> None:
+    """Alinea pset.move_links con pset.moves_json. `known` cachea Move por clave dentro del flush."""
+    try:
+        names = [str(m).strip() for m in (json.loads(pset.moves_json or "[]") or [])]
+    except Exception:
+        names = []
+    names = [n for n in names if set_move_key(n)]
+    keys = [set_move_key(n) for n in names]
+    missing = [k for k in set(keys) if k not in known]
+    if missing:
+        for mv in session.scalars(select(Move).where(Move.key.in_(missing))):
+            known[mv.key] = mv
+    links = pset.move_links
+    for slot, (name, key) in enumerate(zip(names, keys)):
+        mv = known.get(key)
+        if mv is None:
+            mv = known[key] = Move(key=key, name=name)
+            session.add(mv)
+        if slot < len(links):
+            links[slot].move = mv      # se reutiliza la fila (misma PK set_id+slot)
+        else:
+            links.append(SetMove(slot=slot, move=mv))
+    del links[len(names):]
+
+@event.listens_for(Session, "before_flush")
+def _sets_before_flush(session, _flush_context, _instances) -> None:
+    # todo alta/edición de moves_json (repositorio, pestañas, importadores) mantiene set_moves
+    known: Dict[str, Move] = {}
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, PokemonSet):
+            continue
+        if obj in session.new or inspect(obj).attrs.moves_json.history.has_changes():
+            _sync_set_moves(session, obj, known)
+
+def backfill_set_moves() -> int:
+    """Rellena set_moves de los sets guardados antes de existir la tabla. Devuelve cuántos tocó."""
+    done = 0
+    with session_scope() as s:
+        has_links = select(SetMove.set_id).where(SetMove.set_id == PokemonSet.id).exists()
+        stmt = select(PokemonSet).where(~has_links, PokemonSet.moves_json.notin_(["", "[]"]))
+        known: Dict[str, Move] = {}
+        for pset in s.scalars(stmt):
+            _sync_set_moves(s, pset, known)
+            done += 1
+    return done
+
+# ---------- búsqueda de texto completo (FTS5) ----------
+# sets_fts: una fila por set (rowid = pokemon_sets.id), mantenida por triggers.
+_FTS_TABLE = "sets_fts"
+_FTS_COLUMNS = ("species", "item", "ability", "tera", "moves", "raw_text")
+_FTS_WEIGHTS = "bm25(10.0, 4.0, 4.0, 2.0, 3.0, 1.0)"     # especie > item/habilidad > movs > tera > pegado
+_fts = table(_FTS_TABLE, column("rowid"), column("rank"))
+_fts_ready: Optional[bool] = None
+
+# valores de una fila de sets_fts a partir de un pokemon_sets (NEW.* / s.*)
+_FTS_ROW = """
+    {r}.id,
+    (SELECT name FROM species WHERE id = {r}.species_id),
+    {r}.item, {r}.ability, {r}.tera_type,
+    CASE WHEN json_valid({r}.moves_json)
+         THEN (SELECT group_concat(value, ' ') FROM json_each({r}.moves_json)) END,
+    {r}.raw_text
+"""
+
+def create_search_index() -> bool:
+    """
+    Crea (una vez) la tabla FTS5 y los triggers que la sincronizan con
+    pokemon_sets/species, y la llena con los sets existentes. Devuelve False si
+    el SQLite no trae FTS5 (search_sets cae entonces a ILIKE).
+    """
+    global _fts_ready
+    cols = ", ".join(_FTS_COLUMNS)
+    sets_t = PokemonSet.__tablename__
+    with engine.begin() as conn:
+        exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = :n"), {"n": _FTS_TABLE}).first()
+        if not exists:
+            try:
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE {_FTS_TABLE} USING fts5("
+                    f"{cols}, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+                ))
+            except OperationalError:
+                _fts_ready = False
+                return False
+            conn.execute(text(f"INSERT INTO {_FTS_TABLE}({_FTS_TABLE}, rank) VALUES ('rank', :w)"),
+                         {"w": _FTS_WEIGHTS})
+            conn.execute(text(
+                f"INSERT INTO {_FTS_TABLE}(rowid, {cols}) SELECT {_FTS_ROW.format(r='s')} FROM {sets_t} AS s"
+            ))
+        for stmt in (
+            f"""CREATE TRIGGER IF NOT EXISTS {_FTS_TABLE}_ai AFTER INSERT ON {sets_t} BEGIN
+                  INSERT INTO {_FTS_TABLE}(rowid, {cols}) VALUES ({_FTS_ROW.format(r='NEW')});
+                END""",
+            f"""CREATE TRIGGER IF NOT EXISTS {_FTS_TABLE}_au AFTER UPDATE ON {sets_t} BEGIN
+                  DELETE FROM {_FTS_TABLE} WHERE rowid = OLD.id;
+                  INSERT INTO {_FTS_TABLE}(rowid, {cols}) VALUES ({_FTS_ROW.format(r='NEW')});
+                END""",
+            f"""CREATE TRIGGER IF NOT EXISTS {_FTS_TABLE}_ad AFTER DELETE ON {sets_t} BEGIN
+                  DELETE FROM {_FTS_TABLE} WHERE rowid = OLD.id;
+                END""",
+            f"""CREATE TRIGGER IF NOT EXISTS {_FTS_TABLE}_species_au AFTER UPDATE OF name ON species BEGIN
+                  UPDATE {_FTS_TABLE} SET species = NEW.name
+                   WHERE rowid IN (SELECT id FROM {sets_t} WHERE species_id = NEW.id);
+                END""",
+        ):
+            conn.execute(text(stmt))
+    _fts_ready = True
+    return True
+
+def search_index_ready() -> bool:
+    """True si la tabla FTS5 existe (se mira una vez por proceso)."""
+    global _fts_ready
+    if _fts_ready is None:
+        with engine.connect() as conn:
+            _fts_ready = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = :n"), {"n": _FTS_TABLE}).first() is not None
+    return _fts_ready
+
+def fts_query(query: str) -> str:
+    """Texto libre -> consulta FTS5: cada palabra como prefijo, todas obligatorias ('fake prot' -> "fake"* "prot"*)."""
+    return " ".join(f'"{w}"*' for w in re.findall(r"\w+", query or ""))
+
+def _search_filter(query: str):
+    """Condición sobre PokemonSet.id para el texto `query` (FTS5, o ILIKE si no hay índice)."""
+    match = fts_query(query)
+    if not match:
+        return None
+    if search_index_ready():
+        return PokemonSet.id.in_(
+            select(_fts.c.rowid).where(literal_column(_FTS_TABLE).op("MATCH")(match)))
+    like = f"%{query.strip()}%"
+    return or_(Species.name.ilike(like), PokemonSet.item.ilike(like), PokemonSet.ability.ilike(like),
+               PokemonSet.tera_type.ilike(like), PokemonSet.moves_json.ilike(like))
+
+def search_sets(session: Session, query: str, limit: Optional[int] = 50):
+    """
+    Sets que contienen todas las palabras de `query` (como prefijo) en especie,
+    item, habilidad, tera, movimientos o el texto pegado, de más a menos
+    relevante (bm25 con más peso en la especie). [(PokemonSet, Species), ...]
+    """
+    match = fts_query(query)
+    if not match:
+        return []
+    stmt = select(PokemonSet, Species).join(Species, PokemonSet.species_id == Species.id)
+    if search_index_ready():
+        stmt = (stmt.join(_fts, _fts.c.rowid == PokemonSet.id)
+                .where(literal_column(_FTS_TABLE).op("MATCH")(match))
+                .order_by(_fts.c.rank, PokemonSet.id))
+    else:
+        stmt = stmt.where(_search_filter(query)).order_by(Species.name, PokemonSet.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return session.execute(stmt).all()
+
+def _new_species(name: str, base_stats: Dict[str, int]) -> Species:
+    return Species(
+        name=name,
+        base_hp=base_stats["HP"],
+        base_atk=base_stats["Atk"],
+        base_def=base_stats["Def"],
+        base_spa=base_stats["SpA"],
+        base_spd=base_stats["SpD"],
+        base_spe=base_stats["Spe"],
+    )
 
 def upsert_species(name: str, base_stats: Dict[str, int]) -> Species:
     with session_scope() as s:
         stmt = select(Species).where(Species.name == name)
         sp = s.scalar(stmt)
         if not sp:
-            sp = Species(
-                name=name,
-                base_hp=base_stats["HP"],
-                base_atk=base_stats["Atk"],
-                base_def=base_stats["Def"],
-                base_spa=base_stats["SpA"],
-                base_spd=base_stats["SpD"],
-                base_spe=base_stats["Spe"],
-            )
+            sp = _new_species(name, base_stats)
             s.add(sp)
             s.flush()
         return sp
@@ -43,40 +285,73 @@ def save_pokemon_set(
     base_stats_registry: Dict[str, Dict[str, int]],
     raw_text: str | None = None,
 ) -> int:
-    # Asegura/actualiza especie (fuera de la sesión para obtener el objeto base)
-    sp = upsert_species(name, base_stats_registry[name])
+    entry = dict(name=name, gender=gender, item=item, ability=ability, level=level, tera_type=tera_type,
+                 nature=nature, evs=evs, ivs=ivs, moves=moves, raw_text=raw_text)
+    return save_pokemon_sets([entry], base_stats_registry)[0]
 
-    # Guarda el set dentro de la sesión y devuelve el ID primitivo
+def save_pokemon_sets(
+    entries: list[dict],
+    base_stats_registry: Dict[str, Dict[str, int]],
+    batch_size: int = 500,
+    progress=None,
+) -> list[int]:
+    """
+    Guarda varios sets en UNA transacción y devuelve sus IDs (en el mismo orden).
+
+    entries: dicts con name, gender, item, ability, level, tera_type, nature,
+    evs, ivs, moves y raw_text (opcional). Las especies que aún no están en la
+    tabla species se crean primero con base_stats_registry[name]. Los INSERT se
+    vacían cada `batch_size` sets; SQLAlchemy los agrupa en sentencias
+    multi-VALUES. progress(hechos, total) tras cada lote.
+    """
+    if not entries:
+        return []
     with session_scope() as s:
-        sp = s.merge(sp)  # adjunta a la sesión actual
-
-        pset = PokemonSet(
-            species_id=sp.id,
-            gender=gender,
-            item=item,
-            ability=ability,
-            level=level,
-            tera_type=tera_type,
-            nature=nature,
-            evs_json=json.dumps(evs, ensure_ascii=False),
-            ivs_json=json.dumps(ivs, ensure_ascii=False),
-            moves_json=json.dumps(moves, ensure_ascii=False),
-            raw_text=raw_text,
-        )
-        s.add(pset)
-        s.flush()            # asegura que el ID se asigne por el motor
-        new_id = pset.id     # léelo ANTES de cerrar la sesión
-
-        # session_scope() normalmente hace commit al salir
-        # si el tuyo no, podrías añadir: s.commit()
-
-    return new_id
+        names = {e["name"] for e in entries}
+        species = {sp.name: sp for sp in s.scalars(select(Species).where(Species.name.in_(names)))}
+        for name in sorted(names - species.keys()):
+            sp = species[name] = _new_species(name, base_stats_registry[name])
+            s.add(sp)
+        s.flush()
 
+        # stats de todos los sets en una pasada vectorizada
+        stats = compute_set_stats_batch([
+            (species[e["name"]], e.get("level") or 50, e.get("nature"), e.get("evs") or {}, e.get("ivs") or {})
+            for e in entries
+        ])
 
-def list_sets(
-    session: Session,
+        psets = []
+        for n, (e, st) in enumerate(zip(entries, stats), 1):
+            sp = species[e["name"]]
+            pset = PokemonSet(
+                species_id=sp.id,
+                gender=e.get("gender"),
+                item=e.get("item"),
+                ability=e.get("ability"),
+                level=e.get("level") or 50,
+                tera_type=e.get("tera_type"),
+                nature=e.get("nature"),
+                evs_json=json.dumps(e.get("evs") or {}, ensure_ascii=False),
+                ivs_json=json.dumps(e.get("ivs") or {}, ensure_ascii=False),
+                moves_json=json.dumps(e.get("moves") or [], ensure_ascii=False),
+                raw_text=e.get("raw_text"),
+            )
+            _assign_set_stats(pset, st)
+            s.add(pset)
+            psets.append(pset)
+            if n % batch_size == 0 or n == len(entries):
+                s.flush()            # asigna IDs del lote
+                if progress:
+                    progress(n, len(entries))
+        return [p.id for p in psets]
+
+_SET_FILTERS = ("only_species", "search", "nature", "item", "ability", "tera", "level_min", "level_max",
+                "date_from", "date_to", "move_contains", "spe_min", "spe_max", "ids")
+
+def _apply_set_filters(
+    stmt,
     only_species: Optional[str] = None,
-    limit: Optional[int] = None,
+    search: Optional[str] = None,
     nature: Optional[str] = None,
     item: Optional[str] = None,
     ability: Optional[str] = None,
@@ -86,21 +361,25 @@ def list_sets(
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
     move_contains: Optional[list[str]] = None,
-    order_by: Optional[str] = None,
-    order_dir: str = "desc",
-    offset: Optional[int] = None,
+    spe_min: Optional[int] = None,
+    spe_max: Optional[int] = None,
+    ids: Optional[Iterable[int]] = None,
 ):
-    stmt = select(PokemonSet, Species).join(Species, PokemonSet.species_id == Species.id)
+    """WHERE común de list_sets / list_sets_page / count_sets (stmt ya unido con Species)."""
     if only_species:
         stmt = stmt.where(Species.name.ilike(only_species))
+    if search:
+        cond = _search_filter(search)
+        if cond is not None:
+            stmt = stmt.where(cond)
     if nature:
-        stmt = stmt.where(PokemonSet.nature.ilike(nature))
+        stmt = stmt.where(_ci_match(PokemonSet.nature, nature))
     if item:
-        stmt = stmt.where(PokemonSet.item.ilike(item))
+        stmt = stmt.where(_ci_match(PokemonSet.item, item))
     if ability:
-        stmt = stmt.where(PokemonSet.ability.ilike(ability))
+        stmt = stmt.where(_ci_match(PokemonSet.ability, ability))
     if tera:
-        stmt = stmt.where(PokemonSet.tera_type.ilike(tera))
+        stmt = stmt.where(_ci_match(PokemonSet.tera_type, tera))
     if level_min is not None:
         stmt = stmt.where(PokemonSet.level >= level_min)
     if level_max is not None:
@@ -111,31 +390,285 @@ def list_sets(
         stmt = stmt.where(PokemonSet.created_at <= date_to)
     if move_contains:
         for token in move_contains:
-            stmt = stmt.where(PokemonSet.moves_json.ilike(token))
+            stmt = stmt.where(PokemonSet.id.in_(_sets_with_move(token)))
+    if spe_min is not None:
+        stmt = stmt.where(PokemonSet.stat_spe >= spe_min)
+    if spe_max is not None:
+        stmt = stmt.where(PokemonSet.stat_spe <= spe_max)
+    if ids is not None:
+        stmt = stmt.where(PokemonSet.id.in_(list(ids)))
+    return stmt
+
+def _ci_match(col, value: str):
+    """Igualdad sin mayúsculas (usa el índice NOCASE); con comodines % o _ cae a ILIKE."""
+    if "%" in value or "_" in value:
+        return col.ilike(value)
+    return col.collate("NOCASE") == value
+
+def _sets_with_move(token: str):
+    """
+    Subconsulta de set_id que llevan el movimiento `token` (acepta los patrones
+    '%Protect%' de antes). Nombre exacto -> búsqueda por moves.key (único) y
+    ix_set_moves_move_set, sin recorrer pokemon_sets. Con comodines % o _ ->
+    LIKE sobre moves.key, normalizando solo el texto entre comodines.
+    """
+    if "%" in token or "_" in token:
+        parts = re.split(r"([%_])", token.strip())
+        pattern = "".join(p if p in ("%", "_") else re.sub(r"[\s\-]+", " ", p.lower()) for p in parts)
+        cond = Move.key.like(pattern)
+    else:
+        cond = Move.key == set_move_key(token)
+    return select(SetMove.set_id).join(Move, Move.id == SetMove.move_id).where(cond)
+
+def _sort_key(order_by: Optional[str]):
+    """
+    Expresión de orden para `order_by`. Las columnas opcionales van con COALESCE
+    para que el cursor (valor, id) nunca lleve NULL y la comparación de tuplas
+    funcione; el orden resultante es el mismo (NULL y '' quedan primero en asc).
+    """
     ob = (order_by or "created").lower()
-    use_dir = desc if (order_dir or "desc").lower() == "desc" else asc
     if ob == "id":
-        stmt = stmt.order_by(use_dir(PokemonSet.id))
-    elif ob == "species":
-        stmt = stmt.order_by(use_dir(Species.name))
-    elif ob == "level":
-        stmt = stmt.order_by(use_dir(PokemonSet.level))
-    elif ob == "nature":
-        stmt = stmt.order_by(use_dir(PokemonSet.nature))
-    elif ob == "tera":
-        stmt = stmt.order_by(use_dir(PokemonSet.tera_type))
-    elif ob == "item":
-        stmt = stmt.order_by(use_dir(PokemonSet.item))
-    elif ob == "ability":
-        stmt = stmt.order_by(use_dir(PokemonSet.ability))
-    else:
-        stmt = stmt.order_by(use_dir(PokemonSet.created_at))
+        return PokemonSet.id
+    if ob == "species":
+        return Species.name
+    if ob == "level":
+        return PokemonSet.level
+    if ob == "nature":
+        return func.coalesce(PokemonSet.nature, "")
+    if ob == "tera":
+        return func.coalesce(PokemonSet.tera_type, "")
+    if ob == "item":
+        return func.coalesce(PokemonSet.item, "")
+    if ob == "ability":
+        return func.coalesce(PokemonSet.ability, "")
+    if ob in ("spe", "speed"):
+        return func.coalesce(PokemonSet.stat_spe, -1)
+    return PokemonSet.created_at
+
+def list_sets(
+    session: Session,
+    only_species: Optional[str] = None,
+    limit: Optional[int] = None,
+    nature: Optional[str] = None,
+    item: Optional[str] = None,
+    ability: Optional[str] = None,
+    tera: Optional[str] = None,
+    level_min: Optional[int] = None,
+    level_max: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    move_contains: Optional[list[str]] = None,
+    order_by: Optional[str] = None,
+    order_dir: str = "desc",
+    offset: Optional[int] = None,
+    spe_min: Optional[int] = None,
+    spe_max: Optional[int] = None,
+    search: Optional[str] = None,
+):
+    stmt = select(PokemonSet, Species).join(Species, PokemonSet.species_id == Species.id)
+    stmt = _apply_set_filters(
+        stmt, only_species=only_species, search=search, nature=nature, item=item, ability=ability, tera=tera,
+        level_min=level_min, level_max=level_max, date_from=date_from, date_to=date_to,
+        move_contains=move_contains, spe_min=spe_min, spe_max=spe_max,
+    )
+    use_dir = desc if (order_dir or "desc").lower() == "desc" else asc
+    stmt = stmt.order_by(use_dir(_sort_key(order_by)), use_dir(PokemonSet.id))
     if offset is not None:
         stmt = stmt.offset(offset)
     if limit is not None:
         stmt = stmt.limit(limit)
     return session.execute(stmt).all()
 
+_BASE_COLUMNS = (Species.base_hp, Species.base_atk, Species.base_def,
+                 Species.base_spa, Species.base_spd, Species.base_spe)
+
+def _stat_tuple(raw: Optional[str], default: int, intern: dict) -> tuple:
+    # los mismos EVs/IVs se repiten mucho: se parsea cada JSON distinto una sola vez
+    key = (default, raw)
+    hit = intern.get(key)
+    if hit is not None:
+        return hit
+    try:
+        d = json.loads(raw) if raw else {}
+    except Exception:
+        d = {}
+    if not isinstance(d, dict):
+        d = {}
+    t = tuple(default if d.get(k) is None else int(d[k]) for k in STAT_ORDER)
+    t = intern[key] = intern.setdefault(t, t)
+    return t
+
+
+def load_set_records(
+    session: Session,
+    *,
+    get_types=None,
+    order_by: Optional[str] = None,
+    order_dir: str = "desc",
+    limit: Optional[int] = None,
+    **filters,
+) -> list[SetRecord]:
+    """
+    Sets guardados como SetRecord (db/set_records.py) para los bucles de
+    cálculo. Mismos filtros y orden que list_sets, pero con SELECT de Core sobre
+    la conexión (filas planas, sin objetos ORM ni instrumentación) y dos
+    consultas en total: sets+especie y set_moves+moves.
+
+    get_types(especie, habilidad, género) -> tipos; se llama una vez por
+    combinación distinta y se guarda como type_codes.
+    """
+    from ..services.types import type_id
+
+    unknown = set(filters) - set(_SET_FILTERS)
+    if unknown:
+        raise TypeError(f"Filtros desconocidos: {sorted(unknown)}")
+
+    stat_cols = [getattr(PokemonSet, STAT_COLUMNS[k]) for k in STAT_ORDER]
+    stmt = select(
+        PokemonSet.id, PokemonSet.species_id, Species.name, PokemonSet.level, PokemonSet.nature,
+        PokemonSet.gender, PokemonSet.tera_type, PokemonSet.item, PokemonSet.ability,
+        PokemonSet.evs_json, PokemonSet.ivs_json, *stat_cols, *_BASE_COLUMNS,
+    ).join(Species, PokemonSet.species_id == Species.id)
+    stmt = _apply_set_filters(stmt, **filters)
+    use_dir = desc if (order_dir or "desc").lower() == "desc" else asc
+    stmt = stmt.order_by(use_dir(_sort_key(order_by)), use_dir(PokemonSet.id))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    conn = session.connection()
+    rows = conn.execute(stmt).all()
+    if not rows:
+        return []
+
+    # movimientos por set (mismo filtro como subconsulta; sin IN con miles de parámetros)
+    links_stmt = (select(SetMove.set_id, SetMove.move_id, Move.name)
+                  .join(Move, Move.id == SetMove.move_id)
+                  .order_by(SetMove.set_id, SetMove.slot))
+    if filters or limit is not None:
+        links_stmt = links_stmt.where(SetMove.set_id.in_(stmt.with_only_columns(PokemonSet.id).subquery().select()))
+    move_ids: Dict[int, list] = {}
+    move_name: Dict[int, str] = {}
+    for set_id, move_id, name in conn.execute(links_stmt):
+        move_ids.setdefault(set_id, []).append(move_id)
+        move_name.setdefault(move_id, name)
+
+    intern: dict = {}
+    type_cache: dict = {}
+    out = []
+    for r in rows:
+        (set_id, species_id, species, level, nature, gender, tera, item, ability,
+         evs_json, ivs_json) = r[:11]
+        stats = tuple(r[11:17])
+        base = intern.setdefault(tuple(r[17:23]), tuple(r[17:23]))
+        evs = _stat_tuple(evs_json, 0, intern)
+        ivs = _stat_tuple(ivs_json, 31, intern)
+        if any(v is None for v in stats):
+            # set sin stats precalculadas (no debería pasar tras init_db)
+            pd = PokemonData(name=species, level=level, nature=nature, evs=dict(zip(STAT_ORDER, evs)))
+            st = compute_stats(pd, dict(zip(STAT_ORDER, base)), dict(zip(STAT_ORDER, ivs)))
+            stats = tuple(st[k] for k in STAT_ORDER)
+        stats = intern.setdefault(stats, stats)
+
+        type_codes = ()
+        if get_types is not None:
+            key = (species, ability, gender)
+            type_codes = type_cache.get(key)
+            if type_codes is None:
+                try:
+                    names = get_types(species, ability, gender) or ()
+                except Exception:
+                    names = ()
+                codes = tuple(c for c in (type_id(t) for t in names) if c is not None)
+                type_codes = type_cache[key] = intern.setdefault(codes, codes)
+
+        mids = tuple(move_ids.get(set_id, ()))
+        mids = intern.setdefault(mids, mids)
+        names = intern.setdefault(("moves", mids), tuple(move_name[m] for m in mids))
+        out.append(SetRecord(
+            id=set_id, species_id=species_id, species=intern.setdefault(species, species),
+            level=int(level), nature=intern.setdefault(nature, nature) if nature else nature,
+            gender=gender, tera_type=intern.setdefault(tera, tera) if tera else tera,
+            item_code=ITEM_CODES.code(item), ability_code=ABILITY_CODES.code(ability),
+            stats=stats, base=base, evs=evs, ivs=ivs, type_codes=type_codes,
+            move_ids=mids, moves=names,
+        ))
+    return out
+
+
+@dataclass
+class SetPage:
+    rows: list                      # [(PokemonSet, Species), ...] en el orden pedido
+    total: int                      # sets que cumplen los filtros (todas las páginas)
+    first: Optional[tuple] = None   # cursor (valor de orden, id) de la primera fila
+    last: Optional[tuple] = None    # ... y de la última
+    has_prev: bool = False
+    has_next: bool = False
+
+def list_sets_page(
+    session: Session,
+    *,
+    limit: int = 50,
+    after: Optional[tuple] = None,
+    before: Optional[tuple] = None,
+    order_by: Optional[str] = None,
+    order_dir: str = "desc",
+    **filters,
+) -> SetPage:
+    """
+    Paginación por cursor (keyset) para la pestaña de sets guardados.
+
+    `after` = SetPage.last de la página actual -> página siguiente;
+    `before` = SetPage.first -> página anterior; sin cursor -> primera página.
+    El orden es siempre (columna de orden, id), así que el cursor es único y el
+    coste de saltar a la página N no crece con N (no hay OFFSET).
+
+    El total sale en la misma consulta: COUNT(*) OVER () se calcula en la
+    subconsulta filtrada, antes de aplicar el cursor y el LIMIT.
+    """
+    unknown = set(filters) - set(_SET_FILTERS)
+    if unknown:
+        raise TypeError(f"Filtros desconocidos: {sorted(unknown)}")
+
+    inner = select(PokemonSet.id.label("id"),
+                   _sort_key(order_by).label("sort_key"),
+                   func.count().over().label("total"))
+    inner = _apply_set_filters(inner.join(Species, PokemonSet.species_id == Species.id), **filters).subquery()
+
+    backwards = before is not None and after is None
+    descending = (order_dir or "desc").lower() == "desc"
+    walk_desc = descending != backwards      # hacia atrás se recorre al revés y luego se invierte
+    use_dir = desc if walk_desc else asc
+
+    stmt = (select(PokemonSet, Species, inner.c.total, inner.c.sort_key)
+            .join(inner, inner.c.id == PokemonSet.id)
+            .join(Species, PokemonSet.species_id == Species.id))
+    cursor = before if backwards else after
+    if cursor is not None:
+        pos, ref = tuple_(inner.c.sort_key, inner.c.id), tuple_(*cursor)
+        stmt = stmt.where(pos < ref if walk_desc else pos > ref)
+    stmt = stmt.order_by(use_dir(inner.c.sort_key), use_dir(inner.c.id)).limit(limit + 1)
+
+    got = session.execute(stmt).all()
+    more = len(got) > limit
+    got = got[:limit]
+    if backwards:
+        got.reverse()
+
+    if got:
+        total = int(got[0].total)
+    else:
+        # página vacía (cursor al final o filtros sin resultados): el total aparte
+        total = count_sets(session, **filters)
+    page = SetPage(rows=[(r[0], r[1]) for r in got], total=total)
+    if got:
+        page.first = (got[0].sort_key, got[0][0].id)
+        page.last = (got[-1].sort_key, got[-1][0].id)
+    if backwards:
+        page.has_prev, page.has_next = more, True
+    else:
+        page.has_prev, page.has_next = cursor is not None, more
+    return page
+
 def count_sets(
     session: Session,
     only_species: Optional[str] = None,
@@ -148,36 +681,90 @@ def count_sets(
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
     move_contains: Optional[list[str]] = None,
+    spe_min: Optional[int] = None,
+    spe_max: Optional[int] = None,
+    search: Optional[str] = None,
 ) -> int:
     stmt = select(func.count(PokemonSet.id)).join(Species, PokemonSet.species_id == Species.id)
-    if only_species:
-        stmt = stmt.where(Species.name.ilike(only_species))
-    if nature:
-        stmt = stmt.where(PokemonSet.nature.ilike(nature))
-    if item:
-        stmt = stmt.where(PokemonSet.item.ilike(item))
-    if ability:
-        stmt = stmt.where(PokemonSet.ability.ilike(ability))
-    if tera:
-        stmt = stmt.where(PokemonSet.tera_type.ilike(tera))
-    if level_min is not None:
-        stmt = stmt.where(PokemonSet.level >= level_min)
-    if level_max is not None:
-        stmt = stmt.where(PokemonSet.level <= level_max)
-    if date_from is not None:
-        stmt = stmt.where(PokemonSet.created_at >= date_from)
-    if date_to is not None:
-        stmt = stmt.where(PokemonSet.created_at <= date_to)
-    if move_contains:
-        for token in move_contains:
-            stmt = stmt.where(PokemonSet.moves_json.ilike(token))
+    stmt = _apply_set_filters(
+        stmt, only_species=only_species, search=search, nature=nature, item=item, ability=ability, tera=tera,
+        level_min=level_min, level_max=level_max, date_from=date_from, date_to=date_to,
+        move_contains=move_contains, spe_min=spe_min, spe_max=spe_max,
+    )
     return int(session.execute(stmt).scalar_one())
 
+# ---------- valores distintos para los combos de filtros ----------
+_DISTINCT_COLUMNS = {"ability": PokemonSet.ability, "tera": PokemonSet.tera_type, "item": PokemonSet.item}
+_distinct_cache: Optional[Dict[str, List[str]]] = None
+_sets_generation = 0
+
+def invalidate_set_caches() -> None:
+    """Olvida los valores distintos cacheados y avanza sets_generation()."""
+    global _distinct_cache, _sets_generation
+    _distinct_cache = None
+    _sets_generation += 1
+
+def sets_generation() -> int:
+    """Contador que cambia con cada escritura de sets: las cachés de fuera (p.ej.
+    services/speed_index.py) comparan contra él para saber si reconstruir."""
+    return _sets_generation
+
+@event.listens_for(Session, "after_flush")
+def _sets_flushed(session, _flush_context) -> None:
+    # cualquier alta/edición/borrado ORM de un PokemonSet (o cambio de especie) invalida las cachés
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (PokemonSet, Species)):
+            session.info["sets_changed"] = True
+            invalidate_set_caches()
+            return
+
+@event.listens_for(Session, "after_commit")
+def _sets_committed(session) -> None:
+    # otra vez tras el commit: lo que se reconstruyó entre flush y commit no veía los cambios
+    if session.info.pop("sets_changed", False):
+        invalidate_set_caches()
+
+@event.listens_for(Session, "after_rollback")
+def _sets_rolled_back(session) -> None:
+    if session.info.pop("sets_changed", False):
+        invalidate_set_caches()
+
+def distinct_set_values(session: Optional[Session] = None) -> Dict[str, List[str]]:
+    """
+    {"ability": [...], "tera": [...], "item": [...]} con los valores presentes en
+    los sets guardados (ordenados sin distinguir mayúsculas). Una sola consulta
+    (UNION ALL) y cacheado hasta la próxima escritura.
+    """
+    global _distinct_cache
+    cached = _distinct_cache
+    if cached is not None:
+        return cached
+    stmt = union_all(*[
+        select(literal(key).label("k"), col.label("v")).where(col.isnot(None)).distinct()
+        for key, col in _DISTINCT_COLUMNS.items()
+    ])
+    values: Dict[str, set] = {key: set() for key in _DISTINCT_COLUMNS}
+    if session is None:
+        with Session(engine) as s:
+            rows = s.execute(stmt).all()
+    else:
+        rows = session.execute(stmt).all()
+    for key, val in rows:
+        v = (val or "").strip()
+        if v:
+            values[key].add(v)
+    result = {key: sorted(vals, key=str.casefold) for key, vals in values.items()}
+    _distinct_cache = result
+    return result
+
 def delete_sets(session: Session, ids: list[int]) -> int:
     if not ids:
         return 0
+    # DELETE de Core: sin ON DELETE efectivo en SQLite (foreign_keys off), set_moves a mano
+    session.execute(delete(SetMove).where(SetMove.set_id.in_(ids)))
     res = session.execute(delete(PokemonSet).where(PokemonSet.id.in_(ids)))
     session.commit()
+    invalidate_set_caches()     # DELETE de Core: no pasa por after_flush
     return int(res.rowcount or 0)
 
 def get_set(session: Session, set_id: int):
@@ -207,6 +794,7 @@ def update_set(session: Session, set_id: int, *, level: int | None = None, natur
         ps.ivs_json = _json.dumps(ivs, ensure_ascii=False)
     if moves is not None:
         ps.moves_json = _json.dumps(moves, ensure_ascii=False)
+    apply_set_stats(ps, session.get(Species, ps.species_id))
     session.commit()
     return 1
 
@@ -0,0 +1,95 @@
+# pokemon_app/db/set_records.py
+"""
+Representación compacta e inmutable de un set guardado para los bucles de
+cálculo (daño, defensas, velocidad), en lugar de arrastrar objetos ORM.
+
+SetRecord es un dataclass con __slots__: stats, base stats, EVs e IVs como
+tuplas de enteros (orden HP, Atk, Def, SpA, SpD, Spe), tipos como códigos de
+services.types.TYPE_ID, item/habilidad como códigos de una tabla compartida y
+movimientos como ids de la tabla moves. Las tuplas y cadenas repetidas se
+comparten entre sets (internado al cargar), así que un set ocupa una fracción
+de lo que ocupan PokemonSet + Species + estado de SQLAlchemy.
+
+Se cargan con repository.load_set_records (un SELECT de Core, sin ORM).
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+STAT_ORDER = ("HP", "Atk", "Def", "SpA", "SpD", "Spe")
+
+
+class CodeTable:
+    """Tabla texto <-> entero que solo crece (0 = vacío). Segura entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._codes: Dict[str, int] = {"": 0}
+        self._names: list[str] = [""]
+
+    def code(self, name: Optional[str]) -> int:
+        key = (name or "").strip()
+        c = self._codes.get(key)
+        if c is None:
+            with self._lock:
+                c = self._codes.get(key)
+                if c is None:
+                    c = self._codes[key] = len(self._names)
+                    self._names.append(key)
+        return c
+
+    def name(self, code: int) -> str:
+        return self._names[code]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+ITEM_CODES = CodeTable()
+ABILITY_CODES = CodeTable()
+
+
+@dataclass(frozen=True, slots=True)
+class SetRecord:
+    id: int
+    species_id: int
+    species: str                 # nombre guardado (sin normalizar forma)
+    level: int
+    nature: Optional[str]
+    gender: Optional[str]
+    tera_type: Optional[str]
+    item_code: int               # ITEM_CODES
+    ability_code: int            # ABILITY_CODES
+    stats: tuple                 # stats finales
+    base: tuple                  # base stats de la especie
+    evs: tuple
+    ivs: tuple
+    type_codes: tuple            # services.types.TYPE_ID (vacío si no se pidieron tipos)
+    move_ids: tuple              # moves.id, en orden de slot
+    moves: tuple                 # nombres, alineados con move_ids
+
+    # --- accesos de conveniencia (fuera de los bucles calientes) ---
+    @property
+    def item(self) -> str:
+        return ITEM_CODES.name(self.item_code)
+
+    @property
+    def ability(self) -> str:
+        return ABILITY_CODES.name(self.ability_code)
+
+    @property
+    def types(self) -> tuple:
+        from ..services.types import ALL_TYPES
+        return tuple(ALL_TYPES[c] for c in self.type_codes)
+
+    def stats_dict(self) -> Dict[str, int]:
+        return dict(zip(STAT_ORDER, self.stats))
+
+    def stat(self, key: str) -> int:
+        return self.stats[STAT_ORDER.index(key)]
+
+    @property
+    def label(self) -> str:
+        return f"{self.species} (Lv{self.level}/{self.nature or '—'})"
@@ -1,267 +1,77 @@
+from pokemon_app.utils import startup_timing   # primero: el reloj de arranque empieza aquí
 import math
-import os
 from datetime import datetime
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, Spinbox
-from pathlib import Path
-import json, re, unicodedata
 
-
-
-from sqlalchemy.orm import Session
-
-from pokemon_app.controllers.consulta_datos_controller import ConsultarDatosController
-from pokemon_app.parsing.showdown_parser import parse_showdown_text
-from pokemon_app.services.calculations import compute_stats, DEFAULT_IV
-from pokemon_app.services.species_provider import ensure_species_in_json
-from pokemon_app.services.types import type_effectiveness, ALL_TYPES
-from pokemon_app.services import battle_calc as bc
-from pokemon_app.db.base import engine
-from pokemon_app.db.repository import init_db, save_pokemon_set, list_sets, count_sets, delete_sets, get_set, update_set
-from pokemon_app.db.models import Species, PokemonSet
 from pokemon_app.gui.ui.treeview_kit import apply_style
-from pokemon_app.gui.tabs.speed_tab import SpeedTab
-from pokemon_app.gui.tabs.saved_sets_tab import SavedSetsTab
-from pokemon_app.gui.tabs.damage_tab import DamageTab
-from pokemon_app.gui.tabs.input_tab import InputTab
-from pokemon_app.gui.tabs.defense_tab import DefenseTab
+from pokemon_app.gui.compute_executor import ComputeExecutor
 
 from pokemon_app.utils.logging_setup import setup_logging
 
 setup_logging()  # nivel INFO por defecto; usa log_to_file=True para archivo rotativo
 
-# --- Loader de tipos desde JSON + fallback a DB ---
-_types_cache = None
-
-def _load_types_cache():
-    """Carga y normaliza pokemon_app/data/types_cache.json. Devuelve dict[str, list[str]]."""
-    import os, json
-    global _types_cache
-    if _types_cache is not None:
-        return _types_cache
-
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
-    path = os.path.join(base_dir, "types_cache.json")
-    data = {}
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            raw = json.load(f)
-    except Exception:
-        _types_cache = {}
-        return _types_cache
-
-    # Normalización flexible:
-    # A) {"Corviknight": ["Steel","Flying"], "Indeedee": ["Psychic","Normal"], ...}
-    if isinstance(raw, dict) and all(
-        isinstance(k, str) and isinstance(v, (list, tuple)) for k, v in raw.items()
-    ):
-        for name, tlist in raw.items():
-            types = [str(t).strip().capitalize() for t in tlist if str(t).strip()]
-            if types:
-                data[name.strip()]= types
-
-    # B) Estilo PokéAPI por especie: {"corviknight": {"types":[{"type":{"name":"steel"}},{"type":{"name":"flying"}}]}, ...}
-    elif isinstance(raw, dict):
-        for key, node in raw.items():
-            try:
-                # nombre podría estar en la clave o dentro
-                name = (node.get("name") or node.get("species", {}).get("name") or key or "").strip()
-                if not name:
-                    continue
-                # lista de tipos
-                tnodes = node.get("types") or []
-                types = []
-                for tn in tnodes:
-                    # soporta {"type":{"name":"steel"}} o {"name":"steel"} o "steel"
-                    if isinstance(tn, dict):
-                        if "type" in tn and isinstance(tn["type"], dict):
-                            tname = tn["type"].get("name", "")
-                        else:
-                            tname = tn.get("name", "")
-                    else:
-                        tname = str(tn)
-                    tname = str(tname).strip()
-                    if tname:
-                        types.append(tname.capitalize())
-                if types:
-                    data[name.capitalize()] = types
-            except Exception:
-                continue
-
-    _types_cache = data
-    return _types_cache
-
-
-# --- Loader de tipos con BD + fallback JSON ---
-def get_species_types(species_name: str, gender: str | None = None):
-    """
-    1) BD (type1/type2) si existen columnas.
-    2) JSON cache pokemon_app/data/types_cache.json
-    3) Si no está, lo TRAE de PokéAPI y lo cachea (ensure_types_in_json).
-    """
-    # 1) BD
-    try:
-        from sqlalchemy import select
-        from ..db.base import engine as _eng
-        from ..db.models import Species
-        with Session(_eng) as s:
-            sp = s.execute(select(Species).where(Species.name == species_name)).scalar_one_or_none()
-            if sp:
-                types = []
-                t1 = getattr(sp, "type1", None)
-                t2 = getattr(sp, "type2", None)
-                if t1: types.append(str(t1).capitalize())
-                if t2: types.append(str(t2).capitalize())
-                if types:
-                    return types
-    except Exception:
-        pass
-
-    # 2) JSON cache (si ya existe)
-    import os, json
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
-    cache_path = os.path.join(base_dir, "types_cache.json")
-    try:
-        if os.path.exists(cache_path):
-            with open(cache_path, "r", encoding="utf-8") as f:
-                data = json.load(f) or {}
-            t = data.get(species_name) or data.get(species_name.capitalize())
-            if t:
-                return [str(x).capitalize() for x in t]
-    except Exception:
-        pass
-
-    # 3) Ensure desde PokéAPI y guardar en cache
-    try:
-        from ..services.types_provider import ensure_types_in_json
-        types = ensure_types_in_json(species_name, cache_path)
-        if types:
-            return types
-    except Exception:
-        # último recurso: sin tipos
-        return []
-
-    return []
-
-
-services = {
-    "Session": Session,
-    "engine": engine,
-    "list_sets": list_sets,
-    "compute_stats": compute_stats,
-    "type_effectiveness": type_effectiveness,
-    "get_species_types": get_species_types,
-    "parse_showdown_text": parse_showdown_text,
-    "ensure_species_in_json": ensure_species_in_json,
-    "save_pokemon_set": save_pokemon_set,
-    "terrain_xmod": bc.terrain_xmod,
-    "screen_multiplier": bc.screen_multiplier,
-    "weather_move_multiplier": bc.weather_move_multiplier,
-    "defender_stat_weather_boost": bc.defender_stat_weather_boost,
-    "tera_stab_multiplier": bc.tera_stab_multiplier,
-    "attacker_item_multiplier_auto": bc.attacker_item_multiplier_auto,
-    "defender_item_effects_auto": bc.defender_item_effects_auto,
-    "resolve_hits": bc.resolve_hits,
-    "hits_weights_for_selector": bc.hits_weights_for_selector,
-    "single_hit_roll_dist": bc.single_hit_roll_dist,
-    "ohko_probability_from_dist": bc.ohko_probability_from_dist,
-    "ko_hits_bounds": bc.ko_hits_bounds,
-    "ALL_TYPES": ALL_TYPES,
-}
-
-
-# ruta al cache
-_MOVES_PATH = Path(__file__).resolve().parents[1] / "data" / "moves_cache.json"
-
-def _load_moves():
-    try:
-        with _MOVES_PATH.open(encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {}
-
-_MOVES_CACHE = _load_moves()
-
-def _strip_accents(s: str) -> str:
-    s = unicodedata.normalize("NFD", s)
-    return "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
-
-def _canon(s: str) -> str:
-    s = _strip_accents((s or "").strip().lower())
-    s = re.sub(r"[–—\-]+", " ", s)
-    s = re.sub(r"\s+", " ", s)
-    return s
-
-# alias ES → EN (extiéndelo según uses)
-_MOVE_ALIASES = {
-    _canon("A Bocajarro"): "Close Combat",
-    _canon("Puño Férreo"): "Iron Fist",   # (ej. habilidad si la usaras)
-    _canon("Tajo Umbrío"): "Throat Chop",
-    _canon("Cascada"): "Waterfall",
-    _canon("Demolición"): "Brick Break",
-    _canon("Nudo Hierba"): "Grass Knot",
-    # ...
-}
-
-# índice canónico del cache actual
-def _build_index():
-    idx = {}
-    for name, meta in _MOVES_CACHE.items():
-        c = _canon(name)
-        idx[c] = (name, meta)
-        idx[c.replace(" ", "")] = (name, meta)
-    return idx
-
-_MOVES_BY_CANON = _build_index()
-
-def get_move_info(name: str):
-    global _MOVES_CACHE, _MOVES_BY_CANON
-    raw = (name or "").strip()
-    if not raw:
-        return None
-
-    key = _canon(raw)
-    key = _canon(_MOVE_ALIASES.get(key, raw))
-
-    hit = _MOVES_BY_CANON.get(key) or _MOVES_BY_CANON.get(key.replace(" ", ""))
-    meta = None
-    if hit:
-        name, meta = hit
-    else:
-        # fallback: intentar rellenar desde PokéAPI y recargar una vez
-        try:
-            from pokemon_app.services.move_provider import ensure_move_in_json
-            ensure_move_in_json(raw, str(_MOVES_PATH))
-            _MOVES_CACHE = _load_moves()
-            _MOVES_BY_CANON = _build_index()
-            hit = _MOVES_BY_CANON.get(key) or _MOVES_BY_CANON.get(key.replace(" ", ""))
-            if hit:
-                name, meta = hit
-        except Exception:
-            pass
-
-    if not meta:
-        # último intento exacto (por si el cache viene con capitalización distinta)
-        meta = _MOVES_CACHE.get(raw) or _MOVES_CACHE.get(raw.title())
-        if not meta:
-            return None
-        name = meta.get("name", raw)
-
-    dmgc = (meta.get("damage_class") or "").lower()
-    return {
-        "name": name,
-        "type": meta.get("type", "Normal"),
-        "power": int(meta.get("power") or 0),  # ver nota de Low Kick abajo
-        "category": "Physical" if dmgc.startswith("phys")
-                    else ("Special" if dmgc.startswith("spec") else "Status"),
-        "accuracy": meta.get("accuracy"),
-    }
-
-services["get_move_info"] = get_move_info
-
-def load_base_stats(path: str) -> dict:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+# Los módulos pesados (SQLAlchemy, numpy, pestañas) se importan al construir los
+# servicios o la pestaña que los usa, no al importar este módulo.
+services: dict = {}
+
+
+def build_services() -> dict:
+    """Rellena `services` (una sola vez) importando los módulos que hacen falta."""
+    if services:
+        return services
+    timed = startup_timing.timed_import
+    Session = timed("sqlalchemy.orm").Session
+    db_base = timed("pokemon_app.db.base")
+    repo = timed("pokemon_app.db.repository")
+    parser = timed("pokemon_app.parsing.showdown_parser")
+    calc = timed("pokemon_app.services.calculations")
+    types = timed("pokemon_app.services.types")
+    type_index = timed("pokemon_app.services.type_index")
+    species_provider = timed("pokemon_app.services.species_provider")
+    move_index = timed("pokemon_app.services.move_index")
+    bc = timed("pokemon_app.services.battle_calc")
+    speed_index = timed("pokemon_app.services.speed_index")
+    team_matchup = timed("pokemon_app.services.team_matchup")
+
+    services.update({
+        "Session": Session,
+        "engine": db_base.engine,
+        "list_sets": repo.list_sets,
+        "list_sets_page": repo.list_sets_page,
+        "load_set_records": repo.load_set_records,
+        "distinct_set_values": repo.distinct_set_values,
+        "speed_index": speed_index.get_speed_index,             # tiers de velocidad (services/speed_index.py)
+        "compute_matchup": team_matchup.compute_matchup,        # equipo vs equipo (services/team_matchup.py)
+        "compute_stats": calc.compute_stats,
+        "type_effectiveness": types.type_effectiveness,
+        "get_species_types": type_index.get_species_types,      # índice en memoria (services/type_index.py)
+        "type_index": type_index.get_type_index(),
+        "parse_showdown_text": parser.parse_showdown_text,
+        "ensure_species_in_json": species_provider.ensure_species_in_json,
+        "save_pokemon_set": repo.save_pokemon_set,
+        "terrain_xmod": bc.terrain_xmod,
+        "screen_multiplier": bc.screen_multiplier,
+        "weather_move_multiplier": bc.weather_move_multiplier,
+        "defender_stat_weather_boost": bc.defender_stat_weather_boost,
+        "tera_stab_multiplier": bc.tera_stab_multiplier,
+        "attacker_item_multiplier_auto": bc.attacker_item_multiplier_auto,
+        "defender_item_effects_auto": bc.defender_item_effects_auto,
+        "resolve_hits": bc.resolve_hits,
+        "hits_weights_for_selector": bc.hits_weights_for_selector,
+        "single_hit_roll_dist": bc.single_hit_roll_dist,
+        "ohko_probability_from_dist": bc.ohko_probability_from_dist,
+        "ko_hits_bounds": bc.ko_hits_bounds,
+        "ALL_TYPES": types.ALL_TYPES,
+        "get_move_info": move_index.get_move_info,   # índice de movimientos (se arma en la 1ª consulta)
+        "move_table": move_index.get_move_table,      # movimientos resueltos con id (prefill antes de los bucles)
+    })
+    return services
+
+def load_base_stats() -> dict:
+    """{especie: base stats} desde el almacén local."""
+    from pokemon_app.db import data_store
+    return data_store.all_base_stats()
 
 def safe_int(v):
     try:
@@ -280,6 +90,16 @@ def parse_date(dstr):
             pass
     return None
 
+# pestañas: (clave, título, módulo, clase); se construyen la primera vez que se muestran
+TABS = [
+    ("input", "Ingresar Set", "pokemon_app.gui.tabs.input_tab", "InputTab"),
+    ("saved", "Sets Guardados", "pokemon_app.gui.tabs.saved_sets_tab", "SavedSetsTab"),
+    ("speed", "Velocidad", "pokemon_app.gui.tabs.speed_tab", "SpeedTab"),
+    ("damage", "Daños", "pokemon_app.gui.tabs.damage_tab", "DamageTab"),
+    ("defense", "Defensas", "pokemon_app.gui.tabs.defense_tab", "DefenseTab"),
+    ("matchup", "Enfrentamiento", "pokemon_app.gui.tabs.matchup_tab", "MatchupTab"),
+]
+
 class PokemonApp(ttk.Frame):
     def __init__(self, master=None):
         super().__init__(master)
@@ -299,18 +119,6 @@ class PokemonApp(ttk.Frame):
         except tk.TclError:
             pass
 
-        self.base_stats_path = os.path.join(os.path.dirname(__file__), "..", "data", "base_stats.json")
-        self.base_stats = load_base_stats(os.path.abspath(self.base_stats_path))
-        self.controller = ConsultarDatosController(self.base_stats)
-
-        # Exponer ruta de base_stats a servicios para uso en tabs
-        try:
-            services['base_stats_json_path'] = os.path.abspath(self.base_stats_path)
-        except Exception:
-            pass
-
-        init_db()
-
         # Estado debe existir antes de construir UI
         self.page_size = 25
         self.page_index = 1
@@ -328,66 +136,87 @@ class PokemonApp(ttk.Frame):
         self.dmg_sort_dir = "desc"
 
         self.services = services
+        self._pages: dict[str, ttk.Frame] = {}
+        self._tabs: dict[str, object] = {}
+        self._ready = False
 
+        # esqueleto (notebook vacío) -> primera pintura -> servicios + pestaña visible
         self._build_ui()
+        self.after_idle(self._on_first_paint)
 
         # estado de parseo
         self.current_parsed = None
         self.current_stats = None
 
     def _build_ui(self): 
-        nb = ttk.Notebook(self)
+        self.nb = nb = ttk.Notebook(self)
         nb.pack(fill="both", expand=True, padx=8, pady=8)
-
-
-        # --- Tab 1: Ingresar Set ---
-
-        def _on_new_set_saved(new_id: int | None):
-            # refrescar la pestaña de Sets guardados si existe
-            if hasattr(self, "saved_tab"):
-                try:
-                    self.saved_tab.refresh()
-                    if new_id and hasattr(self.saved_tab, "select_row_by_id"):
-                        self.saved_tab.select_row_by_id(new_id)
-                except Exception:
-                    pass
-
-        self.input_tab = InputTab(nb, self.services, on_saved=_on_new_set_saved)
-        nb.add(self.input_tab, text="Ingresar Set")
-
-        # --- Fin Tab 1 ---
-        
-        # --- Tab 2: Sets Guardados ---
-        
-        page_saved = ttk.Frame(nb)
-        nb.add(page_saved, text="Sets Guardados")
-        self.saved_tab = SavedSetsTab(page_saved, self.services)
-        
-        # --- Fin Tab 2 ---
-        
-        # --- Tab 3: Velocidad ---
-        
-        page_speed = ttk.Frame(nb)
-        nb.add(page_speed, text="Velocidad")
-        self.speed_tab = SpeedTab(page_speed, self.services)
-        
-        # --- Fin Tab 3 ---
-        
-        # --- Tab 4: Daños ---
-        
-        page_damage = ttk.Frame(nb)
-        nb.add(page_damage, text="Daños")
-        self.damage_tab = DamageTab(page_damage, self.services)
-        
-        # Fin Tab 4: Daños ---
-        
-        # --- Tab 5: Defensas ---
-        
-        page_defense = ttk.Frame(nb)
-        nb.add(page_defense, text="Defensas")
-        self.defense_tab = DefenseTab(page_defense, self.services)
-        
-        # --- Fin Tab 5 ---
+        for key, title, _mod, _cls in TABS:
+            page = ttk.Frame(nb)
+            nb.add(page, text=title)
+            self._pages[key] = page
+        self._loading = ttk.Label(self._pages[TABS[0][0]], text="Cargando…")
+        self._loading.pack(padx=12, pady=12, anchor="w")
+        nb.bind("<<NotebookTabChanged>>", self._on_tab_changed, add="+")
+
+    # ---------- arranque diferido ----------
+    def _on_first_paint(self):
+        self.update_idletasks()
+        startup_timing.mark("primera pintura")
+        self.after(0, self._finish_startup)
+
+    def _finish_startup(self):
+        with startup_timing.phase("servicios"):
+            build_services()
+        with startup_timing.phase("init_db"):
+            from pokemon_app.db.repository import init_db
+            init_db()
+        # cálculos pesados de las pestañas (daños/defensas/velocidad) fuera del hilo de Tk
+        self.services["executor"] = ComputeExecutor(self.master)
+        self._ready = True
+        self._loading.destroy()
+        self._ensure_tab(self._selected_key())
+        startup_timing.mark("primera pestaña lista")
+        startup_timing.log_report()
+
+    def _selected_key(self) -> str:
+        try:
+            return TABS[self.nb.index(self.nb.select())][0]
+        except Exception:
+            return TABS[0][0]
+
+    def _on_tab_changed(self, event=None):
+        if self._ready:
+            self._ensure_tab(self._selected_key())
+
+    def _ensure_tab(self, key: str):
+        """Construye la pestaña la primera vez que se muestra (su carga inicial va con ella)."""
+        tab = self._tabs.get(key)
+        if tab is not None:
+            return tab
+        _key, _title, mod_name, cls_name = next(t for t in TABS if t[0] == key)
+        cls = getattr(startup_timing.timed_import(mod_name), cls_name)
+        page = self._pages[key]
+        with startup_timing.phase(f"pestaña {key}"):
+            if key == "input":
+                tab = cls(page, self.services, on_saved=self._on_new_set_saved)
+                tab.pack(fill="both", expand=True)
+            else:
+                tab = cls(page, self.services)
+        self._tabs[key] = tab
+        setattr(self, f"{key}_tab", tab)
+        return tab
+
+    def _on_new_set_saved(self, new_id: int | None):
+        # refrescar la pestaña de Sets guardados si ya se construyó
+        saved = self._tabs.get("saved")
+        if saved is not None:
+            try:
+                saved.refresh()
+                if new_id and hasattr(saved, "select_row_by_id"):
+                    saved.select_row_by_id(new_id)
+            except Exception:
+                pass
 
 # Fin de clase PokemonApp
 
@@ -395,4 +224,9 @@ def run():
     root = tk.Tk()
     apply_style(root, variant="light")  # o "dark"
     app = PokemonApp(master=root)
-    app.mainloop()
+    try:
+        app.mainloop()
+    finally:
+        executor = app.services.get("executor")
+        if executor is not None:
+            executor.shutdown()
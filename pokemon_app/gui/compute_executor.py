@@ -0,0 +1,141 @@
+# pokemon_app/gui/compute_executor.py
+"""
+Executor compartido para cálculos pesados de las pestañas.
+
+Los trabajos corren en un pool de hilos; el resultado vuelve al hilo de Tk por
+una cola que se sondea con after(). Cada trabajo va asociado a una clave
+("damage", "defense", ...): enviar uno nuevo con la misma clave cancela el
+anterior, cuyo resultado se descarta aunque termine.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+log = logging.getLogger(__name__)
+
+
+class Cancelled(Exception):
+    """El trabajo fue reemplazado por otro más nuevo o cancelado a mano."""
+
+
+class CancelToken:
+    def __init__(self):
+        self._ev = threading.Event()
+
+    def cancel(self) -> None:
+        self._ev.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._ev.is_set()
+
+    def check(self) -> None:
+        """Punto de corte para el worker: lanza Cancelled si ya no hace falta seguir."""
+        if self._ev.is_set():
+            raise Cancelled()
+
+
+class Job:
+    def __init__(self, key: str, token: CancelToken,
+                 on_done: Optional[Callable[[Any], None]], on_error: Optional[Callable[[BaseException], None]]):
+        self.key = key
+        self.token = token
+        self.on_done = on_done
+        self.on_error = on_error
+
+    def cancel(self) -> None:
+        self.token.cancel()
+
+
+class ComputeExecutor:
+    """
+    submit(key, fn, on_done=..., on_error=...) -> Job
+      fn(token) corre en un hilo del pool y debe llamar token.check() entre fases.
+      on_done(resultado) / on_error(exc) se llaman en el hilo de Tk.
+    """
+
+    def __init__(self, root, max_workers: int = 2, poll_ms: int = 30):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="compute")
+        self._results: "queue.Queue[tuple[Job, bool, Any]]" = queue.Queue()
+        self._current: dict[str, Job] = {}
+        self._pending = 0
+        self._polling = False
+        self._closed = False
+
+    # ---------- API ----------
+    def submit(self, key: str, fn: Callable[[CancelToken], Any],
+               on_done: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[BaseException], None]] = None) -> Job:
+        self.cancel(key)
+        job = Job(key, CancelToken(), on_done, on_error)
+        self._current[key] = job
+        self._pending += 1
+        self._pool.submit(self._run, job, fn)
+        self._schedule_poll()
+        return job
+
+    def cancel(self, key: str) -> None:
+        job = self._current.pop(key, None)
+        if job is not None:
+            job.cancel()
+
+    def is_busy(self, key: str) -> bool:
+        return key in self._current
+
+    def shutdown(self) -> None:
+        self._closed = True
+        for key in list(self._current):
+            self.cancel(key)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- worker ----------
+    def _run(self, job: Job, fn) -> None:
+        try:
+            job.token.check()
+            result = fn(job.token)
+            self._results.put((job, True, result))
+        except BaseException as e:      # noqa: BLE001 — se reenvía al hilo de Tk
+            self._results.put((job, False, e))
+
+    # ---------- hilo de Tk ----------
+    def _schedule_poll(self) -> None:
+        if self._polling or self._closed:
+            return
+        self._polling = True
+        try:
+            self.root.after(self.poll_ms, self._poll)
+        except Exception:
+            self._polling = False
+
+    def _poll(self) -> None:
+        self._polling = False
+        while True:
+            try:
+                job, ok, payload = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            # descartar resultados de trabajos reemplazados/cancelados
+            if job.token.cancelled or self._current.get(job.key) is not job:
+                continue
+            del self._current[job.key]
+            try:
+                if ok:
+                    if job.on_done:
+                        job.on_done(payload)
+                elif isinstance(payload, Cancelled):
+                    pass
+                elif job.on_error:
+                    job.on_error(payload)
+                else:
+                    log.exception("Error en cálculo '%s'", job.key, exc_info=payload)
+            except Exception:
+                log.exception("Error al aplicar resultado de '%s'", job.key)
+        if self._pending > 0:
+            self._schedule_poll()
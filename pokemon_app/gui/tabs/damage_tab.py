@@ -1,32 +1,44 @@
-import os
 import json as _json
 import tkinter as tk
 from tkinter import ttk, messagebox
 from pokemon_app.utils.species_normalize import normalize_species_name
-from pokemon_app.gui.ui.treeview_kit import apply_damage_tags, insert_with_zebra, set_style, apply_zebra
-
-
-# Berries de resistencia por tipo
-_RESIST_BERRY_BY_TYPE = {
-        "Fire": "Occa Berry",
-        "Water": "Passho Berry",
-        "Electric": "Wacan Berry",
-        "Grass": "Rindo Berry",
-        "Ice": "Yache Berry",
-        "Fighting": "Chople Berry",
-        "Poison": "Kebia Berry",
-        "Ground": "Shuca Berry",
-        "Flying": "Coba Berry",
-        "Psychic": "Payapa Berry",
-        "Bug": "Tanga Berry",
-        "Rock": "Charti Berry",
-        "Ghost": "Kasib Berry",
-        "Dragon": "Haban Berry",
-        "Dark": "Colbur Berry",
-        "Steel": "Babiri Berry",
-        "Fairy": "Roseli Berry",
-        "Normal": "Chilan Berry",
-    }
+from pokemon_app.gui.ui.treeview_kit import apply_damage_tags, set_style, apply_zebra, VirtualTreeview
+from pokemon_app.services import damage_engine
+from pokemon_app.services.damage_engine import FieldConditions, MoveSpec
+from pokemon_app.services.damage_matrix import DefenderTable, compute_damage_matrix
+
+
+def _damage_sort_key(key: str):
+    """Clave de orden sobre DamageResult para la columna `key` de la tabla."""
+    def sort_key(r):
+        if key == "xef":
+            return r.xef_val
+        if key == "xmod":
+            return r.xmod_val
+        if key in ("ko", "ohko"):
+            return r.ko_best
+        v = getattr(r, key, None)
+        return v if v is not None else -999999
+    return sort_key
+
+
+def _damage_row(r) -> tuple:
+    """(key, values, tags) para VirtualTreeview."""
+    kb = r.ko_best
+    if kb <= 1:
+        tags = ("ko_ohko",)
+    elif kb == 2:
+        tags = ("ko_2hko",)
+    elif kb >= 4:
+        tags = ("ko_4hko",)
+    else:
+        tags = ()
+    return (r.set_id,
+            (r.target, r.hp, r.def_base, r.def_ev, r.def_used, r.def_item,
+             r.xef, r.xmod, r.min, r.max, r.min_pct, r.max_pct, r.ko, f"{r.ohko_pct:.1f}%",
+             f"{r.ko2_pct:.1f}%", f"{r.ko3_pct:.1f}%"),
+            tags)
+
 
 class DamageTab:
     """
@@ -34,9 +46,11 @@ class DamageTab:
     services esperados:
       - Session, engine
       - list_sets(session, ...)
+      - load_set_records(session, get_types=...) (registros compactos para el cálculo)
       - compute_stats
       - type_effectiveness (opcional; si no, usa fallback interno simple)
       - get_species_types (opcional; si no, devuelve [])
+      - executor (opcional; ComputeExecutor: el cálculo corre fuera del hilo de Tk)
     """
     def __init__(self, master, services: dict):
         self.master = master
@@ -214,12 +228,19 @@ class DamageTab:
 
 
         # Tabla
-        cols = ("target","hp","def_base","def_ev","def_used","def_item","xef","xmod","min","max","min_pct","max_pct","ohko","ohko_pct")
-        self.dmg_tree = ttk.Treeview(nb_container, columns=cols, show="headings", height=18)
-        self.dmg_tree.pack(fill="both", expand=True, padx=8, pady=(0,8))
+        cols = ("target","hp","def_base","def_ev","def_used","def_item","xef","xmod","min","max","min_pct","max_pct","ohko","ohko_pct","ko2_pct","ko3_pct")
+        table_frame = ttk.Frame(nb_container)
+        table_frame.pack(fill="both", expand=True, padx=8, pady=(0,8))
+        self.dmg_tree = ttk.Treeview(table_frame, columns=cols, show="headings", height=18)
+        dmg_sb = ttk.Scrollbar(table_frame, orient="vertical")
+        dmg_sb.pack(side="right", fill="y")
+        self.dmg_tree.pack(side="left", fill="both", expand=True)
         apply_damage_tags(self.dmg_tree)
         set_style(self.dmg_tree)
         apply_zebra(self.dmg_tree)
+        # lista virtual: solo se materializan las filas visibles
+        self.dmg_view = VirtualTreeview(self.dmg_tree, dmg_sb)
+        self._dmg_results = []
         
         # Resumen de KOs
         sum_bar = ttk.LabelFrame(nb_container, text="Resumen KO")
@@ -250,6 +271,8 @@ class DamageTab:
             ("max_pct",90,  "% max"),
             ("ohko",   80,  "OHKO?"),
             ("ohko_pct",   80,  "OHKO %"),
+            ("ko2_pct",    80,  "2HKO %"),
+            ("ko3_pct",    80,  "3HKO %"),
         ]
         for key,w,txt in cfg:
             self.dmg_tree.column(key, width=w, anchor="e" if key not in ("target","def_used","ohko") else "w")
@@ -351,13 +374,9 @@ class DamageTab:
             messagebox.showinfo("Movimientos", "Selecciona un movimiento del listado.")
             return
 
-        cache_dir = os.path.abspath(os.path.join(os.path.dirname(__file__),"..", "..", "data"))
-        os.makedirs(cache_dir, exist_ok=True)
-        move_cache = os.path.join(cache_dir, "moves_cache.json")
-
         try:
             from ...services.move_provider import ensure_move_in_json
-            info = ensure_move_in_json(move, move_cache)
+            info = ensure_move_in_json(move)
         except Exception as e:
             messagebox.showerror("PokéAPI", f"No pude obtener datos del movimiento.\n{e}")
             if hasattr(self, "lbl_accuracy_var"):
@@ -386,13 +405,10 @@ class DamageTab:
             if set_id:
                 from sqlalchemy.orm import Session as _S
                 from ...db.models import PokemonSet, Species
-                from ...services.calculations import compute_stats as _compute
+                from ...services.calculations import set_row_stats
                 with _S(self.services["engine"]) as s:
                     att = s.get(PokemonSet, set_id); sp = s.get(Species, att.species_id)
-                    evs = _json.loads(att.evs_json) or {}; ivs = _json.loads(att.ivs_json) or {}
-                    base = {"HP": sp.base_hp,"Atk": sp.base_atk,"Def": sp.base_def,"SpA": sp.base_spa,"SpD": sp.base_spd,"Spe": sp.base_spe}
-                    tmp = type("Tmp", (), {"evs": evs, "level": att.level, "nature": att.nature})
-                    stats = _compute(tmp, base_stats=base, ivs=ivs)
+                    stats = set_row_stats(att, sp)
                 self.d_category.set("Physical" if stats["Atk"] >= stats["SpA"] else "Special")
                 # tipo final según Tera ON/OFF
                 mt = self.d_tera_off_type.get() if self.d_tera_off_on.get() else (info["type"].capitalize() if info.get("type") else "Normal")
@@ -406,15 +422,20 @@ class DamageTab:
         else:
             self.dmg_sort_by = col
             self.dmg_sort_dir = "desc" if col in ("max_pct","max","xef") else "asc"
+        if self._dmg_results:
+            # reordenar el modelo ya calculado, sin recalcular
+            self._dmg_results.sort(key=_damage_sort_key(self.dmg_sort_by), reverse=(self.dmg_sort_dir == "desc"))
+            self.dmg_view.set_rows(_damage_row(r) for r in self._dmg_results)
+            return
         self.refresh_damage_list()
 
     # ---------- Cálculo principal ----------
     def refresh_damage_list(self):
         """Coordinador: valida, muestra loader y agenda el cálculo pesado."""
         # limpiar tabla
-        for iid in self.dmg_tree.get_children():
-            self.dmg_tree.delete(iid)
-            
+        self._dmg_results = []
+        self.dmg_view.clear()
+
         # reset de contadores (por si salimos por validación)
         self.d_cnt_ohko.set("0")
         self.d_cnt_pos.set("0")
@@ -465,401 +486,126 @@ class DamageTab:
             "hits": (self.d_hits.get() or "Auto"),
             "terrain": self.d_terrain.get(),
             "move_type": self.d_move_type.get(),
+            "set_id": self.d_attacker_map[label],
+            "sort_by": self.dmg_sort_by,
+            "sort_dir": self.dmg_sort_dir,
         }
 
-        # mostrar loader y agendar el cálculo pesado para el próximo ciclo del loop
+        # mostrar loader y mandar el cálculo pesado al executor (un envío nuevo reemplaza al anterior)
         self._show_loader("Calculando daños...")
-        self.master.after(20, lambda: self._compute_damage(params))
+        executor = self.services.get("executor")
+        if executor is None:
+            self.master.after(20, lambda: self._compute_damage(params))
+            return
+        executor.submit(
+            "damage",
+            lambda token: self._damage_job(params, token),
+            on_done=self._apply_damage_result,
+            on_error=self._on_damage_error,
+        )
+
+    def _field_from_params(self, params: dict) -> FieldConditions:
+        """Congela los parámetros leídos del UI en un FieldConditions inmutable."""
+        return FieldConditions(
+            weather=params["weather"],
+            terrain=params["terrain"],
+            reflect=params["reflect"],
+            lightscreen=params["lightscreen"],
+            veil=params["veil"],
+            doubles=params["fmt_doubles"],
+            spread=params["spread"],
+            crit=params["crit"],
+            burn=params["burn"],
+            tera_off_on=params["tera_off_on"],
+            tera_off_type=params["tera_off_type"],
+            tera_def_on=params["tera_def_on"],
+            tera_def_type=params["tera_def_type"],
+            assault_vest=params["assault_vest"],
+            item_extra=params["item_extra"],
+            stab_override=None if params["auto_stab"] else bool(params["stab_force"]),
+        )
 
     def _compute_damage(self, params: dict):
+        """Ruta síncrona (sin executor): calcula y pinta en el hilo de Tk."""
         try:
-            # Desempaquetar
-            label        = params["attacker_label"]
-            cat          = params["category"]
-            power        = params["power"]
-            move_type    = params["move_type"]
-            #item_mult    = self._choice_item_mult(params["item_label"])
-            auto_stab    = params["auto_stab"]
-            stab_force   = params["stab_force"]
-            crit         = params["crit"]
-            burn         = params["burn"]
-            spread       = params["spread"]
-            tera_off_on  = params["tera_off_on"]
-            tera_off_type= params["tera_off_type"]
-            tera_def_on  = params["tera_def_on"]
-            tera_def_type= params["tera_def_type"]
-            weather      = params["weather"]
-            reflect      = params["reflect"]
-            lightscreen  = params["lightscreen"]
-            veil         = params["veil"]
-            fmt_doubles  = params["fmt_doubles"]
-            item_extra   = params["item_extra"]
-            assault_vest = params["assault_vest"]
-            picked_move  = params["picked_move"]
-            
+            self._apply_damage_result(self._damage_job(params))
+        except Exception as e:
+            self._on_damage_error(e)
+
+    def _damage_job(self, params: dict, token=None) -> dict:
+        """Parte pesada del cálculo. No toca widgets ni variables Tk (corre en el executor)."""
+        check = token.check if token is not None else (lambda: None)
+        field = self._field_from_params(params)
+        move = MoveSpec(
+            name=params["picked_move"],
+            type=params["move_type"],
+            category=params["category"],
+            power=params["power"],
+            hits=params["hits"],
+        )
+
+        # servicios
+        Session = self.services["Session"]; engine = self.services["engine"]
+        load_set_records = self.services["load_set_records"]
 
-            # servicios
-            Session = self.services["Session"]; engine = self.services["engine"]
-            list_sets = self.services["list_sets"]; compute_stats = self.services["compute_stats"]
-
-            # 1) Atacante
-            from ...db.models import PokemonSet, Species
-            set_id = self.d_attacker_map[label]
-            with Session(engine) as s:
-                attacker = s.get(PokemonSet, set_id)
-                att_item = (attacker.item or "").strip()
-                try:
-                    self.att_item_var.set(att_item if att_item else "—")
-                except Exception:
-                    pass
-                att_sp = s.get(Species, attacker.species_id)
-                att_evs = _json.loads(attacker.evs_json); att_ivs = _json.loads(attacker.ivs_json)
-                att_base = {"HP": att_sp.base_hp,"Atk": att_sp.base_atk,"Def": att_sp.base_def,"SpA": att_sp.base_spa,"SpD": att_sp.base_spd,"Spe": att_sp.base_spe}
-                A_tmp = type("Tmp", (), {"evs": att_evs, "level": attacker.level, "nature": attacker.nature})
-                att_stats = compute_stats(A_tmp, base_stats=att_base, ivs=att_ivs)
-
-                # categoría puede cambiar por Tera Blast
-                if picked_move in ("tera blast","tera-blast"):
-                    move_type = (tera_off_type if tera_off_on else move_type).capitalize()
-                    cat = "physical" if att_stats["Atk"] >= att_stats["SpA"] else "special"
-
-                atk_stat = att_stats["Atk"] if cat == "physical" else att_stats["SpA"]
-
-                # Refresca el label con el valor real usado en este cálculo
-                try:
-                    self.att_stat_var.set(f"{'Atk' if cat=='physical' else 'SpA'} {atk_stat}")
-                except Exception:
-                    pass
-
-                if burn and cat == "physical":
-                    atk_stat = int(atk_stat * 0.5)
-
-                # tipos
-                try:
-                    att_types = self._get_species_types(
-                        normalize_species_name(att_sp.name, getattr(attacker, "ability", None), getattr(attacker, "gender", None)),
-                        attacker.gender,
-                    )
-                except Exception:
-                    att_types = []
-
-                # STAB manual si auto OFF
-                stab_override = None if auto_stab else bool(stab_force)
-
-                # 2) Defensores (trae todos)
-                rows = list_sets(s, limit=None)
-
-            items = []
-            
-            cnt_ohko = cnt_pos = cnt_no = 0
-            
-            for pset, sp in rows:
-                # Item del defensor
-                def_item = (pset.item or "").strip()
-
-                # tipos del defensor + Tera defensivo
-                try:
-                    def_types = self._get_species_types(
-                        normalize_species_name(sp.name, getattr(pset, "ability", None), getattr(pset, "gender", None)),
-                        pset.gender,
-                    )
-                except Exception:
-                    def_types = []
-                if tera_def_on:
-                    def_types = [tera_def_type]
-
-                # 1) Efectividad base (por tipos)
-                eff_mult = self._type_eff(move_type, def_types)
-                
-                # 2) Ajuste por baya del defensor (si corresponde)
-                def_stat_mult, eff_adj = self._defender_item_effects_auto(def_item, cat, move_type, eff_mult)
-                eff_mult *= eff_adj
-                xef_txt = f"×{eff_mult:g}"
-
-                # stats defensor
-                D_evs = _json.loads(pset.evs_json) or {}
-                D_ivs = _json.loads(pset.ivs_json) or {}
-                D_base = {"HP": sp.base_hp,"Atk": sp.base_atk,"Def": sp.base_def,"SpA": sp.base_spa,"SpD": sp.base_spd,"Spe": sp.base_spe}
-                D_tmp = type("Tmp", (), {"evs": D_evs, "level": pset.level, "nature": pset.nature})
-                d_stats = compute_stats(D_tmp, base_stats=D_base, ivs=D_ivs)
-                is_phys = (cat == "physical")
-                def_stat = d_stats["Def"] if is_phys else d_stats["SpD"]
-                hp_stat = d_stats["HP"]
-
-                # boosts defensivos
-                def_types_uc = [t.capitalize() for t in def_types]
-                def_boost = self._defender_stat_weather_boost(def_types_uc, cat)
-                def_stat_eff = int(def_stat * def_boost * def_stat_mult)
-                if (cat == "special") and assault_vest:
-                    def_stat_eff = int(def_stat_eff * 1.5)
-
-                # daño base
-                L = attacker.level
-                base_damage = (((2 * L / 5) + 2) * power * atk_stat / max(1, def_stat_eff)) / 50 + 2
-
-                # multiplicadores
-                # sobrescribe pantalla/formato para usar los params locales
-                old_weather = self.d_weather.get()
-                old_reflect = self.d_reflect.get()
-                old_ls      = self.d_lightscreen.get()
-                old_veil    = self.d_veil.get()
-                old_format  = self.d_format.get()
-                try:
-                    self.d_weather.set(weather)
-                    self.d_reflect.set(reflect)
-                    self.d_lightscreen.set(lightscreen)
-                    self.d_veil.set(veil)
-                    self.d_format.set("Dobles" if fmt_doubles else "Singles")
-
-                    mod = self._dmg_modifier(
-                        move_type=move_type,
-                        attacker_types=att_types,
-                        tera_off_on=tera_off_on,
-                        tera_off_type=tera_off_type,
-                        eff_mult=eff_mult,
-                        item_mult_choice=1.0,
-                        category=cat,
-                        crit=bool(crit),
-                        stab_override=stab_override,
-                    )
-                    # Añade el multiplicador por item del atacante (Choice/Life Orb/Expert Belt/Muscle/Wise)
-                    mod *= self.services["attacker_item_multiplier_auto"](att_item, cat, eff_mult, move_type)
-                    if fmt_doubles and spread:
-                        mod *= 0.75
-                    xmod_val = float(mod)
-                    terrain_mod = self.services["terrain_xmod"](params.get("terrain"), params.get("move_type"), params.get("picked_move"))
-                    xmod_val *= terrain_mod
-
-                finally:
-                    # restaurar UI vars
-                    self.d_weather.set(old_weather)
-                    self.d_reflect.set(old_reflect)
-                    self.d_lightscreen.set(old_ls)
-                    self.d_veil.set(old_veil)
-                    self.d_format.set(old_format)
-
-                # Daño por HITO único (single hit)
-                dmin = int(base_damage * 0.85 * xmod_val)
-                dmax = int(base_damage * 1.00 * xmod_val)
-
-                # Nº de golpes (Auto usa nombre del movimiento + Loaded Dice)
-                min_hits, max_hits, exp_hits, _mode = self.services["resolve_hits"](
-                    params.get("picked_move"), params.get("hits"), att_item
-                )
-
-                # Total por turno (rango)
-                tdmin = int(dmin * min_hits)
-                tdmax = int(dmax * max_hits)
-
-                min_pct = round(tdmin * 100.0 / hp_stat, 1)
-                max_pct = round(tdmax * 100.0 / hp_stat, 1)
-                
-                ohko = "Sí" if tdmin >= hp_stat else ("Posible" if tdmax >= hp_stat else "No")
-
-                # contadores KO
-                if ohko == "Sí":
-                    cnt_ohko += 1
-                elif str(ohko).lower().startswith("pos"):
-                    cnt_pos += 1
-                else:
-                    cnt_no += 1
-                    
-                import math
-                n_best = 999 if tdmax <= 0 else math.ceil(hp_stat / tdmax)         # mejor caso
-                n_worst = 999 if tdmin <= 0 else math.ceil(hp_stat / max(1, tdmin)) # peor caso
-
-                if n_best <= 1:
-                    ko_label = "OHKO"
-                elif n_best == n_worst:
-                    ko_label = f"{n_best}HKO"
-                else:
-                    ko_label = f"{n_best}–{n_worst}HKO"
-
-                def_base_stat = int(sp.base_def if is_phys else sp.base_spd)
-                def_ev_val = int(D_evs.get("Def" if is_phys else "SpD", 0))
-                
-                # Distribución por golpe (16 rolls) y pesos por nº de golpes
-                per_hit_dist = self.services["single_hit_roll_dist"](base_damage, xmod_val)
-                hits_weights = self.services["hits_weights_for_selector"](params.get("hits"), min_hits, max_hits)
-
-                # Probabilidad de OHKO (un turno)
-                ohko_p = self.services["ohko_probability_from_dist"](per_hit_dist, hp_stat, hits_weights)
-                ohko_pct = round(ohko_p * 100.0, 1)
-
-                items.append({
-                    "target": f"{sp.name} (Lv{pset.level}/{pset.nature or '—'})",
-                    "hp": hp_stat,
-                    "def_base": def_base_stat,
-                    "def_ev": def_ev_val,
-                    "def_used": f"{'Def' if is_phys else 'SpD'} {def_stat}",
-                    "def_item": def_item, 
-                    "xef": xef_txt,
-                    "xmod": f"×{xmod_val:.2f}",
-                    "xmod_val": xmod_val,
-                    "min": dmin,
-                    "max": dmax,
-                    "min_pct": min_pct,
-                    "max_pct": max_pct,
-                    "ko": ko_label,     # <— etiqueta visible
-                    "ko_best": n_best,  # <— para ordenar / tags
-                    "ohko_pct": ohko_pct,  # NUEVO
-                })
-
-            # ordenar
-            key = self.dmg_sort_by
-            reverse = (self.dmg_sort_dir == "desc")
-
-            def sort_key(r):
-                if key == "xef":
-                    try: return float(r.get("xef", "×1").replace("×",""))
-                    except Exception: return 1.0
-                if key == "xmod":
-                    return r.get("xmod_val", 1.0)
-                if key == "ko":
-                    return r.get("ko_best", 99)
-                if key == "ohko_pct":
-                    return r.get("ohko_pct", 0.0)
-
-
-                return r.get(key, -999999) if r.get(key) is not None else -999999
-
-            items.sort(key=sort_key, reverse=reverse)
+        # 1) Atacante + defensores: registros compactos (SELECT de Core, sin ORM)
+        with Session(engine) as s:
+            records = load_set_records(s, get_types=self._record_types)
+        check()
+        attacker = next((damage_engine.attacker_from_record(r) for r in records if r.id == params["set_id"]), None)
+        if attacker is None:
+            raise LookupError(f"El set #{params['set_id']} ya no existe.")
+        defenders = damage_engine.defenders_from_records(records)
+        check()
+
+        # 2) Cálculo puro (sin Tk), vectorizado sobre todos los defensores
+        matrix = compute_damage_matrix(attacker, move, DefenderTable.from_profiles(defenders), field)
+        check()
+        items = matrix.results()
+        counts = matrix.ko_counts()
+
+        # ordenar
+        items.sort(key=_damage_sort_key(params["sort_by"]), reverse=(params["sort_dir"] == "desc"))
+
+        mv = damage_engine.resolve_move(move, attacker, field)
+        return {"attacker": attacker, "move": mv, "items": items, "counts": counts}
+
+    def _apply_damage_result(self, res: dict):
+        """Pinta el resultado de _damage_job (hilo de Tk)."""
+        try:
+            # Labels del atacante con los valores reales usados en este cálculo
+            attacker, mv = res["attacker"], res["move"]
+            atk_label = "Atk" if mv.category == "physical" else "SpA"
+            try:
+                self.att_item_var.set(attacker.item or "—")
+                self.att_stat_var.set(f"{atk_label} {attacker.stats[atk_label]}")
+            except Exception:
+                pass
 
+            cnt_ohko, cnt_pos, cnt_no = res["counts"]
             total = cnt_ohko + cnt_pos + cnt_no
             self.d_cnt_ohko.set(str(cnt_ohko))
             self.d_cnt_pos.set(str(cnt_pos))
             self.d_cnt_no.set(str(cnt_no))
             self.d_cnt_total.set(str(total))
-            
-            
 
-            # pintar
-            for r in items:
-                tags = []
-                kb = r.get("ko_best", 99)
-                if kb <= 1:
-                    tags.append("ko_ohko")
-                elif kb == 2:
-                    tags.append("ko_2hko")
-                elif kb >= 4:
-                    tags.append("ko_4hko")
-
-                insert_with_zebra(self.dmg_tree, 
-                                  values=(r["target"], r["hp"], r["def_base"], 
-                                          r["def_ev"], r["def_used"], r["def_item"], 
-                                          r["xef"], r["xmod"], r["min"], r["max"], 
-                                          r["min_pct"], r["max_pct"], r["ko"], f"{r['ohko_pct']:.1f}%"), 
-                                  tags=tuple(tags))
+            # pintar (solo las filas visibles; el resto vive en el modelo)
+            self._dmg_results = res["items"]
+            self.dmg_view.set_rows(_damage_row(r) for r in self._dmg_results)
 
         finally:
             # ocultar loader siempre, incluso si hay excepción
             self._hide_loader()
-    
-    # Fin _compute_damage
 
-    # ---------- multiplicadores (versión básica; en Paso 2 pegamos la avanzada) ----------
-    def _choice_item_mult(self, label: str) -> float:
-        s = (label or "").lower()
-        if "choice" in s: return 1.5
-        if "life orb" in s: return 1.3
-        return 1.0
-
-    def _attacker_extra_item_mult(self, category: str, eff_mult: float) -> float:
-        # Expert Belt, Muscle Band, Wise Glasses (simplificado)
-        s = (self.d_item_extra.get() or "")
-        if "Expert Belt" in s and eff_mult > 1.0:
-            return 1.2
-        if "Muscle Band" in s and category == "physical":
-            return 1.1
-        if "Wise Glasses" in s and category == "special":
-            return 1.1
-        return 1.0
-    
-
-    def _defender_item_effects_auto(self, item_label: str, category: str, move_type: str, eff_mult: float) -> tuple[float, float]:
-        """
-        Efectos defensivos por item del set.
-        Devuelve (def_stat_mult, eff_mult_adjust)
-        - def_stat_mult: multiplicador sobre la defensa efectiva (ej. Assault Vest)
-        - eff_mult_adjust: factor para el multiplicador de efectividad (ej. bayas 0.5)
-        """
-        s = (item_label or "").strip().lower()
-        def_mult = 1.0
-        eff_adj = 1.0
-
-        if not s:
-            return def_mult, eff_adj
-
-        # Assault Vest: SpD x1.5 cuando el ataque es especial
-        if "assault vest" in s and category == "special":
-            def_mult *= 1.5
-
-        # Resist berries: si es superefectivo y tipo coincide, x0.5
-        wanted = _RESIST_BERRY_BY_TYPE.get((move_type or "").capitalize())
-        if wanted and wanted.lower() in s and eff_mult > 1.0:
-            eff_adj *= 0.5
-
-        # (Opcional: Eviolite, Multiscale, etc.)
-        return def_mult, eff_adj
-
-    def _weather_move_multiplier(self, move_type: str) -> float:
-        w = self.d_weather.get()
-        mt = (move_type or "").capitalize()
-        if w == "Lluvia" and mt in ("Water","Fire"):
-            return 1.5 if mt == "Water" else 0.5
-        if w == "Sol" and mt in ("Water","Fire"):
-            return 0.5 if mt == "Water" else 1.5
-        return 1.0
+    def _on_damage_error(self, exc: BaseException):
+        self._hide_loader()
+        messagebox.showerror("Daños", f"Error en el cálculo:\n{exc}")
 
-    def _screen_multiplier(self, category: str) -> float:
-        # Singles: 0.5; Dobles: ~0.67
-        singles = (self.d_format.get() == "Singles")
-        base = 0.5 if singles else (2/3)
-        if category == "physical" and self.d_reflect.get():
-            return base
-        if category == "special" and self.d_lightscreen.get():
-            return base
-        if self.d_veil.get():
-            return base
-        return 1.0
-
-    def _defender_stat_weather_boost(self, def_types_uc: list[str], category: str) -> float:
-        # Sand: Rock SpD x1.5 ; Snow: Ice Def x1.5 (gen9)
-        w = self.d_weather.get()
-        if category == "special" and w == "Tormenta Arena" and "Rock" in def_types_uc:
-            return 1.5
-        if category == "physical" and w == "Nieve" and "Ice" in def_types_uc:
-            return 1.5
-        return 1.0
-
-    def _tera_stab_multiplier(self, *, move_type: str, attacker_types: list[str], tera_on: bool, tera_type: str) -> float:
-        mt = (move_type or "").capitalize()
-        atts = [t.capitalize() for t in (attacker_types or [])]
-        tt = (tera_type or "").capitalize()
-        if not tera_on:
-            return 1.5 if mt in atts else 1.0
-        if mt == tt and mt in atts:  # doble STAB
-            return 2.0
-        if mt == tt and mt not in atts:
-            return 1.5
-        if mt != tt and mt in atts:
-            return 1.5
-        return 1.0
-
-    def _dmg_modifier(self, *, move_type: str, attacker_types: list[str], tera_off_on: bool, tera_off_type: str,
-                      eff_mult: float, item_mult_choice: float, category: str, crit: bool, stab_override: bool|None=None) -> float:
-        if stab_override is not None:
-            stab = 1.5 if stab_override else 1.0
-        else:
-            stab = self._tera_stab_multiplier(move_type=move_type, attacker_types=attacker_types,
-                                              tera_on=tera_off_on, tera_type=tera_off_type)
-        extra_item = self._attacker_extra_item_mult(category, eff_mult)
-        weather_mv = self._weather_move_multiplier(move_type)
-        screens = self._screen_multiplier(category)
-        crit_mult = 1.5 if crit else 1.0
-        spread_mult = 0.75 if (self.d_format.get()=="Dobles" and self.d_spread.get()) else 1.0
+    # Fin _compute_damage
 
-        return stab * eff_mult * item_mult_choice * extra_item * weather_mv * screens * crit_mult * spread_mult
+    def _record_types(self, species: str, ability: str | None, gender: str | None) -> list[str]:
+        """Tipos de un set guardado (normaliza forma por habilidad/género); get_types de load_set_records."""
+        return self._get_species_types(normalize_species_name(species, ability, gender), gender)
 
     def _show_loader(self, msg: str = "Calculando..."):
         try:
@@ -892,9 +638,8 @@ class DamageTab:
 
         from ...db.models import PokemonSet, Species
         Session = self.services["Session"]; engine = self.services["engine"]
-        compute_stats = self.services["compute_stats"]
+        from ...services.calculations import set_row_stats
 
-        import json as _json
         with Session(engine) as s:
             p = s.get(PokemonSet, set_id)
             sp = s.get(Species, p.species_id)
@@ -904,12 +649,7 @@ class DamageTab:
 
             # Stat del atacante (según categoría UI actual)
             cat = (self.d_category.get() or "Physical").lower()
-            evs = _json.loads(p.evs_json) or {}
-            ivs = _json.loads(p.ivs_json) or {}
-            base = {"HP": sp.base_hp, "Atk": sp.base_atk, "Def": sp.base_def,
-                    "SpA": sp.base_spa, "SpD": sp.base_spd, "Spe": sp.base_spe}
-            tmp = type("Tmp", (), {"evs": evs, "level": p.level, "nature": p.nature})
-            stats = compute_stats(tmp, base_stats=base, ivs=ivs)
+            stats = set_row_stats(p, sp)
             if cat == "physical":
                 self.att_stat_var.set(f"Atk {stats['Atk']}")
             else:
@@ -1,9 +1,30 @@
 # pokemon_app/gui/tabs/defense_tab.py
-import json as _json
 import tkinter as tk
 from tkinter import ttk, messagebox
 
-from pokemon_app.gui.ui.treeview_kit import set_style, apply_zebra, insert_with_zebra, autosize_columns, update_sort_arrows
+from pokemon_app.gui.ui.treeview_kit import set_style, apply_zebra, update_sort_arrows, VirtualTreeview
+from pokemon_app.services.battle_calc import is_spread_move
+from pokemon_app.services.calculations import set_row_stats
+from pokemon_app.services.ko_probability import end_of_turn_chip, ko_chances, roll_values
+from pokemon_app.services.move_index import MoveTable
+
+
+def _defense_sort_key(key: str):
+    def sort_key(r):
+        if key in ("xef","xmod"):
+            try: return float(r.get(key, "×1").replace("×",""))
+            except Exception: return 1.0
+        return r.get(key, -999999)
+    return sort_key
+
+
+def _defense_row(r: dict) -> tuple:
+    """(key, values, tags) para VirtualTreeview."""
+    return (r["set_id"],
+            (r["attacker"], r["item_att"], r["move"], r["cat"], r["power"], r["type"], r["xef"], r["xmod"],
+             r["min"], r["max"], r["min_pct"], r["max_pct"], r["ko"], f"{r['ohko_pct']:.1f}%",
+             f"{r['ko2_pct']:.1f}%", f"{r['ko3_pct']:.1f}%"),
+            ())
 
 
 class DefenseTab(ttk.Frame):
@@ -69,10 +90,16 @@ class DefenseTab(ttk.Frame):
         self.btn_recalc.grid(row=0, column=4, padx=4, pady=4, sticky="e")
 
         # Tabla
-        cols = ("attacker","item_att","move","cat","power","type","xef","xmod","min","max","min_pct","max_pct","ko","ohko_pct")
-        self.tree = ttk.Treeview(nb_container, columns=cols, show="headings", height=18)
-        self.tree.pack(fill="both", expand=True, padx=8, pady=(0,8))
+        cols = ("attacker","item_att","move","cat","power","type","xef","xmod","min","max","min_pct","max_pct","ko","ohko_pct","ko2_pct","ko3_pct")
+        table_frame = ttk.Frame(nb_container)
+        table_frame.pack(fill="both", expand=True, padx=8, pady=(0,8))
+        self.tree = ttk.Treeview(table_frame, columns=cols, show="headings", height=18)
+        sb = ttk.Scrollbar(table_frame, orient="vertical")
+        sb.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
         set_style(self.tree); apply_zebra(self.tree)
+        self.view = VirtualTreeview(self.tree, sb)
+        self._items = []
 
         cfg = [
             ("attacker", 220, "Atacante"),
@@ -89,6 +116,8 @@ class DefenseTab(ttk.Frame):
             ("max_pct",   80, "% max"),
             ("ko",        80, "HKO"),
             ("ohko_pct",  80, "OHKO %"),
+            ("ko2_pct",   80, "2HKO %"),
+            ("ko3_pct",   80, "3HKO %"),
         ]
         for key,w,txt in cfg:
             self.tree.column(key, width=w, anchor="e" if key not in ("attacker","move","item_att","cat","type","ko") else "w")
@@ -130,11 +159,7 @@ class DefenseTab(ttk.Frame):
                 sp   = s.get(Species, dset.species_id)
                 self.def_item_var.set(dset.item or "—")
 
-                compute_stats = self.services["compute_stats"]
-                evs = _json.loads(dset.evs_json) or {}; ivs = _json.loads(dset.ivs_json) or {}
-                base = {"HP": sp.base_hp, "Atk": sp.base_atk, "Def": sp.base_def, "SpA": sp.base_spa, "SpD": sp.base_spd, "Spe": sp.base_spe}
-                tmp = type("Tmp", (), {"evs": evs, "level": dset.level, "nature": dset.nature})
-                stats = compute_stats(tmp, base_stats=base, ivs=ivs)
+                stats = set_row_stats(dset, sp)
                 self.def_stat_var.set(f"HP {stats['HP']}/Def {stats['Def']}/SpD {stats['SpD']}")
         except Exception:
             pass
@@ -143,11 +168,17 @@ class DefenseTab(ttk.Frame):
     def on_sort(self, col):
         self.sort_dir = "desc" if (self.sort_by == col and self.sort_dir == "asc") else "asc"
         self.sort_by = col
+        if self._items:
+            # reordenar el modelo ya calculado, sin recalcular
+            self._items.sort(key=_defense_sort_key(self.sort_by), reverse=(self.sort_dir == "desc"))
+            self.view.set_rows(_defense_row(r) for r in self._items)
+            update_sort_arrows(self.tree, self.sort_by, self.sort_dir)
+            return
         self.refresh()
 
     def _clear_table(self):
-        for iid in self.tree.get_children():
-            self.tree.delete(iid)
+        self._items = []
+        self.view.clear()
 
     def refresh(self):
         """Recalcula lista de atacantes y su mejor movimiento vs el defensor seleccionado."""
@@ -163,81 +194,88 @@ class DefenseTab(ttk.Frame):
             "lightscreen": bool(self.d_lightscreen.get()),
             "veil": bool(self.d_veil.get()),
             "fmt_doubles": (self.d_format.get() == "Dobles"),
+            "def_id": self._defender_map[label],
+            "sort_by": self.sort_by,
+            "sort_dir": self.sort_dir,
         }
-        # cálculo “sin bloquear” la UI
-        self.after(20, lambda: self._compute_defense(params))
+        # cálculo fuera del hilo de Tk (un envío nuevo reemplaza al anterior)
+        executor = self.services.get("executor")
+        if executor is None:
+            self.after(20, lambda: self._compute_defense(params))
+            return
+        executor.submit(
+            "defense",
+            lambda token: self._defense_job(params, token),
+            on_done=lambda items: self._apply_defense_result(items, params),
+            on_error=lambda e: messagebox.showerror("Defensas", f"Error en el cálculo:\n{e}"),
+        )
 
     # ---------------- Cálculo ----------------
     def _compute_defense(self, params: dict):
+        """Ruta síncrona (sin executor)."""
+        self._apply_defense_result(self._defense_job(params), params)
+
+    def _defense_job(self, params: dict, token=None) -> list[dict]:
+        """Mejor movimiento de cada atacante vs el defensor. No toca Tk (corre en el executor)."""
+        check = token.check if token is not None else (lambda: None)
         Session = self.services["Session"]; engine = self.services["engine"]
-        list_sets = self.services["list_sets"]; compute_stats = self.services["compute_stats"]
 
         type_eff_fn = self.services.get("type_effectiveness")         # opcional: helper compartido
         item_mult_fn = self.services.get("attacker_item_multiplier_auto")  # opcional
 
-        # leer defensor
-        from ...db.models import PokemonSet, Species
-        def_id = self._defender_map[params["def_label"]]
+        # todos los sets como registros compactos (SELECT de Core, sin ORM); tipos
+        # resueltos una vez por especie/género (considera Tera OFF)
+        types_fn = self.services.get("get_species_types")
+        get_types = (lambda species, _ability, gender: types_fn(species, gender)) if types_fn else None
         with Session(engine) as s:
-            defender = s.get(PokemonSet, def_id)
-            def_sp = s.get(Species, defender.species_id)
-
-            # tipos del defensor (considera Tera OFF aquí; puedes agregar selector Tera si quieres)
-            types_fn = self.services.get("get_species_types")
-            if types_fn:
-                try:
-                    def_types = types_fn(def_sp.name, defender.gender)
-                except Exception:
-                    def_types = []
-            else:
-                def_types = []
-
-            D_evs = _json.loads(defender.evs_json) or {}
-            D_ivs = _json.loads(defender.ivs_json) or {}
-            D_base = {"HP": def_sp.base_hp,"Atk": def_sp.base_atk,"Def": def_sp.base_def,"SpA": def_sp.base_spa,"SpD": def_sp.base_spd,"Spe": def_sp.base_spe}
-            D_tmp = type("Tmp", (), {"evs": D_evs, "level": defender.level, "nature": defender.nature})
-            d_stats = compute_stats(D_tmp, base_stats=D_base, ivs=D_ivs)
-            hp_stat = d_stats["HP"]
-
-            # Traer todos los atacantes
-            atk_rows = list_sets(s, limit=None)
+            atk_rows = self.services["load_set_records"](s, get_types=get_types)
+
+        defender = next((r for r in atk_rows if r.id == params["def_id"]), None)
+        if defender is None:
+            return []
+        def_types = list(defender.types)
+        d_stats = defender.stats_dict()
+        hp_stat = d_stats["HP"]
+        # chip de fin de turno del defensor (Life Orb / Grassy / Leftovers) para 2HKO/3HKO
+        chip = end_of_turn_chip(hp_stat, params["terrain"], defender.item)
+
+        # todos los movimientos de la BD resueltos de una vez (id + datos empaquetados)
+        # antes del bucle: los que falten se piden juntos, no uno a uno dentro
+        get_table = self.services.get("move_table")
+        move_table = get_table() if get_table else MoveTable(self.services.get("get_move_info", self._move_info))
+        move_table.prefill(m for r in atk_rows for m in r.moves)
+        check()
 
         items = []
-        for aset, asp in atk_rows:
+        for i, aset in enumerate(atk_rows):
+            if i % 64 == 0:
+                check()
             # Datos del atacante
-            att_item = (aset.item or "").strip()
-            att_evs = _json.loads(aset.evs_json) or {}; att_ivs = _json.loads(aset.ivs_json) or {}
-            att_base = {"HP": asp.base_hp,"Atk": asp.base_atk,"Def": asp.base_def,"SpA": asp.base_spa,"SpD": asp.base_spd,"Spe": asp.base_spe}
-            A_tmp = type("Tmp", (), {"evs": att_evs, "level": aset.level, "nature": aset.nature})
-            att_stats = compute_stats(A_tmp, base_stats=att_base, ivs=att_ivs)
+            att_item = aset.item
+            att_stats = aset.stats_dict()
 
             # Tipos del atacante (para STAB y terreno)
-            try:
-                get_types = self.services.get("get_species_types")
-                att_types = get_types(asp.name, aset.gender) if get_types else []
-            except Exception:
-                att_types = []
+            att_types = list(aset.types)
 
             # Movimientos del atacante
             moves = self._iter_attacker_moves(aset)
 
             best = None  # guardará dict del mejor movimiento
             for mv in moves:
-                get_move_info = self.services.get("get_move_info", self._move_info)
-                m = get_move_info(mv)
+                m = move_table.resolve(mv)
 
-                if not m:
+                if m is None:
                     print(f"[DefenseTab] skip '{mv}': lookup None")
                     continue
 
-                power = int(m.get("power") or 0)
+                power = m.power
                 #if power <= 0:
                 #    print(f"[DefenseTab] skip '{mv}': power={power} (¿nombre distinto al cache?)")
                 #    continue
                 #if power <= 0:
                 #    # intenta poder variable
                 #    wkg = getattr(def_sp, "weight_kg", None)  # o desde Species/DB como lo tengas
-                #    vp = self.services.get("variable_power", lambda *_: None)(m.get("name",""), wkg)
+                #    vp = self.services.get("variable_power", lambda *_: None)(m.name, wkg)
                 #    if vp:
                 #        power = vp
                 #if power <= 0:
@@ -245,11 +283,10 @@ class DefenseTab(ttk.Frame):
                 #    continue
 
                 
-                power = int(m.get("power") or 0)
-                mcat = (m.get("category") or "physical").lower()
-                mtype = (m.get("type") or "Normal").capitalize()
+                mcat = m.category_name.lower()
+                mtype = m.type
                 
-                name_norm = (m.get("name","") or "").strip().lower()
+                name_norm = m.name.strip().lower()
                 if name_norm in ("tera blast", "tera-blast"):
                     # categoría por stat mayor del atacante (como en Damage)
                     mcat = "physical" if att_stats["Atk"] >= att_stats["SpA"] else "special"
@@ -268,7 +305,7 @@ class DefenseTab(ttk.Frame):
                     except Exception:
                         eff_mult = 1.0
                 if eff_mult == 0.0:
-                    print(f"[DefenseTab] skip '{m['name']}': inmunidad (type={mtype}, def={def_types})")
+                    print(f"[DefenseTab] skip '{m.name}': inmunidad (type={mtype}, def={def_types})")
                     # puedes decidir seguir y mostrar 0%, pero por ahora mantén el continue si lo tenías
                     # continue
 
@@ -309,7 +346,7 @@ class DefenseTab(ttk.Frame):
                     if att_item in {"Expert Belt"} and eff_mult > 1.0: mod *= 1.2
 
                 # Spread en Dobles
-                if params["fmt_doubles"] and self._is_spread_move(m.get("name","")):
+                if params["fmt_doubles"] and m.spread:
                     mod *= 0.75
 
                 # Pantallas (service: maneja Singles/Doubles y Veil)
@@ -325,7 +362,7 @@ class DefenseTab(ttk.Frame):
                 mod *= self.services["weather_move_multiplier"](mtype, params["weather"])
 
                 # Terreno
-                mod *= self.services["terrain_xmod"](params["terrain"], mtype, m.get("name",""))
+                mod *= self.services["terrain_xmod"](params["terrain"], mtype, m.name)
 
                 # --- xMOD final = (no-tipo) * (tipo con bayas) ---
                 xmod_val = mod * eff_total
@@ -333,7 +370,10 @@ class DefenseTab(ttk.Frame):
                 # Rango por roll e info de KO
                 dmin = int(base_damage * 0.85 * xmod_val)
                 dmax = int(base_damage * 1.00 * xmod_val)
-                min_hits, max_hits, exp_hits, _mode = self.services["resolve_hits"](m.get("name",""), "Auto", att_item)
+                if m.multi_hit:
+                    min_hits, max_hits, exp_hits, _mode = self.services["resolve_hits"](m.name, "Auto", att_item)
+                else:
+                    min_hits = max_hits = 1
                 tdmin = int(dmin * min_hits); tdmax = int(dmax * max_hits)
                 min_pct = round(tdmin * 100.0 / hp_stat, 1)
                 max_pct = round(tdmax * 100.0 / hp_stat, 1)
@@ -347,9 +387,10 @@ class DefenseTab(ttk.Frame):
                 ohko_pct = round(100.0 * ohko, 1)
 
                 cand = {
-                    "attacker": f"{asp.name} (Lv{aset.level}/{aset.nature or '—'})",
+                    "set_id": aset.id,
+                    "attacker": aset.label,
                     "item_att": att_item or "—",
-                    "move": m.get("name", mv),
+                    "move": m.name,
                     "cat": mcat.capitalize(),
                     "power": power,
                     "type": mtype,
@@ -360,43 +401,39 @@ class DefenseTab(ttk.Frame):
                     "min_pct": min_pct, "max_pct": max_pct,
                     "ko": ko_label,
                     "ohko_pct": ohko_pct,
+                    # para 2HKO/3HKO (se calculan solo para el mejor movimiento)
+                    "_rolls": roll_values(base_damage, xmod_val),
+                    "_weights": weights,
                 }
                 # elegir el mejor por max_pct (o por tdmax)
                 if (best is None) or (cand["max_pct"] > best["max_pct"]):
                     best = cand
 
             if best:
+                ko_n = ko_chances(best.pop("_rolls"), hp_stat, best.pop("_weights"),
+                                  turns=3, recoil=chip[0], heal=chip[1])
+                best["ko2_pct"] = round(ko_n[1] * 100.0, 1)
+                best["ko3_pct"] = round(ko_n[2] * 100.0, 1)
                 items.append(best)
 
         # orden
-        key = self.sort_by; reverse = (self.sort_dir == "desc")
-        def sort_key(r):
-            if key in ("xef","xmod"):
-                try: return float(r.get(key, "×1").replace("×",""))
-                except Exception: return 1.0
-            return r.get(key, -999999)
-        items.sort(key=sort_key, reverse=reverse)
-        
-
-        # pintar
-        for r in items:
-            insert_with_zebra(self.tree, values=(r["attacker"], r["item_att"], r["move"],
-                            r["cat"], r["power"], r["type"], r["xef"], r["xmod"],
-                            r["min"], r["max"], r["min_pct"], r["max_pct"], r["ko"], f"{r['ohko_pct']:.1f}%"))
-
-        autosize_columns(self.tree)
-        update_sort_arrows(self.tree, self.sort_by, "asc" if not reverse else "desc")
+        items.sort(key=_defense_sort_key(params["sort_by"]), reverse=(params["sort_dir"] == "desc"))
+        return items
+
+    def _apply_defense_result(self, items: list[dict], params: dict):
+        """Pinta la tabla (hilo de Tk)."""
+        self._items = items
+        self.view.set_rows(_defense_row(r) for r in items)
+
+        self.view.autosize()
+        update_sort_arrows(self.tree, params["sort_by"], params["sort_dir"])
     # fin _compute_defense
 
 
     # ---------------- Helpers de datos ----------------
     def _iter_attacker_moves(self, aset):
         """Devuelve la lista de movimientos declarados en el set (máx 4)."""
-        try:
-            mv = _json.loads(aset.moves_json) or []
-            return [m for m in mv if (m or "").strip()]
-        except Exception:
-            return []
+        return [m for m in aset.moves if (m or "").strip()]
 
     def _move_info(self, name: str):
         """
@@ -444,12 +481,7 @@ class DefenseTab(ttk.Frame):
         return []
     
     def _is_spread_move(self, move_name: str) -> bool:
-        spread = {
-            "rock slide","earthquake","bulldoze","heat wave","dazzling gleam","blizzard",
-            "muddy water","discharge","snarl","hyper voice","surf","icy wind",
-            "eruption","lava plume","sludge wave","parabolic charge","petal blizzard"
-        }
-        return (move_name or "").strip().lower() in spread
+        return is_spread_move(move_name)
 
 
 # Fin DefenseTab
@@ -1,7 +1,5 @@
 from __future__ import annotations
-import json
 import tkinter as tk
-import os
 from tkinter import ttk, messagebox
 from types import SimpleNamespace
 from pokemon_app.utils.species_normalize import normalize_species_name
@@ -111,7 +109,8 @@ class InputTab(ttk.Frame):
         bot.grid(row=1, column=0, columnspan=2, sticky="ew", padx=8, pady=(0,8))
         ttk.Button(bot, text="Parsear", command=self.on_parse).pack(side="left", padx=4)
         ttk.Button(bot, text="Calcular Stats", command=self.on_calc).pack(side="left", padx=4)
-        ttk.Button(bot, text="Guardar en DB", command=self.on_save).pack(side="left", padx=4)
+        self.btn_save = ttk.Button(bot, text="Guardar en DB", command=self.on_save)
+        self.btn_save.pack(side="left", padx=4)
         ttk.Button(bot, text="Limpiar", command=self.on_clear).pack(side="left", padx=4)
 
     # ---------- Acciones ----------
@@ -167,14 +166,11 @@ class InputTab(ttk.Frame):
         ivs = p.get("ivs") or {"HP":31,"Atk":31,"Def":31,"SpA":31,"SpD":31,"Spe":31}
         gender = p.get("gender")  # puede ser None
 
-        # 1) Asegurar base stats en cache JSON (si falla, avisamos pero seguimos)
+        # 1) Asegurar base stats en el almacén local (si falla, avisamos pero seguimos)
         try:
-            import os
-            data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
-            base_stats_path = os.path.join(data_dir, "base_stats.json")
-            self.services["ensure_species_in_json"](name, gender, base_stats_path)
+            self.services["ensure_species_in_json"](name, gender)
         except Exception as e:
-            messagebox.showwarning("Base stats", f"No pude asegurar species en JSON:\n{e}")
+            messagebox.showwarning("Base stats", f"No pude asegurar la especie:\n{e}")
 
         # 2) Construir base stats y calcular — TODO ADENTRO DEL TRY
         try:
@@ -195,6 +191,13 @@ class InputTab(ttk.Frame):
 
 
     def on_save(self):
+        # varios sets pegados (equipo exportado, volcado): importación en bloque
+        from pokemon_app.services.importer import split_sets, import_sets
+        blocks = split_sets(self.txt_input.get("1.0", "end"))
+        if len(blocks) > 1:
+            self._save_many(blocks, import_sets)
+            return
+
         if not self.current_parsed:
             messagebox.showinfo("Info", "Primero parsea un set.")
             return
@@ -217,9 +220,7 @@ class InputTab(ttk.Frame):
             moves  = p.get("moves") or []
             
             try:
-                data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
-                base_stats_path = os.path.join(data_dir, "base_stats.json")
-                self.services["ensure_species_in_json"](name, gender, base_stats_path)
+                self.services["ensure_species_in_json"](name, gender)
             except Exception:
                 pass
 
@@ -254,6 +255,49 @@ class InputTab(ttk.Frame):
 
 
 
+    def _save_many(self, blocks: list[str], import_sets):
+        """Importación en bloque fuera del hilo de Tk (parseo, prefetch de especies e INSERT)."""
+        executor = self.services.get("executor")
+        if executor is not None and executor.is_busy("import"):
+            messagebox.showinfo("Guardar", "Ya hay una importación en curso.")
+            return
+        if not messagebox.askyesno("Guardar", f"Hay {len(blocks)} sets en el texto. ¿Guardarlos todos?"):
+            return
+        if executor is None:
+            try:
+                rep = import_sets(blocks)
+            except Exception as e:
+                self._on_import_error(e)
+                return
+            self._apply_import(rep)
+            return
+        self.btn_save.state(["disabled"])
+        executor.submit(
+            "import",
+            lambda token: import_sets(blocks),     # sin token.check: la escritura no se corta a medias
+            on_done=self._apply_import,
+            on_error=self._on_import_error,
+        )
+
+    def _on_import_error(self, e):
+        self.btn_save.state(["!disabled"])
+        messagebox.showerror("DB", f"No pude guardar los sets:\n{e}")
+
+    def _apply_import(self, rep):
+        self.btn_save.state(["!disabled"])
+        msg = f"Sets guardados: {rep.inserted} de {rep.total}."
+        if rep.errors:
+            detail = "\n".join(f"#{e.index} {e.header}: {e.message}" for e in rep.errors[:10])
+            more = f"\n(+{len(rep.errors) - 10} más)" if len(rep.errors) > 10 else ""
+            messagebox.showwarning("Guardado", f"{msg}\n\nCon errores:\n{detail}{more}")
+        else:
+            messagebox.showinfo("Guardado", msg)
+        if rep.ids and callable(self.on_saved):
+            try:
+                self.on_saved(rep.ids[-1])
+            except Exception:
+                pass
+
     def on_clear(self):
         self.txt_input.delete("1.0", "end")
         self.current_parsed = None
@@ -308,38 +352,12 @@ class InputTab(ttk.Frame):
         except Exception:
             pass
 
-        # 2) JSON fallback (acepta mayúsculas o minúsculas)
-        import os, json
-        data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
-        path = os.path.join(data_dir, "base_stats.json")
+        # 2) Almacén local de datos de referencia (db/data_store.py)
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            # buscar por clave exacta y, si no está, por normalización
-            bs = data.get(species_name)
-            if not bs:
-                key_norm = species_name.strip().lower().replace(" ", "-")
-                for k, v in data.items():
-                    if k.strip().lower().replace(" ", "-") == key_norm:
-                        bs = v
-                        break
-
-            if bs:
-                # soporta JSON con "HP"/"Atk"/... o "hp"/"atk"/...
-                def pick(d, up, low):
-                    return d.get(up) if up in d else d.get(low)
-
-                json_bs = {
-                    "HP":  int(pick(bs, "HP",  "hp")  or 0),
-                    "Atk": int(pick(bs, "Atk", "atk") or 0),
-                    "Def": int(pick(bs, "Def", "def") or 0),
-                    "SpA": int(pick(bs, "SpA", "spa") or 0),
-                    "SpD": int(pick(bs, "SpD", "spd") or 0),
-                    "Spe": int(pick(bs, "Spe", "spe") or 0),
-                }
-                if _valid(json_bs):
-                    return json_bs
+            from ...db import data_store
+            store_bs = data_store.get_base_stats(species_name)
+            if store_bs and _valid(store_bs):
+                return store_bs
         except Exception:
             pass
 
@@ -0,0 +1,214 @@
+# pokemon_app/gui/tabs/matchup_tab.py
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from pokemon_app.gui.ui.treeview_kit import apply_damage_tags, set_style, apply_zebra, update_sort_arrows, VirtualTreeview
+from pokemon_app.services.damage_engine import FieldConditions
+from pokemon_app.services.team_matchup import MAX_TEAM
+
+_DIRECTIONS = ["A → B", "B → A"]
+_NONE = "—"
+
+
+def _matchup_sort_key(key: str):
+    def sort_key(r):
+        if key == "ko":
+            return r.ko_best
+        return getattr(r, key)
+    return sort_key
+
+
+def _matchup_row(n: int, r) -> tuple:
+    """(key, values, tags) para VirtualTreeview."""
+    kb = r.ko_best
+    if kb <= 1:
+        tags = ("ko_ohko",)
+    elif kb == 2:
+        tags = ("ko_2hko",)
+    elif kb >= 4:
+        tags = ("ko_4hko",)
+    else:
+        tags = ()
+    return (n,
+            (r.attacker, r.move, r.defender, r.min_pct, r.max_pct, r.ko,
+             f"{r.ohko_pct:.1f}%", f"{r.ko2_pct:.1f}%", f"{r.ko3_pct:.1f}%"),
+            tags)
+
+
+class MatchupTab(ttk.Frame):
+    """
+    Equipo A contra equipo B (hasta 6 sets cada uno): daño de cada movimiento de
+    cada atacante contra cada defensor, en los dos sentidos
+    (services/team_matchup.py). Se calcula una vez; cambiar el sentido o
+    'solo mejor movimiento' solo repinta.
+    """
+    def __init__(self, master, services: dict):
+        super().__init__(master)
+        self.services = services
+
+        # estado
+        self._set_map = {}           # label -> set_id
+        self.team_vars = {side: [tk.StringVar(value=_NONE) for _ in range(MAX_TEAM)] for side in ("A", "B")}
+        self.m_format = tk.StringVar(value="Singles")
+        self.m_weather = tk.StringVar(value="Ninguno")
+        self.m_terrain = tk.StringVar(value="Ninguno")
+        self.m_reflect     = tk.BooleanVar(value=False)
+        self.m_lightscreen = tk.BooleanVar(value=False)
+        self.m_veil        = tk.BooleanVar(value=False)
+        self.m_direction = tk.StringVar(value=_DIRECTIONS[0])
+        self.m_best_only = tk.BooleanVar(value=False)
+
+        # orden tabla
+        self.sort_by = "max_pct"
+        self.sort_dir = "desc"
+
+        self._matchup = None
+        self._items = []
+        self._build_ui()
+        self.after(0, self._reload_sets)
+
+    # ---------------- UI ----------------
+    def _build_ui(self):
+        nb_container = self.master
+
+        teams = ttk.LabelFrame(nb_container, text="Equipos")
+        teams.pack(fill="x", padx=8, pady=8)
+        self._team_combos = []
+        for row, side in enumerate(("A", "B")):
+            ttk.Label(teams, text=f"Equipo {side}:").grid(row=row, column=0, sticky="w", padx=4, pady=4)
+            for i, var in enumerate(self.team_vars[side]):
+                cmb = ttk.Combobox(teams, textvariable=var, width=26, state="readonly", values=[_NONE])
+                cmb.grid(row=row, column=1 + i, sticky="w", padx=2, pady=4)
+                self._team_combos.append(cmb)
+
+        top = ttk.LabelFrame(nb_container, text="Parámetros")
+        top.pack(fill="x", padx=8, pady=(0, 8))
+
+        ttk.Label(top, text="Clima:").grid(row=0, column=0, sticky="w", padx=4)
+        ttk.Combobox(top, textvariable=self.m_weather, width=14, state="readonly",
+                     values=["Ninguno","Lluvia","Sol","Tormenta Arena","Nieve"]).grid(row=0, column=1, sticky="w", padx=4)
+        ttk.Label(top, text="Terreno:").grid(row=0, column=2, sticky="e", padx=4)
+        ttk.Combobox(top, textvariable=self.m_terrain, width=14, state="readonly",
+                     values=["Ninguno","Grassy","Electric","Psychic","Misty"]).grid(row=0, column=3, sticky="w", padx=4)
+        ttk.Label(top, text="Formato:").grid(row=0, column=4, sticky="e")
+        ttk.Combobox(top, textvariable=self.m_format, width=12, state="readonly",
+                     values=["Singles","Dobles"]).grid(row=0, column=5, padx=4, sticky="w")
+
+        ttk.Checkbutton(top, text="Reflect", variable=self.m_reflect).grid(row=1, column=0, padx=4, sticky="w")
+        ttk.Checkbutton(top, text="Light Screen", variable=self.m_lightscreen).grid(row=1, column=1, padx=4, sticky="w")
+        ttk.Checkbutton(top, text="Aurora Veil", variable=self.m_veil).grid(row=1, column=2, padx=4, sticky="w")
+
+        ttk.Label(top, text="Sentido:").grid(row=1, column=4, sticky="e")
+        cmb_dir = ttk.Combobox(top, textvariable=self.m_direction, width=12, state="readonly", values=_DIRECTIONS)
+        cmb_dir.grid(row=1, column=5, padx=4, sticky="w")
+        cmb_dir.bind("<<ComboboxSelected>>", lambda e: self._show())
+        ttk.Checkbutton(top, text="Solo mejor movimiento", variable=self.m_best_only,
+                        command=self._show).grid(row=1, column=6, padx=4, sticky="w")
+
+        self.btn_calc = ttk.Button(top, text="Calcular", command=self.refresh)
+        self.btn_calc.grid(row=0, column=6, padx=4, pady=4, sticky="w")
+        ttk.Button(top, text="Recargar sets", command=self._reload_sets).grid(row=0, column=7, padx=4, pady=4, sticky="w")
+
+        # Tabla
+        cols = ("attacker","move","defender","min_pct","max_pct","ko","ohko_pct","ko2_pct","ko3_pct")
+        table_frame = ttk.Frame(nb_container)
+        table_frame.pack(fill="both", expand=True, padx=8, pady=(0,8))
+        self.tree = ttk.Treeview(table_frame, columns=cols, show="headings", height=18)
+        sb = ttk.Scrollbar(table_frame, orient="vertical")
+        sb.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        set_style(self.tree); apply_zebra(self.tree); apply_damage_tags(self.tree)
+        self.view = VirtualTreeview(self.tree, sb)
+
+        cfg = [
+            ("attacker", 240, "Atacante"),
+            ("move",     160, "Movimiento"),
+            ("defender", 240, "Defensor"),
+            ("min_pct",   80, "% min"),
+            ("max_pct",   80, "% max"),
+            ("ko",        80, "HKO"),
+            ("ohko_pct",  80, "OHKO %"),
+            ("ko2_pct",   80, "2HKO %"),
+            ("ko3_pct",   80, "3HKO %"),
+        ]
+        for key,w,txt in cfg:
+            self.tree.column(key, width=w, anchor="w" if key in ("attacker","move","defender","ko") else "e")
+            self.tree.heading(key, text=txt, command=lambda c=key: self.on_sort(c))
+
+    # ---------------- Eventos/acciones ----------------
+    def _reload_sets(self):
+        """Rellena los combos de los dos equipos con los sets guardados."""
+        Session = self.services["Session"]; engine = self.services["engine"]
+        with Session(engine) as s:
+            records = self.services["load_set_records"](s)
+        self._set_map = {f"{r.label} #{r.id}": r.id for r in records}
+        labels = [_NONE] + list(self._set_map)
+        for cmb in self._team_combos:
+            cmb["values"] = labels
+        for vars_ in self.team_vars.values():
+            for var in vars_:
+                if var.get() not in self._set_map:
+                    var.set(_NONE)
+
+    def _team_ids(self, side: str) -> list[int]:
+        return [self._set_map[v.get()] for v in self.team_vars[side] if v.get() in self._set_map]
+
+    def on_sort(self, col):
+        self.sort_dir = "desc" if (self.sort_by == col and self.sort_dir == "asc") else "asc"
+        self.sort_by = col
+        self._show()
+
+    def _field(self) -> FieldConditions:
+        return FieldConditions(
+            weather=self.m_weather.get(),
+            terrain=self.m_terrain.get(),
+            reflect=bool(self.m_reflect.get()),
+            lightscreen=bool(self.m_lightscreen.get()),
+            veil=bool(self.m_veil.get()),
+            doubles=(self.m_format.get() == "Dobles"),
+        )
+
+    def refresh(self):
+        """Calcula el enfrentamiento completo (los dos sentidos) fuera del hilo de Tk."""
+        team_a, team_b = self._team_ids("A"), self._team_ids("B")
+        if not team_a or not team_b:
+            messagebox.showinfo("Enfrentamiento", "Elige al menos un set en cada equipo.")
+            return
+        params = {"team_a": team_a, "team_b": team_b, "field": self._field()}
+        executor = self.services.get("executor")
+        if executor is None:
+            self.after(20, lambda: self._apply_matchup(self._matchup_job(params)))
+            return
+        executor.submit(
+            "matchup",
+            lambda token: self._matchup_job(params, token),
+            on_done=self._apply_matchup,
+            on_error=lambda e: messagebox.showerror("Enfrentamiento", f"Error en el cálculo:\n{e}"),
+        )
+
+    # ---------------- Cálculo ----------------
+    def _matchup_job(self, params: dict, token=None):
+        """No toca Tk (corre en el executor)."""
+        return self.services["compute_matchup"](
+            params["team_a"], params["team_b"], params["field"],
+            get_move_info=self.services.get("get_move_info"),
+            check=token.check if token is not None else None,
+        )
+
+    def _apply_matchup(self, matchup):
+        self._matchup = matchup
+        self._show()
+
+    def _show(self):
+        """Pinta el sentido elegido (hilo de Tk); no recalcula."""
+        if self._matchup is None:
+            return
+        side = self._matchup.a_vs_b if self.m_direction.get() == _DIRECTIONS[0] else self._matchup.b_vs_a
+        self._items = side.rows(best_only=bool(self.m_best_only.get()))
+        self._items.sort(key=_matchup_sort_key(self.sort_by), reverse=(self.sort_dir == "desc"))
+        self.view.set_rows(_matchup_row(n, r) for n, r in enumerate(self._items))
+        self.view.autosize()
+        update_sort_arrows(self.tree, self.sort_by, self.sort_dir)
+
+
+# Fin MatchupTab
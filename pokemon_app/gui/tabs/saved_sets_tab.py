@@ -11,6 +11,8 @@ except Exception:
     Image = ImageTk = None
     
 from pokemon_app.gui.ui.treeview_kit import set_style, apply_zebra, insert_with_zebra, autosize_columns, update_sort_arrows, attach_right_click_menu
+from pokemon_app.services import http_client, snapshot
+from pokemon_app.services.pokeapi import endpoint
 
 
 
@@ -30,8 +32,9 @@ class SavedSetsTab:
     Pestaña 'Sets Guardados'.
     services esperados:
       - Session, engine
-      - list_sets(session, only_species=None, nature=None, item=None, limit=None, offset=None, order_by=None, order_dir=None)
-        (si tu list_sets no soporta algunos args, hay try/except para fallback)
+      - list_sets_page(session, limit=, after=, before=, order_by=, order_dir=, **filtros)
+        (paginación por cursor + total en la misma consulta; db/repository.py)
+      - distinct_set_values(session) -> {"ability","tera","item"} (cacheado hasta la próxima escritura)
       - compute_stats (opcional, para futuras columnas)
     """
     def __init__(self, master, services: dict):
@@ -43,6 +46,9 @@ class SavedSetsTab:
         self.sort_dir = "asc"
         self.page_size = 50
         self.page = 0
+        # cursor de la página actual: None (primera), ("after", clave) o ("before", clave)
+        self._cursor = None
+        self._page_info = None      # último SetPage pintado
         
         self._species_search_job = None
 
@@ -58,7 +64,8 @@ class SavedSetsTab:
         top = ttk.LabelFrame(self.master, text="Filtros")
         top.pack(fill="x", padx=8, pady=8)
 
-        ttk.Label(top, text="Especie:").grid(row=0, column=0, sticky="w", padx=4, pady=4)
+        # texto libre: especie, item, habilidad, tera, movimientos o el pegado (FTS5; con % -> ILIKE sobre especie)
+        ttk.Label(top, text="Buscar:").grid(row=0, column=0, sticky="w", padx=4, pady=4)
         self.f_species = tk.StringVar()
         ttk.Entry(top, textvariable=self.f_species, width=20).grid(row=0, column=1, sticky="w", padx=2, pady=4)
         # Búsqueda en vivo con debounce
@@ -168,12 +175,16 @@ class SavedSetsTab:
 
 
     # ---------- Acciones ----------
+    def _first_page(self):
+        self.page = 0
+        self._cursor = None
+
     def on_search(self):
         try:
             self.page_size = int(self.f_pagesize.get())
         except Exception:
             self.page_size = 25
-        self.page = 0
+        self._first_page()
         self.sort_by = self.f_order.get() or "species"
         self.sort_dir = self.f_order_dir.get() or "asc"
         self.refresh()
@@ -189,53 +200,27 @@ class SavedSetsTab:
         self.f_pagesize.set("25")
         self.f_ability.set("")
         self.f_tera.set("")
-        self.page = 0
+        self._first_page()
         self.refresh()
         self._reload_filter_options()
 
 
     def on_prev(self):
-        if self.page > 0:
-            self.page -= 1
-            self.refresh()
-            self._reload_filter_options()
+        info = self._page_info
+        if self.page <= 0 or info is None or not info.has_prev:
+            return
+        self.page -= 1
+        self._cursor = ("before", info.first) if self.page > 0 else None
+        self.refresh()
 
 
     def on_next(self):
-        if "count_sets" not in self.services:
-            self.page += 1
-            self.refresh()
-            self._reload_filter_options()
+        info = self._page_info
+        if info is None or not info.has_next:
             return
-
-        # con contador
-        Session = self.services["Session"]; engine = self.services["engine"]
-        count_sets = self.services["count_sets"]
-
-        species_like = (self.f_species.get().strip() or "")
-        if species_like and "%" not in species_like:
-            species_like = f"%{species_like}%"
-        nature = (self.f_nature.get().strip() or None)
-        item   = (self.f_item.get().strip() or None)
-        ability= (self.f_ability.get().strip() or None)
-        tera   = (self.f_tera.get().strip() or None)
-
-        with Session(engine) as s:
-            try:
-                total = count_sets(s, only_species=species_like or None, nature=nature, item=item, ability=ability, tera=tera)
-            except TypeError:
-                total = None
-
-        if total is None:
-            self.page += 1
-        else:
-            max_page = max(0, (total-1)//self.page_size)
-            if self.page < max_page:
-                self.page += 1
-
+        self.page += 1
+        self._cursor = ("after", info.last)
         self.refresh()
-        self._reload_filter_options()
-
 
 
     def on_sort(self, col: str):
@@ -244,8 +229,9 @@ class SavedSetsTab:
         else:
             self.sort_by = col
             self.sort_dir = "asc" if col in ("species","nature","item","ability","tera","moves") else "desc"
+        # el cursor depende del orden: vuelve a la primera página
+        self._first_page()
         self.refresh()
-        self._reload_filter_options()
 
 
     def refresh(self):
@@ -255,46 +241,45 @@ class SavedSetsTab:
 
         Session = self.services["Session"]
         engine  = self.services["engine"]
-        list_sets = self.services["list_sets"]
+        list_sets_page = self.services["list_sets_page"]
 
-        species_like = (self.f_species.get().strip() or "")
-        if species_like and "%" not in species_like:
-            species_like = f"%{species_like}%"
+        query = self.f_species.get().strip()
+        species_like = query if "%" in query else ""
+        search = "" if species_like else query
         nature = (self.f_nature.get().strip() or None)
         item   = (self.f_item.get().strip() or None)
         
         ability = (self.f_ability.get().strip() or None)
         tera    = (self.f_tera.get().strip() or None)
-        limit = self.page_size
-        offset = self.page * self.page_size
+        direction, key = self._cursor or (None, None)
 
-        # Traer filas
+        # Traer filas (y el total, en la misma consulta)
         with Session(engine) as s:
-            rows = []
-            try:
-                rows = list_sets(
-                    s,
-                    only_species=species_like or None,
-                    nature=nature,
-                    item=item,
-                    ability=ability,
-                    tera=tera,
-                    limit=limit,
-                    offset=offset,
-                    order_by=self.sort_by,
-                    order_dir=self.sort_dir
-                )
-            except TypeError:
-                rows = list_sets(s, only_species=species_like or None, nature=nature, item=item)
-
-
-        # Si no hay filas y estamos en una página > 0, retrocede una
-        if self.page > 0 and not rows:
-            self.page -= 1
+            info = list_sets_page(
+                s,
+                limit=self.page_size,
+                after=key if direction == "after" else None,
+                before=key if direction == "before" else None,
+                order_by=self.sort_by,
+                order_dir=self.sort_dir,
+                only_species=species_like or None,
+                search=search or None,
+                nature=nature,
+                item=item,
+                ability=ability,
+                tera=tera,
+            )
+        rows = info.rows
+
+        # Página vacía tras borrar/editar: vuelve a la primera
+        if self._cursor is not None and not rows:
+            self._first_page()
             self.refresh()
             return
+        self._page_info = info
 
         # Pintar
+        painted = []    # valores pintados (para autosize sin releer el widget)
         for pset, sp in rows:
             try:
                 evs = _json.loads(pset.evs_json) or {}
@@ -319,7 +304,7 @@ class SavedSetsTab:
                     updated_txt = str(pset.updated_at)
 
             #self.tree.insert("", "end",iid=str(pset.id),values=(pset.id,sp.name,pset.nature or "—",pset.item or "—",pset.ability or "—",pset.tera_type or "—",pset.level,evs_str,ivs_str,moves_str,updated_txt))
-            insert_with_zebra(self.tree, values=(
+            values = (
                     pset.id,
                     sp.name,
                     pset.nature or "—",
@@ -331,21 +316,13 @@ class SavedSetsTab:
                     ivs_str,
                     moves_str,
                     updated_txt
-                ))
+                )
+            painted.append(values)
+            insert_with_zebra(self.tree, values=values)
 
-        total_txt = ""
-        if "count_sets" in self.services:
-            with Session(engine) as s:
-                try:
-                    total = self.services["count_sets"](s,
-                        only_species=species_like or None,
-                        nature=nature, item=item,
-                        ability=ability, tera=tera)
-                    total_txt = f" / {total} sets"
-                except Exception:
-                    total_txt = ""
-        self.lbl_page.config(text=f"Página {self.page + 1}{total_txt}")
-        autosize_columns(self.tree)
+        pages = max(1, -(-info.total // self.page_size))
+        self.lbl_page.config(text=f"Página {self.page + 1} de {pages} / {info.total} sets")
+        autosize_columns(self.tree, rows=painted)
 
 
     def _selected_set_id(self) -> int | None:
@@ -534,60 +511,19 @@ class SavedSetsTab:
         messagebox.showinfo("Copiar", "Set copiado al portapapeles.")
         
     def _reload_filter_options(self):
-        """Rellena los combos de Ability y Tera con los valores distintos presentes en la DB."""
+        """Rellena los combos de Ability, Tera e Item con los valores distintos presentes en la DB (cacheados en el repositorio)."""
         Session = self.services["Session"]; engine = self.services["engine"]
-        abilities, teras, items = set(), set(), set()
-        try:
-            from ...db.models import PokemonSet
-        except Exception:
-            # si falla el import, deja combos en blanco
-            for combo in ("cmb_ability","cmb_tera","cmb_item"):
-                if hasattr(self, combo):
-                    getattr(self, combo)["values"] = [""]
-            return
-
-        # Leer valores distintos con SQLAlchemy
-        try:
-            from sqlalchemy import select, distinct
-            with Session(engine) as s:
-                # ability
-                q1 = select(distinct(PokemonSet.ability)).where(PokemonSet.ability.isnot(None))
-                for (val,) in s.execute(q1):
-                    v = (val or "").strip()
-                    if v:
-                        abilities.add(v)
-                # tera_type
-                q2 = select(distinct(PokemonSet.tera_type)).where(PokemonSet.tera_type.isnot(None))
-                for (val,) in s.execute(q2):
-                    v = (val or "").strip()
-                    if v:
-                        teras.add(v)
-                
-                q3 = select(distinct(PokemonSet.item)).where(PokemonSet.item.isnot(None))
-                for (val,) in s.execute(q3):
-                    v = (val or "").strip()
-                    if v:
-                        items.add(v)
-        except Exception:
-            # Fallback muy simple si tu versión no tiene select/distinct cómodos
-            with Session(engine) as s:
-                rows = s.query(PokemonSet).all()
-                for p in rows:
-                    v1 = (getattr(p, "ability", None) or "").strip()
-                    if v1: abilities.add(v1)
-                    v2 = (getattr(p, "tera_type", None) or "").strip()
-                    if v2: teras.add(v2)
-                    v3 = (getattr(p, "item", None) or "").strip()
-                    if v3: items.add(v3)
+        with Session(engine) as s:
+            values = self.services["distinct_set_values"](s)
 
         # Mantener selecciones si siguen existiendo
         sel_ability = self.f_ability.get()
         sel_tera    = self.f_tera.get()
         sel_item    = self.f_item.get()
 
-        ability_list = [""] + sorted(abilities, key=str.casefold)
-        tera_list    = [""] + sorted(teras, key=str.casefold)
-        item_list    = [""] + sorted(items, key=str.casefold)
+        ability_list = [""] + values["ability"]
+        tera_list    = [""] + values["tera"]
+        item_list    = [""] + values["item"]
 
         if hasattr(self, "cmb_ability"):
             self.cmb_ability["values"] = ability_list
@@ -635,9 +571,8 @@ class SavedSetsTab:
     def _do_species_live_search(self):
         self._species_search_job = None
         # reiniciar a primera página y refrescar
-        self.page = 0
+        self._first_page()
         self.refresh()
-        self._reload_filter_options()
         
     def apply_treeview_style(root):
         style = ttk.Style(root)
@@ -936,7 +871,8 @@ class EditSetDialog(tk.Toplevel):
         from datetime import datetime
         with Session(engine) as s:
             try:
-                from ...db.models import PokemonSet
+                from ...db.models import PokemonSet, Species
+                from ...db.repository import apply_set_stats
                 p = s.get(PokemonSet, self.set_id)
                 if not p:
                     raise RuntimeError("Set no encontrado.")
@@ -952,6 +888,7 @@ class EditSetDialog(tk.Toplevel):
                 p.moves_json = _json.dumps(moves, ensure_ascii=False)
                 if hasattr(p, "updated_at"):
                     p.updated_at = datetime.now()
+                apply_set_stats(p, s.get(Species, p.species_id))
 
                 s.add(p); s.commit()
             except Exception as e:
@@ -1076,30 +1013,30 @@ class EditSetDialog(tk.Toplevel):
         if not slug:
             return self._build_moves_pool_fallback(species_id)
 
-        # --- caché en memoria ---
+        # --- caché en memoria y almacén local ---
         if slug in self._pokeapi_moves_cache:
             return list(self._pokeapi_moves_cache[slug])
+        try:
+            from ...db import data_store
+            stored = data_store.get_learnset(species_name)
+        except Exception:
+            stored = None
+        if not stored:
+            # snapshot del paquete (slugs de PokéAPI)
+            snap = snapshot.snapshot_learnset(slug)
+            stored = sorted({_pretty_move(m) for m in snap}, key=str.casefold) if snap else None
+        if stored:
+            self._pokeapi_moves_cache[slug] = list(stored)
+            return stored
 
         # --- intento PokeAPI ---
         moves = None
         try:
-            try:
-                import requests  # usar requests si está disponible
-            except Exception:
-                requests = None
-
             def _get(url: str):
-                if requests:
-                    r = requests.get(url, timeout=5)
-                    r.raise_for_status()
-                    return r.json()
-                else:
-                    # fallback mínimo con urllib
-                    import urllib.request, json
-                    with urllib.request.urlopen(url, timeout=5) as resp:
-                        return json.loads(resp.read().decode("utf-8"))
+                return http_client.get_json(url, timeout=5)
 
-            base = "https://pokeapi.co/api/v2"
+            from ...services.pokeapi import base_url
+            base = base_url()
 
             # 1) /pokemon/{slug}
             data = None
@@ -1137,6 +1074,11 @@ class EditSetDialog(tk.Toplevel):
         # --- guardar en caché o usar fallback ---
         if moves:
             self._pokeapi_moves_cache[slug] = list(moves)
+            try:
+                from ...db import data_store
+                data_store.set_learnset(species_name, moves)
+            except Exception:
+                pass
             return moves
 
         # fallback a unión de movimientos vistos en BD
@@ -1190,29 +1132,13 @@ class EditSetDialog(tk.Toplevel):
 
     # HTTP helpers
     def _http_get_json(self, url: str):
-        try:
-            import requests
-            r = requests.get(url, timeout=6)
-            r.raise_for_status()
-            return r.json()
-        except Exception:
-            # fallback urllib
-            import urllib.request, json
-            with urllib.request.urlopen(url, timeout=6) as resp:
-                return json.loads(resp.read().decode("utf-8"))
+        # cliente compartido: keep-alive, reintentos, ETag y caché de 404
+        return http_client.get_json(url, timeout=6)
     # Fin de _http_get_json
 
     # HTTP helper para bytes (imágenes)
     def _http_get_bytes(self, url: str) -> bytes:
-        try:
-            import requests
-            r = requests.get(url, timeout=6)
-            r.raise_for_status()
-            return r.content
-        except Exception:
-            import urllib.request
-            with urllib.request.urlopen(url, timeout=6) as resp:
-                return resp.read()
+        return http_client.get_bytes(url, timeout=6)
     # Fin de _http_get_bytes
     
     # Cache de sprites en disco (opcional)
@@ -1254,14 +1180,14 @@ class EditSetDialog(tk.Toplevel):
                 data = None
                 # 3.1 /pokemon/{slug}
                 try:
-                    data = self._http_get_json(f"https://pokeapi.co/api/v2/pokemon/{slug}")
+                    data = self._http_get_json(endpoint("pokemon", slug))
                 except Exception:
                     data = None
 
                 # 3.2 fallback: /pokemon-species/{slug} -> variedad por defecto -> /pokemon/{name}
                 if not data:
                     try:
-                        spec = self._http_get_json(f"https://pokeapi.co/api/v2/pokemon-species/{slug}")
+                        spec = self._http_get_json(endpoint("pokemon-species", slug))
                         varieties = spec.get("varieties", []) if isinstance(spec, dict) else []
                         p_name = None
                         for v in varieties:
@@ -1270,7 +1196,7 @@ class EditSetDialog(tk.Toplevel):
                         if not p_name and varieties:
                             p_name = varieties[0].get("pokemon", {}).get("name")
                         if p_name:
-                            data = self._http_get_json(f"https://pokeapi.co/api/v2/pokemon/{p_name}")
+                            data = self._http_get_json(endpoint("pokemon", p_name))
                     except Exception:
                         data = None
 
@@ -1347,9 +1273,21 @@ class EditSetDialog(tk.Toplevel):
         if not slug:
             return self._build_ability_pool_fallback(species_id)
 
-        # cache en memoria
+        # cache en memoria y almacén local
         if slug in self._pokeapi_abilities_cache:
             return list(self._pokeapi_abilities_cache[slug])
+        try:
+            from ...db import data_store
+            stored = data_store.get_abilities(species_name)
+        except Exception:
+            stored = None
+        if not stored:
+            snap = snapshot.snapshot_species(slug)
+            stored = snap["abilities"] if snap else None
+        if stored:
+            abilities = sorted((a + " (Oculta)" if hidden else a for a, hidden in stored), key=str.casefold)
+            self._pokeapi_abilities_cache[slug] = list(abilities)
+            return abilities
 
         def _pretty(name_slug: str) -> str:
             # 'speed-boost' -> 'Speed Boost'
@@ -1360,10 +1298,10 @@ class EditSetDialog(tk.Toplevel):
         try:
             data = None
             try:
-                data = self._http_get_json(f"https://pokeapi.co/api/v2/pokemon/{slug}")
+                data = self._http_get_json(endpoint("pokemon", slug))
             except Exception:
                 # species -> variety por defecto -> pokemon
-                spec = self._http_get_json(f"https://pokeapi.co/api/v2/pokemon-species/{slug}")
+                spec = self._http_get_json(endpoint("pokemon-species", slug))
                 varieties = spec.get("varieties", []) if isinstance(spec, dict) else []
                 p_name = None
                 for v in varieties:
@@ -1372,16 +1310,18 @@ class EditSetDialog(tk.Toplevel):
                 if not p_name and varieties:
                     p_name = varieties[0].get("pokemon", {}).get("name")
                 if p_name:
-                    data = self._http_get_json(f"https://pokeapi.co/api/v2/pokemon/{p_name}")
+                    data = self._http_get_json(endpoint("pokemon", p_name))
 
             if data and isinstance(data, dict) and "abilities" in data:
                 pool = []
                 seen = set()
+                found = []
                 for a in data["abilities"]:
                     nm = a.get("ability", {}).get("name")
                     if not nm: 
                         continue
                     label = _pretty(nm)
+                    found.append((label, bool(a.get("is_hidden"))))
                     if a.get("is_hidden"):
                         label += " (Oculta)"
                     key = label.lower()
@@ -1389,6 +1329,12 @@ class EditSetDialog(tk.Toplevel):
                         seen.add(key)
                         pool.append(label)
                 abilities = sorted(pool, key=str.casefold)
+                if found:
+                    try:
+                        from ...db import data_store
+                        data_store.set_abilities(species_name, found)
+                    except Exception:
+                        pass
         except Exception:
             abilities = []
 
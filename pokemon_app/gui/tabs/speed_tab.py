@@ -1,7 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from pokemon_app.utils.species_normalize import normalize_species_name
-from pokemon_app.gui.ui.treeview_kit import set_style, apply_zebra, insert_with_zebra, autosize_columns, update_sort_arrows
+from pokemon_app.services.speed_index import (
+    SpeedMods, climate_ability_mult, item_speed_mult, stage_multiplier, unburden_speed_mult,
+)
+from pokemon_app.gui.ui.treeview_kit import set_style, apply_zebra, autosize_columns, update_sort_arrows, VirtualTreeview
 
 
 NATURES = sorted(list({
@@ -17,7 +19,7 @@ class SpeedTab:
     """
     Pestaña de Velocidad: lista sets guardados y calcula Velocidad efectiva
     con modificadores (etapas, tailwind, parálisis, scarf, habilidades).
-    Usa services = {"Session","engine","list_sets","compute_stats"}.
+    Usa services = {"speed_index"} (services/speed_index.get_speed_index) (+ "executor" opcional).
     """
     def __init__(self, master, services: dict):
         self.master = master
@@ -73,8 +75,15 @@ class SpeedTab:
 
         # Tabla
         cols = ("pin","species","item","nature","base_stat","iv","ev","calc","speed_item","speed")
-        self.speed_tree = ttk.Treeview(self.master, columns=cols, show="headings", selectmode="browse", height=16)
-        self.speed_tree.pack(fill="both", expand=True, padx=8, pady=(0,8))
+        table_frame = ttk.Frame(self.master)
+        table_frame.pack(fill="both", expand=True, padx=8, pady=(0,8))
+        self.speed_tree = ttk.Treeview(table_frame, columns=cols, show="headings", selectmode="browse", height=16)
+        speed_sb = ttk.Scrollbar(table_frame, orient="vertical")
+        speed_sb.pack(side="right", fill="y")
+        self.speed_tree.pack(side="left", fill="both", expand=True)
+        # lista virtual: solo se materializan las filas visibles
+        self.speed_view = VirtualTreeview(self.speed_tree, speed_sb)
+        self._speed_items = []
 
         self.speed_tree.column("pin",       width=36,  anchor="center") 
         self.speed_tree.column("species",  width=150, anchor="w")
@@ -102,12 +111,12 @@ class SpeedTab:
         apply_zebra(self.speed_tree)
         autosize_columns(self.speed_tree)
 
-        # Estado para pines + cache de filas fijadas
+        # Estado para pines
         self.pinned_ids   = getattr(self, "pinned_ids", set())
-        self.pinned_cache = getattr(self, "pinned_cache", {})
 
         # Click en la celda: alterna pin si hacen click en la primera columna
         self.speed_tree.bind("<Button-1>", self.on_speed_click)
+        self.speed_tree.bind("<<TreeviewSelect>>", self._on_speed_select)
 
         # Modificadores
         frm_mod = ttk.LabelFrame(self.master, text="Modificadores")
@@ -139,6 +148,11 @@ class SpeedTab:
             .grid(row=0, column=6, padx=4, pady=4)
         self.s_ability.trace_add("write", lambda *_: self._on_speed_filter_changed())
 
+        # tier de la fila seleccionada frente a todos los sets
+        self.s_tier_info = tk.StringVar(value="")
+        ttk.Label(frm_mod, textvariable=self.s_tier_info)\
+            .grid(row=1, column=0, columnspan=7, sticky="w", padx=4, pady=(0, 4))
+
         #ttk.Button(frm_mod, text="Recalcular", command=self.refresh)\
         #    .grid(row=0, column=7, padx=8)
 
@@ -181,17 +195,15 @@ class SpeedTab:
         else:
             self.speed_sort_by = col
             self.speed_sort_dir = "desc" if col == "speed" else "asc"
+        if self._speed_items:
+            # reordenar el modelo ya calculado, sin volver a la BD
+            self._sort_speed_items(self._speed_items, self.speed_sort_by, self.speed_sort_dir)
+            self.speed_view.set_rows(self._speed_row(r) for r in self._speed_items)
+            return
         self.refresh()
 
     def _stage_multiplier(self, stage: int | str) -> float:
-        try:
-            s = int(stage)
-        except Exception:
-            s = 0
-        s = max(-6, min(6, s))
-        if s >= 0:
-            return (2 + s) / 2.0
-        return 2.0 / (2 - s)
+        return stage_multiplier(stage)
 
     def _ability_speed_mult(self, label: str) -> float:
         m = {
@@ -207,192 +219,130 @@ class SpeedTab:
         try: return int(str(v).strip())
         except Exception: return None
 
-    def refresh(self):
-        # Limpiar tabla
-        for iid in self.speed_tree.get_children():
-            self.speed_tree.delete(iid)
+    def _sort_speed_items(self, items: list, key: str, direction: str):
+        items.sort(key=lambda r: (r[key] if r[key] is not None else -999999), reverse=(direction == "desc"))
+
+    def _speed_row(self, r: dict) -> tuple:
+        """(key, values, tags) para VirtualTreeview."""
+        return (r["id"], (r["pin"], r["species"], r["item"], r["nature"],
+                          r["base_stat"], r["iv"], r["ev"], r["calc"],
+                          r.get("speed_item"), r["speed"]), ())
 
-        # Servicios inyectados
-        Session = self.services["Session"]
-        engine  = self.services["engine"]
-        list_sets = self.services["list_sets"]
-        compute_stats = self.services["compute_stats"]
+    def refresh(self):
+        # (la tabla se reemplaza al llegar el resultado, conservando el scroll)
 
         # Filtros
         species_like = (self.s_filter.get().strip() or "")
         if species_like and "%" not in species_like:
             species_like = f"%{species_like}%"
-        nature = self.s_nat.get().strip() or None
-
-        with Session(engine) as s:
-            rows = list_sets(s, only_species=species_like or None, nature=nature)
-
-        items = []
-        for pset, sp in rows:
-            import json as _json
-
-            # Carga segura EVs/IVs
-            def _load_json(s):
-                try:
-                    return _json.loads(s) if s else {}
-                except Exception:
-                    return {}
-            evs = _load_json(getattr(pset, "evs_json", None))
-            ivs = _load_json(getattr(pset, "ivs_json", None))
-
-            base_stats = {
-                "HP": sp.base_hp, "Atk": sp.base_atk, "Def": sp.base_def,
-                "SpA": sp.base_spa, "SpD": sp.base_spd, "Spe": sp.base_spe
-            }
-
-            # Nivel seguro (fallback 50)
-            try:
-                level = int(pset.level) if pset.level is not None else 50
-            except Exception:
-                level = 50
 
-            # Cálculo de stats protegido
-            try:
-                tmp = type("Tmp", (), {"evs": evs, "level": level, "nature": pset.nature})
-                stats = compute_stats(tmp, base_stats=base_stats, ivs=ivs)
-            except Exception as e:
-                messagebox.showerror("Cálculo de velocidad", str(e))
-                continue
-
-            # Identificador estable de la fila
-            rec_id = str(getattr(pset, "id", f"{sp.name}-{pset.level}-{pset.nature}-{pset.item}"))
-
-            # Icono del pin por fila
-            pin_icon = "📌" if rec_id in self.pinned_ids else "○"
-
-            base_stat_spe = int(sp.base_spe)
-            calc_spe = int(stats["Spe"])
-
-            # Modificadores
-            stage_mult    = self._stage_multiplier(self.s_stage.get())
-            tailwind_mult = 2.0 if self.s_tailwind.get() else 1.0
-            para_mult     = 0.5 if self.s_para.get() else 1.0
-
-            item_mult    = self._item_speed_mult(pset.item, sp.name)
-            selected_abl = self.s_ability.get()
-            row_ability  = getattr(pset, "ability", None)
-
-            # Clima SOLO si la fila tiene la habilidad climática correspondiente
-            climate_mult   = self._climate_ability_mult(selected_abl, row_ability)
-
-            # Unburden SOLO si la fila realmente tiene Unburden/Liviano
-            unburden_mult  = self._unburden_speed_mult(selected_abl, row_ability)
-
-            # (opcional) otras habilidades globales → 1.0 por defecto
-            # ability_mult_global = 1.0
-
-            # Velocidad con ítem (para tu columna 'Vel (Item)')
-            speed_item = int(calc_spe * item_mult * climate_mult)
-
-            # Velocidad final por fila (sin aplicar Unburden globalmente)
-            eff_speed = int(
-                calc_spe * stage_mult * tailwind_mult * para_mult
-                * item_mult * climate_mult * unburden_mult
-            )
-
-            items.append({
-                "id": rec_id,
-                "pin": pin_icon,
-                "species": normalize_species_name(sp.name, getattr(pset, "ability", None), getattr(pset, "gender", None)),
-                "item": (pset.item or "—"),
-                "nature": pset.nature or "—",
-                "base_stat": base_stat_spe,
-                "iv": int(ivs.get("Spe", 31)),
-                "ev": int(evs.get("Spe", 0)),
-                "calc": calc_spe,
-                "speed_item": speed_item,
-                "speed": eff_speed,
-            })
-
-            # Actualiza cache si está fijado (para sobrevivir a filtros SQL)
-            if rec_id in self.pinned_ids:
-                self.pinned_cache[rec_id] = items[-1]
-
-        # Filtro min/max (Python)
-        vmin = self._safe_int(self.s_speed_min.get())
-        vmax = self._safe_int(self.s_speed_max.get())
-        if vmin is not None:
-            items = [r for r in items if r["speed"] >= vmin]
-        if vmax is not None:
-            items = [r for r in items if r["speed"] <= vmax]
-
-        # Unir fijados que fueron filtrados por SQL
+        # Todo lo que lee del UI se congela aquí; el cálculo no toca variables Tk
+        params = {
+            "species_like": species_like or None,
+            "nature": self.s_nat.get().strip() or None,
+            "mods": SpeedMods(
+                stage=max(-6, min(6, self._safe_int(self.s_stage.get()) or 0)),
+                tailwind=bool(self.s_tailwind.get()),
+                paralysis=bool(self.s_para.get()),
+                ability=self.s_ability.get(),
+            ),
+            "vmin": self._safe_int(self.s_speed_min.get()),
+            "vmax": self._safe_int(self.s_speed_max.get()),
+            "pinned": set(self.pinned_ids),
+            "sort_by": self.speed_sort_by,
+            "sort_dir": self.speed_sort_dir,
+        }
+        executor = self.services.get("executor")
+        if executor is None:
+            self._apply_speed_result(self._speed_job(params), params)
+            return
+        executor.submit(
+            "speed",
+            lambda token: self._speed_job(params, token),
+            on_done=lambda res: self._apply_speed_result(res, params),
+            on_error=lambda e: messagebox.showerror("Cálculo de velocidad", str(e)),
+        )
+
+    def _speed_job(self, params: dict, token=None) -> dict:
+        """Filas del índice de tiers (services/speed_index.py) para los filtros. No toca Tk."""
+        idx = self.services["speed_index"]()      # se reconstruye solo si cambiaron los sets
+        mods = params["mods"]
+        if token is not None:
+            token.check()
+
+        # Vel. min/max: bisect sobre la tabla ordenada de esta combinación de modificadores
+        rows = idx.rows_between(params["vmin"], params["vmax"], mods,
+                                species_like=params["species_like"], nature=params["nature"])
+        items = [self._speed_item(idx, row, speed, mods, params["pinned"]) for row, speed in rows]
+
+        # fijados que los filtros dejan fuera (con la velocidad de los modificadores actuales)
         present = {r["id"] for r in items}
-        for pid in list(self.pinned_ids):
-            if pid not in present and pid in self.pinned_cache:
-                items.append(self.pinned_cache[pid])
-
-        # Orden
-        key = self.speed_sort_by
-        reverse = (self.speed_sort_dir == "desc")
-        items.sort(key=lambda r: (r[key] if r[key] is not None else -999999), reverse=reverse)
-
-        for r in items:
-            insert_with_zebra(self.speed_tree, values=(r["pin"], r["species"], r["item"], r["nature"], 
-                        r["base_stat"], r["iv"], r["ev"], r["calc"], 
-                        r.get("speed_item"), r["speed"]
-                        ))
-
-        # Pintar  ← (ajuste #1: usar iid estable)
-        #for r in items:
-        #    self.speed_tree.insert("", "end", iid=r["id"], values=(r["pin"], r["species"], r["item"], r["nature"], r["base_stat"], r["iv"], r["ev"], r["calc"], r.get("speed_item"), r["speed"]))
-
-
+        pinned = []
+        for pid in params["pinned"]:
+            row = idx.row(int(pid)) if pid.isdigit() and pid not in present else None
+            if row is not None:
+                pinned.append(self._speed_item(idx, row, idx.final_speed(row, mods), mods, params["pinned"]))
+        return {"items": items, "pinned": pinned, "errors": [], "index": idx}
+
+    def _speed_item(self, idx, row, speed: int, mods, pinned_ids: set) -> dict:
+        rec_id = str(row.id)
+        return {
+            "id": rec_id,
+            "pin": "📌" if rec_id in pinned_ids else "○",
+            "species": row.display,
+            "item": row.item or "—",
+            "nature": row.nature or "—",
+            "base_stat": row.base,
+            "iv": row.iv,
+            "ev": row.ev,
+            "calc": row.calc,
+            "speed_item": idx.item_speed(row, mods),    # solo ítem y clima
+            "speed": speed,                             # todos los modificadores
+        }
 
+    def _apply_speed_result(self, res: dict, params: dict):
+        """Une fijados, filtra, ordena y pinta (hilo de Tk)."""
+        if res["errors"]:
+            messagebox.showerror("Cálculo de velocidad", res["errors"][0])
+        # filtradas + fijados que los filtros dejan fuera
+        items = res["items"] + res["pinned"]
+        self._speed_index = res["index"]
+        self._speed_mods = params["mods"]
+
+        # Orden + pintar (solo filas visibles)
+        self._sort_speed_items(items, params["sort_by"], params["sort_dir"])
+        self._speed_items = items
+        self.speed_view.set_rows((self._speed_row(r) for r in items), keep_offset=True)
+        self._update_tier_info()
+
+    def _on_speed_select(self, _event=None):
+        self._update_tier_info()
+
+    def _update_tier_info(self):
+        """'Vel X: supera a N sets, empata con M...' para la fila seleccionada (bisect en el índice)."""
+        idx = getattr(self, "_speed_index", None)
+        sel = self.speed_tree.selection()
+        rec_id = self.speed_view.key_of(sel[0]) if sel else None
+        item = next((r for r in self._speed_items if r["id"] == rec_id), None) if rec_id else None
+        if idx is None or item is None:
+            self.s_tier_info.set(f"{len(idx)} sets en el índice" if idx is not None else "")
+            return
+        info = idx.summary(item["speed"], self._speed_mods)
+        self.s_tier_info.set(
+            f"{item['species']} (Vel {item['speed']}): supera a {info['slower']}, "
+            f"empata con {max(info['ties'] - 1, 0)}, más lentos que {info['faster']} "
+            f"de {len(idx)} sets"
+        )
 
     def _item_speed_mult(self, item_name: str, species_name: str) -> float:
-        name = (item_name or "").strip().lower()
-        if not name:
-            return 1.0
-        if name in {"choice scarf", "choicescarf"}:
-            return 1.5
-        half_items = {
-            "iron ball","ironball","macho brace","machobrace",
-            "power anklet","poweranklet","power band","powerband",
-            "power belt","powerbelt","power bracer","powerbracer",
-            "power lens","powerlens","power weight","powerweight"
-        }
-        if name in half_items:
-            return 0.5
-        if name in {"quick powder","quickpowder"} and (species_name or "").strip().lower() == "ditto":
-            return 2.0
-        return 1.0
+        return item_speed_mult(item_name, species_name)
 
     def _climate_ability_mult(self, selected_label: str, ability_name: str | None) -> float:
-        """
-        Aplica 2.0x SOLO si:
-        - El selector de habilidad climática está activo (ej. "Swift Swim (Lluvia)"), y
-        - La habilidad del Pokémon de la fila coincide (ej. "Swift Swim").
-        """
-        sel = (selected_label or "").strip()
-        ab  = (ability_name or "").strip().lower()
-        mapping = {
-            "Swift Swim (Lluvia)": "swift swim",
-            "Chlorophyll (Sol)": "chlorophyll",
-            "Sand Rush (Tormenta Arena)": "sand rush",
-            "Slush Rush (Nieve)": "slush rush",
-        }
-        target = mapping.get(sel)
-        if target and ab == target:
-            return 2.0
-        return 1.0
+        return climate_ability_mult(selected_label, ability_name)
 
     def _unburden_speed_mult(self, selected_label: str, row_ability: str | None) -> float:
-        """
-        Aplica x2 SOLO si el selector global está en 'Unburden (Objeto consumido)'
-        y la fila tiene efectivamente la habilidad Unburden/Liviano.
-        """
-        sel = (selected_label or "").strip().lower()
-        abl = (row_ability or "").strip().lower()
-        if sel.startswith("unburden"):
-            return 2.0 if abl in {"unburden", "liviano"} else 1.0
-        return 1.0
-    
+        return unburden_speed_mult(selected_label, row_ability)
+
     def on_speed_click(self, event):
         tree = self.speed_tree
         region = tree.identify("region", event.x, event.y)
@@ -405,7 +355,9 @@ class SpeedTab:
         if not row:
             return
 
-        rec_id = row  # usamos iid = id del set
+        rec_id = self.speed_view.key_of(row)  # id del set de la fila del modelo
+        if rec_id is None:
+            return
         if rec_id in self.pinned_ids:
             self.pinned_ids.remove(rec_id)
         else:
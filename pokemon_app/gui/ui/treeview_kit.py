@@ -80,14 +80,53 @@ def insert_with_zebra(tree: ttk.Treeview, values, **kwargs):
     return tree.insert("", "end", values=values, tags=tuple(base_tags), **kwargs)
 
 # ---------- Autosize ----------
-def autosize_columns(tree: ttk.Treeview, pad=24, min_w=60, max_w=360):
+_MEASURE_CACHE: dict = {}
+_MEASURE_CACHE_MAX = 50_000
+
+def _measure(f: tkfont.Font, text: str) -> int:
+    """font.measure memoizado por (fuente, texto): evita un round-trip a Tcl por celda."""
+    key = (str(f), text)
+    w = _MEASURE_CACHE.get(key)
+    if w is None:
+        if len(_MEASURE_CACHE) >= _MEASURE_CACHE_MAX:
+            _MEASURE_CACHE.clear()
+        w = _MEASURE_CACHE[key] = f.measure(text)
+    return w
+
+def autosize_columns(tree: ttk.Treeview, pad=24, min_w=60, max_w=360, rows=None, top_n=50, longest_n=20):
+    """
+    Ajusta el ancho de cada columna midiendo una muestra acotada:
+    cabecera + primeras `top_n` filas + las `longest_n` cadenas más largas (por len).
+    rows: iterable de tuplas de valores (modelo Python, p. ej. VirtualTreeview.iter_values()).
+          Si no se pasa, se leen los valores del widget (una llamada por fila, no por celda).
+    """
+    import heapq
     f = tkfont.nametofont("TkDefaultFont")
-    for col in tree["columns"]:
+    cols = list(tree["columns"])
+    if rows is None:
+        rows = (tree.item(iid, "values") for iid in tree.get_children(""))
+
+    top = [set() for _ in cols]
+    longest = [[] for _ in cols]       # min-heaps de (len, texto)
+    for n, values in enumerate(rows):
+        for i in range(min(len(cols), len(values))):
+            txt = str(values[i])
+            if n < top_n:
+                top[i].add(txt)
+            h = longest[i]
+            item = (len(txt), txt)
+            if len(h) < longest_n:
+                heapq.heappush(h, item)
+            elif item > h[0]:
+                heapq.heapreplace(h, item)
+
+    for i, col in enumerate(cols):
         header = tree.heading(col, "text") or ""
-        width = f.measure(header) + pad
-        for iid in tree.get_children(""):
-            val = str(tree.set(iid, col))
-            width = max(width, f.measure(val) + pad)
+        width = _measure(f, header) + pad
+        for txt in top[i].union(t for _l, t in longest[i]):
+            width = max(width, _measure(f, txt) + pad)
+            if width >= max_w:
+                break
         tree.column(col, width=max(min_w, min(width, max_w)))
 
 # ---------- Flechas de orden ----------
@@ -128,3 +167,188 @@ def apply_damage_tags(tree: ttk.Treeview):
     tree.tag_configure("ko_4hko", background="#fdeaea")
     # Ej. 'pinned' si reusas el concepto:
     # tree.tag_configure("pinned", font=(tkfont.nametofont("TkDefaultFont").actual("family"), 10, "bold"))
+
+# ---------- Lista virtual ----------
+class VirtualTreeview:
+    """
+    Envuelve un Treeview para mostrar listas grandes: el modelo (lista de filas)
+    vive en Python y el widget solo tiene un pool fijo de items (filas visibles
+    + un pequeño buffer) que se reutilizan al hacer scroll.
+
+    Cada fila del modelo es (key, values, tags). Ordenar reordena el modelo,
+    nunca el widget. La cebra se calcula por posición en el modelo.
+    """
+
+    def __init__(self, tree: ttk.Treeview, scrollbar: ttk.Scrollbar | None = None, buffer: int = 8):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.buffer = buffer
+        self.rows: list[tuple] = []
+        self.offset = 0
+        self._pool: list[str] = []
+        self._visible = max(1, int(tree.cget("height") or 10))
+        self._selected: set = set()       # keys seleccionadas (sobreviven al scroll y al orden)
+        self._rendering = False
+
+        if scrollbar is not None:
+            scrollbar.configure(command=self._on_scrollbar)
+        tree.bind("<Configure>", self._on_configure, add="+")
+        tree.bind("<MouseWheel>", self._on_wheel, add="+")
+        tree.bind("<Button-4>", lambda e: self._scroll_units(-3), add="+")
+        tree.bind("<Button-5>", lambda e: self._scroll_units(3), add="+")
+        tree.bind("<Up>", lambda e: self._move_selection(-1), add="+")
+        tree.bind("<Down>", lambda e: self._move_selection(1), add="+")
+        tree.bind("<Prior>", lambda e: self._scroll_units(-self._visible), add="+")
+        tree.bind("<Next>", lambda e: self._scroll_units(self._visible), add="+")
+        tree.bind("<<TreeviewSelect>>", self._on_select, add="+")
+
+    # ---------- modelo ----------
+    def set_rows(self, rows, keep_offset: bool = False):
+        """rows: iterable de (key, values, tags). Reemplaza el modelo y repinta."""
+        self.rows = list(rows)
+        self.offset = min(self.offset, self._max_offset()) if keep_offset else 0
+        keys = {r[0] for r in self.rows}
+        self._selected &= keys
+        self.render()
+
+    def clear(self):
+        self.set_rows([])
+
+    def sort(self, key, reverse: bool = False):
+        """Ordena el modelo; key recibe la tupla (key, values, tags)."""
+        self.rows.sort(key=key, reverse=reverse)
+        self.render()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def key_of(self, iid: str):
+        """Key de la fila del modelo que ocupa el item iid del pool (o None)."""
+        try:
+            i = self.offset + self._pool.index(iid)
+        except ValueError:
+            return None
+        return self.rows[i][0] if i < len(self.rows) else None
+
+    def selected_keys(self) -> list:
+        return [r[0] for r in self.rows if r[0] in self._selected]
+
+    def see(self, key):
+        for i, r in enumerate(self.rows):
+            if r[0] == key:
+                if not (self.offset <= i < self.offset + self._visible):
+                    self.scroll_to(i - self._visible // 2)
+                return
+
+    # ---------- scroll ----------
+    def _max_offset(self) -> int:
+        return max(0, len(self.rows) - self._visible)
+
+    def scroll_to(self, offset: int):
+        offset = max(0, min(int(offset), self._max_offset()))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def _scroll_units(self, n: int):
+        self.scroll_to(self.offset + n)
+        return "break"
+
+    def _on_wheel(self, e):
+        step = -1 if e.delta > 0 else 1
+        if abs(e.delta) >= 120:
+            step *= max(1, abs(e.delta) // 120) * 3
+        return self._scroll_units(step)
+
+    def _on_scrollbar(self, *args):
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * len(self.rows)))
+        elif args[0] == "scroll":
+            n = int(args[1])
+            self._scroll_units(n * self._visible if args[2] == "pages" else n)
+
+    def _on_configure(self, e=None):
+        try:
+            style = ttk.Style(self.tree)
+            rowh = int(style.lookup(self.tree.cget("style") or "Treeview", "rowheight") or 20)
+        except Exception:
+            rowh = 20
+        h = self.tree.winfo_height()
+        if h <= 1:
+            return
+        visible = max(1, (h - (rowh + 6)) // rowh)
+        if visible != self._visible:
+            self._visible = visible
+            self.offset = min(self.offset, self._max_offset())
+            self.render()
+
+    def _move_selection(self, delta: int):
+        if not self.rows:
+            return "break"
+        idx = [i for i, r in enumerate(self.rows) if r[0] in self._selected]
+        i = (idx[-1] if delta > 0 else idx[0]) + delta if idx else 0
+        i = max(0, min(i, len(self.rows) - 1))
+        self._selected = {self.rows[i][0]}
+        if i < self.offset:
+            self.offset = i
+        elif i >= self.offset + self._visible:
+            self.offset = i - self._visible + 1
+        self.render()
+        return "break"
+
+    def _on_select(self, e=None):
+        if self._rendering:
+            return
+        # sustituye la selección de las filas visibles; conserva la de filas fuera de vista
+        vis = {self.rows[self.offset + i][0] for i in range(min(self._visible, len(self.rows) - self.offset))}
+        self._selected -= vis
+        for iid in self.tree.selection():
+            k = self.key_of(iid)
+            if k is not None:
+                self._selected.add(k)
+
+    # ---------- pintado ----------
+    def _ensure_pool(self, n: int):
+        # si alguien borró items del widget por fuera, se recrean
+        self._pool = [iid for iid in self._pool if self.tree.exists(iid)]
+        while len(self._pool) < n:
+            self._pool.append(self.tree.insert("", "end", values=()))
+
+    def render(self):
+        """Vuelca al pool las filas [offset, offset + visibles)."""
+        tree = self.tree
+        self._rendering = True
+        try:
+            self._ensure_pool(self._visible + self.buffer)
+            sel = []
+            for slot, iid in enumerate(self._pool):
+                i = self.offset + slot
+                if slot < self._visible and i < len(self.rows):
+                    key, values, tags = self.rows[i]
+                    tags = tuple(tags or ()) + ("even" if i % 2 == 0 else "odd",)
+                    tree.item(iid, values=values, tags=tags)
+                    tree.move(iid, "", slot)
+                    if key in self._selected:
+                        sel.append(iid)
+                else:
+                    tree.detach(iid)
+            tree.selection_set(sel)
+        finally:
+            self._rendering = False
+        if self.scrollbar is not None:
+            n = len(self.rows)
+            if n <= self._visible or n == 0:
+                self.scrollbar.set(0.0, 1.0)
+            else:
+                self.scrollbar.set(self.offset / n, (self.offset + self._visible) / n)
+
+    def iter_values(self):
+        """Valores de todas las filas del modelo (p. ej. para autosize)."""
+        for _key, values, _tags in self.rows:
+            yield values
+
+    def autosize(self, **kwargs):
+        """autosize_columns sobre el modelo completo (no solo las filas materializadas)."""
+        autosize_columns(self.tree, rows=self.iter_values(), **kwargs)
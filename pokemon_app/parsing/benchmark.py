@@ -0,0 +1,126 @@
+# pokemon_app/parsing/benchmark.py
+"""
+Rendimiento del parser Showdown en sets/segundo: parse_showdown_text (un set
+por llamada, prueba todas las regex de RE_KV en cada línea) frente al parser
+incremental iter_showdown_sets (despacho por primer token, lectura en stream).
+También comprueba que ambos devuelven lo mismo.
+
+    python -m pokemon_app.parsing.benchmark                  # 20 000 sets sintéticos
+    python -m pokemon_app.parsing.benchmark --sets 100000
+    python -m pokemon_app.parsing.benchmark --file volcado.txt
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import time
+from typing import Optional
+
+from .showdown_parser import iter_showdown_blocks, iter_showdown_sets, parse_showdown_text
+
+SAMPLE_SETS = [
+    """Incineroar (M) @ Safety Goggles
+Ability: Intimidate
+Level: 50
+Tera Type: Ghost
+EVs: 252 HP / 4 Atk / 76 Def / 108 SpD / 68 Spe
+Careful Nature
+- Fake Out
+- Knock Off
+- Parting Shot
+- Flare Blitz""",
+    """Flutter Mane @ Booster Energy
+Ability: Protosynthesis
+Level: 50
+Shiny: Yes
+Tera Type: Fairy
+EVs: 4 HP / 252 SpA / 252 Spe
+Timid Nature
+IVs: 0 Atk
+- Moonblast
+- Shadow Ball
+- Protect
+- Icy Wind""",
+    """Urshifu-Rapid-Strike @ Focus Sash
+Ability: Unseen Fist
+Tera Type: Water
+EVs: 4 HP / 252 Atk / 252 Spe
+Jolly Nature
+- Surging Strikes
+- Close Combat
+- Aqua Jet
+- Detect""",
+    """Amoonguss (F) @ Rocky Helmet
+Ability: Regenerator
+Level: 50
+Happiness: 0
+Tera Type: Water
+EVs: 236 HP / 156 Def / 116 SpD
+Relaxed Nature
+IVs: 0 Atk / 0 Spe
+- Spore
+- Rage Powder
+- Pollen Puff
+- Protect""",
+]
+
+
+def synthetic_dump(n: int) -> str:
+    blocks = [SAMPLE_SETS[i % len(SAMPLE_SETS)] for i in range(n)]
+    return "=== [gen9vgc2024] Volcado ===\n\n" + "\n\n".join(blocks) + "\n"
+
+
+def bench_current(text: str) -> tuple[int, float, list]:
+    """Como hasta ahora: el texto entero en memoria, partido en sets y parse_showdown_text por set."""
+    t = time.perf_counter()
+    out = [parse_showdown_text("\n".join(lines)) for _start, lines in iter_showdown_blocks(text.splitlines())]
+    return len(out), time.perf_counter() - t, out
+
+
+def bench_streaming(text: str) -> tuple[int, float, list]:
+    t = time.perf_counter()
+    out = list(iter_showdown_sets(io.StringIO(text)))
+    return len(out), time.perf_counter() - t, out
+
+
+def run(text: str, repeat: int = 3) -> dict:
+    """Mejor de `repeat` pasadas de cada parser. {'current': sets/s, 'streaming': sets/s, 'sets': n, 'same': bool}"""
+    best = {"current": float("inf"), "streaming": float("inf")}
+    n, same = 0, True
+    for _ in range(max(1, repeat)):
+        n, dt_cur, a = bench_current(text)
+        _n, dt_str, b = bench_streaming(text)
+        same = same and a == b
+        best["current"] = min(best["current"], dt_cur)
+        best["streaming"] = min(best["streaming"], dt_str)
+    return {
+        "sets": n,
+        "current": n / best["current"] if best["current"] else 0.0,
+        "streaming": n / best["streaming"] if best["streaming"] else 0.0,
+        "same": same,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark del parser Showdown (sets/segundo).")
+    ap.add_argument("--sets", type=int, default=20000, help="sets sintéticos a generar")
+    ap.add_argument("--file", default=None, help="usar un volcado real en vez de sets sintéticos")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    if args.file:
+        with open(args.file, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+    else:
+        text = synthetic_dump(args.sets)
+
+    res = run(text, args.repeat)
+    print(f"sets: {res['sets']}")
+    print(f"parse_showdown_text: {res['current']:>10,.0f} sets/s")
+    print(f"iter_showdown_sets:  {res['streaming']:>10,.0f} sets/s  (x{res['streaming'] / max(res['current'], 1e-9):.2f})")
+    print(f"misma salida: {'sí' if res['same'] else 'NO'}")
+    return 0 if res["same"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
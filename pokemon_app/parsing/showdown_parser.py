@@ -1,5 +1,6 @@
+import os
 import re
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from ..models.pokemon import PokemonData, STAT_KEYS
 
 # Mapas de etiquetas
@@ -111,3 +112,129 @@ def parse_showdown_text(data_str: str) -> PokemonData:
         name=name, gender=gender, item=item, ability=ability, level=level,
         tera_type=tera_type, evs=evs, ivs=ivs, nature=nature, moves=moves
     )
+
+
+# ---------- Parser incremental (archivos grandes) ----------
+# Misma salida que parse_showdown_text, pero:
+#   - lee línea a línea de cualquier stream/archivo y entrega un PokemonData por
+#     set (memoria acotada: solo el bloque en curso);
+#   - despacha cada línea por su primer carácter/token en vez de probar todas
+#     las regex de RE_KV.
+_MOVE_BULLETS = frozenset("-–—•·")
+_KV_KEYS = {"ability": "ability", "item": "item", "level": "level", "evs": "evs", "ivs": "ivs"}
+_HEADER = re.compile(r"^(?P<name>[^@\(]+?)(?:\s*\((?P<gender>[MF])\))?(?:\s*@\s*(?P<item>.+))?$")
+
+def _kv_key(label: str) -> Optional[str]:
+    k = label.rstrip().lower()
+    key = _KV_KEYS.get(k)
+    if key is None and k.startswith("tera") and k[4:].lstrip(" \t-").lower() == "type":
+        key = "tera"
+    return key
+
+def parse_set_lines(lines: List[str]) -> PokemonData:
+    """Un set ya separado en líneas (sin las vacías). Equivale a parse_showdown_text."""
+    if not lines:
+        raise ValueError("Entrada vacía.")
+    m1 = _HEADER.match(lines[0])
+    if not m1:
+        raise ValueError(f"No se pudo interpretar la primera línea: '{lines[0]}'")
+
+    item = (m1.group("item") or "").strip() or None
+    ability: Optional[str] = None
+    level: int = 50
+    tera_type: Optional[str] = None
+    evs = None
+    ivs = None
+    nature: Optional[str] = None
+    moves: List[str] = []
+
+    for raw in lines[1:]:
+        s = raw.strip()
+        if not s:
+            continue
+        # "- Movimiento" (o bullet)
+        if s[0] in _MOVE_BULLETS:
+            move = s[1:].strip()
+            if move:
+                moves.append(move)
+            continue
+        # "Clave: valor"
+        colon = s.find(":")
+        if colon > 0:
+            key = _kv_key(s[:colon])
+            val = s[colon + 1:].strip()
+            if key and val:
+                if key == "ability":
+                    ability = val
+                elif key == "item":
+                    item = val
+                elif key == "level":
+                    if val.isdigit():
+                        level = int(val)
+                elif key == "tera":
+                    tera_type = val
+                elif key == "evs":
+                    evs = _parse_evs(val)
+                else:
+                    ivs = _parse_ivs(val)
+                continue
+        # "Adamant Nature"
+        parts = s.split()
+        if len(parts) == 2 and parts[1].lower() == "nature" and parts[0].isascii() and parts[0].isalpha():
+            nature = parts[0].capitalize()
+        # otras líneas (Shiny, Happiness, etc.) se ignoran
+
+    return PokemonData(
+        name=m1.group("name").strip(), gender=m1.group("gender"), item=item, ability=ability,
+        level=level, tera_type=tera_type,
+        evs=evs if evs is not None else {k: 0 for k in STAT_KEYS},
+        ivs=ivs if ivs is not None else {k: 31 for k in STAT_KEYS},
+        nature=nature, moves=moves,
+    )
+
+def _open_lines(source) -> Iterator[str]:
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r", encoding="utf-8", errors="replace") as f:
+            yield from f
+    else:
+        yield from source
+
+def iter_showdown_blocks(source: Union[str, os.PathLike, Iterable[str]]) -> Iterator[Tuple[int, List[str]]]:
+    """
+    (nº de línea inicial, líneas del set) por cada set de `source`: una ruta o
+    cualquier iterable de líneas (archivo abierto, sys.stdin, str.splitlines()).
+    Los sets se separan por líneas en blanco; las cabeceras "=== ... ===" se saltan.
+    """
+    block: List[str] = []
+    start = 0
+    for n, line in enumerate(_open_lines(source), 1):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("==="):
+            if block:
+                yield start, block
+                block = []
+            continue
+        if not block:
+            start = n
+        block.append(line.rstrip())
+    if block:
+        yield start, block
+
+def iter_showdown_sets(
+    source: Union[str, os.PathLike, Iterable[str]],
+    on_error: Optional[Callable[[int, List[str], Exception], None]] = None,
+) -> Iterator[PokemonData]:
+    """
+    PokemonData de cada set de `source`, de uno en uno. Si un set no se puede
+    interpretar se llama on_error(línea, líneas, excepción) y se sigue; sin
+    on_error la excepción se propaga.
+    """
+    for start, lines in iter_showdown_blocks(source):
+        try:
+            pd = parse_set_lines(lines)
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(start, lines, e)
+            continue
+        yield pd
@@ -52,6 +52,17 @@ def defender_stat_weather_boost(def_types_uc: list[str], category: str, weather:
         return 1.5
     return 1.0
 
+# ---------- Dobles ----------
+SPREAD_MOVES = frozenset({
+    "rock slide","earthquake","bulldoze","heat wave","dazzling gleam","blizzard",
+    "muddy water","discharge","snarl","hyper voice","surf","icy wind",
+    "eruption","lava plume","sludge wave","parabolic charge","petal blizzard",
+})
+
+def is_spread_move(move_name: str) -> bool:
+    """Movimientos que golpean a varios objetivos (x0.75 en Dobles)."""
+    return (move_name or "").strip().lower() in SPREAD_MOVES
+
 # ---------- STAB / Tera ----------
 def tera_stab_multiplier(move_type: str, attacker_types: list[str], tera_on: bool, tera_type: str) -> float:
     mt = (move_type or "").capitalize()
@@ -95,7 +106,8 @@ def attacker_item_multiplier_auto(item_label: str, category: str, eff_mult: floa
             return 1.2
     return 1.0
 
-_RESIST_BERRY_BY_TYPE = {
+# tipo del ataque -> baya que lo reduce a la mitad si es supereficaz
+RESIST_BERRY_BY_TYPE = {
     "Fire":"Occa Berry","Water":"Passho Berry","Electric":"Wacan Berry","Grass":"Rindo Berry",
     "Ice":"Yache Berry","Fighting":"Chople Berry","Poison":"Kebia Berry","Ground":"Shuca Berry",
     "Flying":"Coba Berry","Psychic":"Payapa Berry","Bug":"Tanga Berry","Rock":"Charti Berry",
@@ -108,7 +120,7 @@ def defender_item_effects_auto(item_label: str, category: str, move_type: str, e
     if not s: return def_mult, eff_adj
     if "assault vest" in s and category == "special":
         def_mult *= 1.5
-    wanted = _RESIST_BERRY_BY_TYPE.get((move_type or "").capitalize())
+    wanted = RESIST_BERRY_BY_TYPE.get((move_type or "").capitalize())
     if wanted and wanted.lower() in s and eff_mult > 1.0:
         eff_adj *= 0.5
     return def_mult, eff_adj
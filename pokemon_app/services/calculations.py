@@ -1,9 +1,18 @@
+import json
+from functools import lru_cache
 from math import floor
-from typing import Dict, Optional
+from types import SimpleNamespace
+from typing import Dict, Iterable, Optional, Sequence
 from ..models.pokemon import PokemonData
-from ..utils.nature import nature_multipliers
+from ..utils.nature import NATURE_NAMES, nature_index, nature_multipliers
 
 DEFAULT_IV = 31
+STAT_KEYS = ("HP", "Atk", "Def", "SpA", "SpD", "Spe")
+_DEFAULT_IVS = {k: DEFAULT_IV for k in STAT_KEYS}
+
+# multiplicadores por naturaleza precalculados (solo lectura; los mismos floats que nature_multipliers)
+_NATURE_MULTS = {name: nature_multipliers(name) for name in NATURE_NAMES}
+_NEUTRAL_MULTS = nature_multipliers(None)
 
 def _calc_hp(base: int, iv: int, ev: int, level: int) -> int:
     return floor(((2 * base + iv + floor(ev / 4)) * level) / 100) + level + 10
@@ -16,8 +25,8 @@ def compute_stats(
     base_stats: Dict[str, int],
     ivs: Optional[Dict[str, int]] = None,
 ) -> Dict[str, int]:
-    ivs = ivs or {k: DEFAULT_IV for k in ["HP","Atk","Def","SpA","SpD","Spe"]}
-    mults = nature_multipliers(pokemon.nature)
+    ivs = ivs or _DEFAULT_IVS
+    mults = _NATURE_MULTS.get(pokemon.nature, _NEUTRAL_MULTS) if pokemon.nature else _NEUTRAL_MULTS
     stats: Dict[str, int] = {}
     stats["HP"] = _calc_hp(base_stats["HP"], ivs["HP"], pokemon.evs.get("HP", 0), pokemon.level)
     stats["Atk"] = _calc_other(base_stats["Atk"], ivs["Atk"], pokemon.evs.get("Atk", 0), pokemon.level, mults["Atk"])
@@ -26,3 +35,86 @@ def compute_stats(
     stats["SpD"] = _calc_other(base_stats["SpD"], ivs["SpD"], pokemon.evs.get("SpD", 0), pokemon.level, mults["SpD"])
     stats["Spe"] = _calc_other(base_stats["Spe"], ivs["Spe"], pokemon.evs.get("Spe", 0), pokemon.level, mults["Spe"])
     return stats
+
+def calc_stat(key: str, base: int, iv: int, ev: int, level: int, nature: Optional[str] = None) -> int:
+    """Una sola stat (misma fórmula que compute_stats)."""
+    if key == "HP":
+        return _calc_hp(base, iv, ev, level)
+    mults = _NATURE_MULTS.get(nature, _NEUTRAL_MULTS) if nature else _NEUTRAL_MULTS
+    return _calc_other(base, iv, ev, level, mults[key])
+
+@lru_cache(maxsize=1)
+def nature_table():
+    """Array (25, 5) float64: fila = utils.nature.nature_index, columnas Atk..Spe."""
+    import numpy as np
+    return np.array([[_NATURE_MULTS[name][k] for k in STAT_KEYS[1:]] for name in NATURE_NAMES],
+                    dtype=np.float64)
+
+def compute_stats_batch(base, evs, ivs, levels, natures):
+    """
+    compute_stats para N sets en una pasada de NumPy. base/evs/ivs: (N, 6)
+    enteros en orden STAT_KEYS; levels: (N,); natures: (N,) índices de
+    nature_index. Devuelve (N, 6) int64, idéntico fila a fila a compute_stats
+    (mismas divisiones enteras y el mismo producto float64 por la naturaleza).
+    """
+    import numpy as np
+    base = np.asarray(base, dtype=np.int64).reshape(-1, 6)
+    evs = np.asarray(evs, dtype=np.int64).reshape(-1, 6)
+    ivs = np.asarray(ivs, dtype=np.int64).reshape(-1, 6)
+    levels = np.asarray(levels, dtype=np.int64).reshape(-1, 1)
+    natures = np.asarray(natures, dtype=np.intp).reshape(-1)
+
+    core = ((2 * base + ivs + evs // 4) * levels) // 100
+    out = np.empty_like(core)
+    out[:, 0] = core[:, 0] + levels[:, 0] + 10
+    out[:, 1:] = np.floor((core[:, 1:] + 5) * nature_table()[natures])
+    return out
+
+def stat_rows(dicts: Iterable[Optional[Dict[str, int]]], default: int) -> list[tuple]:
+    """[{"HP": .., ...}] -> [(hp, atk, ...)] en orden STAT_KEYS; falta una stat -> default."""
+    return [tuple((d or {}).get(k, default) for k in STAT_KEYS) for d in dicts]
+
+def compute_set_stats_batch(items: Sequence[tuple]) -> list[Dict[str, int]]:
+    """
+    compute_set_stats para muchos sets: items = [(fila Species, nivel,
+    naturaleza, evs, ivs)]. Mismo resultado que llamar a compute_set_stats por set.
+    """
+    if not items:
+        return []
+    base = [(sp.base_hp, sp.base_atk, sp.base_def, sp.base_spa, sp.base_spd, sp.base_spe)
+            for sp, *_ in items]
+    evs = stat_rows((e for _sp, _l, _n, e, _i in items), 0)
+    # como compute_stats: IVs vacíos -> 31 en todas; si vienen, se usan tal cual
+    ivs = [tuple((i or _DEFAULT_IVS)[k] for k in STAT_KEYS) for _sp, _l, _n, _e, i in items]
+    levels = [lv for _sp, lv, *_ in items]
+    natures = [nature_index(n) for _sp, _l, n, _e, _i in items]
+    rows = compute_stats_batch(base, evs, ivs, levels, natures).tolist()
+    return [dict(zip(STAT_KEYS, r)) for r in rows]
+
+# columnas stat_* de PokemonSet en el orden de STAT_KEYS
+STAT_COLUMNS = {"HP": "stat_hp", "Atk": "stat_atk", "Def": "stat_def",
+                "SpA": "stat_spa", "SpD": "stat_spd", "Spe": "stat_spe"}
+
+def species_base_stats(sp) -> Dict[str, int]:
+    return {"HP": sp.base_hp, "Atk": sp.base_atk, "Def": sp.base_def,
+            "SpA": sp.base_spa, "SpD": sp.base_spd, "Spe": sp.base_spe}
+
+def compute_set_stats(sp, level: int, nature: Optional[str], evs: Dict[str, int], ivs: Dict[str, int]) -> Dict[str, int]:
+    """Stats finales de un set a partir de la especie (fila Species) y sus EVs/IVs."""
+    tmp = SimpleNamespace(evs=evs or {}, level=level, nature=nature)
+    return compute_stats(tmp, base_stats=species_base_stats(sp), ivs=ivs or None)
+
+def set_row_stats(pset, sp) -> Dict[str, int]:
+    """
+    Stats de una fila PokemonSet: usa las columnas stat_* si están pobladas y
+    solo recalcula desde los JSON de EVs/IVs como fallback.
+    """
+    cols = {k: getattr(pset, c, None) for k, c in STAT_COLUMNS.items()}
+    if all(v is not None for v in cols.values()):
+        return cols
+    try:
+        evs = json.loads(pset.evs_json) if pset.evs_json else {}
+        ivs = json.loads(pset.ivs_json) if pset.ivs_json else {}
+    except Exception:
+        evs, ivs = {}, {}
+    return compute_set_stats(sp, pset.level, pset.nature, evs, ivs)
@@ -0,0 +1,352 @@
+# pokemon_app/services/damage_engine.py
+"""
+Motor de daño sin Tk: un atacante + un movimiento contra una lista de defensores.
+
+Las condiciones de campo viajan en un objeto inmutable (FieldConditions), así el
+cálculo se puede correr desde scripts, tests o workers sin una raíz de Tk.
+"""
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from . import battle_calc as bc
+from .ko_probability import end_of_turn_chip, ko_chances, roll_values
+from .calculations import set_row_stats
+from .types import type_effectiveness
+
+STAT_KEYS = ["HP", "Atk", "Def", "SpA", "SpD", "Spe"]
+
+
+@dataclass(frozen=True)
+class FieldConditions:
+    """Clima, pantallas, formato y toggles globales que afectan a todas las filas."""
+    weather: str = "Ninguno"
+    terrain: str = "Ninguno"
+    reflect: bool = False
+    lightscreen: bool = False
+    veil: bool = False
+    doubles: bool = False
+    spread: bool = False
+    crit: bool = False
+    burn: bool = False
+    tera_off_on: bool = False
+    tera_off_type: str = "Normal"
+    tera_def_on: bool = False
+    tera_def_type: str = "Normal"
+    assault_vest: bool = False
+    item_extra: str = "Ninguno"
+    stab_override: Optional[bool] = None   # None = STAB automático
+
+
+@dataclass(frozen=True)
+class MoveSpec:
+    name: str
+    type: str
+    category: str          # "physical" | "special"
+    power: int
+    hits: str = "Auto"     # selector de golpes ("Auto", "2", "2-5 (prob.)", ...)
+
+
+@dataclass(frozen=True)
+class AttackerProfile:
+    level: int
+    stats: dict
+    types: tuple
+    item: str = ""
+
+
+@dataclass(frozen=True)
+class DefenderProfile:
+    set_id: int
+    label: str
+    level: int
+    stats: dict
+    base_def: int
+    base_spd: int
+    ev_def: int
+    ev_spd: int
+    types: tuple
+    item: str = ""
+
+
+@dataclass(frozen=True)
+class DamageResult:
+    set_id: int
+    target: str
+    hp: int
+    def_base: int
+    def_ev: int
+    def_used: str
+    def_item: str
+    xef: str
+    xef_val: float
+    xmod: str
+    xmod_val: float
+    min: int
+    max: int
+    min_pct: float
+    max_pct: float
+    ko: str
+    ko_best: int
+    ohko_label: str        # "Sí" | "Posible" | "No"
+    ohko_pct: float
+    ko2_pct: float = 0.0   # P(KO en <= 2 turnos), con chip de fin de turno
+    ko3_pct: float = 0.0
+
+
+# ---------- Construcción de perfiles ----------
+def _load_json(raw, default):
+    try:
+        return json.loads(raw) if raw else default
+    except Exception:
+        return default
+
+
+def attacker_from_row(pset, sp, types: Iterable[str]) -> AttackerProfile:
+    return AttackerProfile(
+        level=int(pset.level),
+        stats=set_row_stats(pset, sp),
+        types=tuple(types or ()),
+        item=(pset.item or "").strip(),
+    )
+
+
+def defender_from_row(pset, sp, types: Iterable[str]) -> DefenderProfile:
+    evs = _load_json(pset.evs_json, {})
+    return DefenderProfile(
+        set_id=pset.id,
+        label=f"{sp.name} (Lv{pset.level}/{pset.nature or '—'})",
+        level=int(pset.level),
+        stats=set_row_stats(pset, sp),
+        base_def=int(sp.base_def),
+        base_spd=int(sp.base_spd),
+        ev_def=int(evs.get("Def", 0)),
+        ev_spd=int(evs.get("SpD", 0)),
+        types=tuple(types or ()),
+        item=(pset.item or "").strip(),
+    )
+
+
+def defenders_from_rows(rows, get_types: Callable[[object, object], Iterable[str]]) -> list[DefenderProfile]:
+    """rows: [(PokemonSet, Species)]; get_types(pset, sp) -> tipos del defensor."""
+    out = []
+    for pset, sp in rows:
+        try:
+            types = get_types(pset, sp) or []
+        except Exception:
+            types = []
+        out.append(defender_from_row(pset, sp, types))
+    return out
+
+
+def attacker_from_record(rec) -> AttackerProfile:
+    """rec: db.set_records.SetRecord cargado con tipos (repository.load_set_records(get_types=...))."""
+    return AttackerProfile(level=rec.level, stats=rec.stats_dict(), types=rec.types, item=rec.item)
+
+
+def defender_from_record(rec) -> DefenderProfile:
+    return DefenderProfile(
+        set_id=rec.id,
+        label=rec.label,
+        level=rec.level,
+        stats=rec.stats_dict(),
+        base_def=rec.base[2],
+        base_spd=rec.base[4],
+        ev_def=rec.evs[2],
+        ev_spd=rec.evs[4],
+        types=rec.types,
+        item=rec.item,
+    )
+
+
+def defenders_from_records(records) -> list[DefenderProfile]:
+    return [defender_from_record(r) for r in records]
+
+
+# ---------- Movimiento efectivo ----------
+def resolve_move(move: MoveSpec, attacker: AttackerProfile, field: FieldConditions) -> MoveSpec:
+    """Aplica ajustes que dependen del atacante (Tera Blast: tipo Tera y categoría por stat mayor)."""
+    if (move.name or "").strip().lower() in ("tera blast", "tera-blast"):
+        mtype = (field.tera_off_type if field.tera_off_on else move.type).capitalize()
+        cat = "physical" if attacker.stats["Atk"] >= attacker.stats["SpA"] else "special"
+        return MoveSpec(name=move.name, type=mtype, category=cat, power=move.power, hits=move.hits)
+    return MoveSpec(name=move.name, type=(move.type or "Normal").capitalize(),
+                    category=(move.category or "physical").lower(), power=move.power, hits=move.hits)
+
+
+def attack_stat(move: MoveSpec, attacker: AttackerProfile, field: FieldConditions) -> int:
+    atk = attacker.stats["Atk"] if move.category == "physical" else attacker.stats["SpA"]
+    if field.burn and move.category == "physical":
+        atk = int(atk * 0.5)
+    return atk
+
+
+def extra_item_mult(item_extra: str, category: str, eff_mult: float) -> float:
+    """Multiplicador del objeto extra del atacante (Expert Belt, Muscle Band, Wise Glasses)."""
+    s = item_extra or ""
+    if "Expert Belt" in s and eff_mult > 1.0:
+        return 1.2
+    if "Muscle Band" in s and category == "physical":
+        return 1.1
+    if "Wise Glasses" in s and category == "special":
+        return 1.1
+    return 1.0
+
+
+# ---------- Cálculo ----------
+def damage_modifiers(
+    attacker: AttackerProfile,
+    move: MoveSpec,
+    defender: DefenderProfile,
+    field: FieldConditions,
+) -> tuple[float, float, float, float]:
+    """
+    Lo que no depende de las stats del defensor (solo de sus tipos e ítem):
+    (efectividad, boost de Def/SpD por clima, multiplicador de Def/SpD por
+    ítem, xmod). El optimizador de EVs lo calcula una vez por ataque.
+    """
+    cat = move.category
+    # tipos del defensor + Tera defensivo
+    def_types = [field.tera_def_type] if field.tera_def_on else list(defender.types)
+
+    # efectividad + baya/AV del defensor
+    eff_mult = type_effectiveness(move.type, def_types)
+    def_stat_mult, eff_adj = bc.defender_item_effects_auto(defender.item, cat, move.type, eff_mult)
+    eff_mult *= eff_adj
+
+    def_types_uc = [t.capitalize() for t in def_types]
+    def_boost = bc.defender_stat_weather_boost(def_types_uc, cat, field.weather)
+
+    # modificadores
+    if field.stab_override is not None:
+        stab = 1.5 if field.stab_override else 1.0
+    else:
+        stab = bc.tera_stab_multiplier(move.type, list(attacker.types), field.tera_off_on, field.tera_off_type)
+    mod = stab * eff_mult
+    mod *= extra_item_mult(field.item_extra, cat, eff_mult)
+    mod *= bc.weather_move_multiplier(move.type, field.weather)
+    mod *= bc.screen_multiplier(cat, not field.doubles, field.reflect, field.lightscreen, field.veil)
+    if field.crit:
+        mod *= 1.5
+    if field.doubles and field.spread:
+        mod *= 0.75
+    mod *= bc.attacker_item_multiplier_auto(attacker.item, cat, eff_mult, move.type)
+    xmod_val = float(mod) * bc.terrain_xmod(field.terrain, move.type, move.name)
+    return eff_mult, def_boost, def_stat_mult, xmod_val
+
+
+def effective_defense(def_stat: int, def_boost: float, def_stat_mult: float, category: str,
+                      field: FieldConditions) -> int:
+    def_stat_eff = int(def_stat * def_boost * def_stat_mult)
+    if category == "special" and field.assault_vest:
+        def_stat_eff = int(def_stat_eff * 1.5)
+    return def_stat_eff
+
+
+def base_damage_value(level: int, power: int, atk_stat: int, def_stat_eff: int) -> float:
+    return (((2 * level / 5) + 2) * power * atk_stat / max(1, def_stat_eff)) / 50 + 2
+
+
+def compute_one(
+    attacker: AttackerProfile,
+    move: MoveSpec,
+    defender: DefenderProfile,
+    field: FieldConditions,
+    *,
+    atk_stat: Optional[int] = None,
+    hits: Optional[tuple] = None,
+) -> DamageResult:
+    """Daño de `move` (ya resuelto con resolve_move) contra un defensor."""
+    cat = move.category
+    is_phys = (cat == "physical")
+    if atk_stat is None:
+        atk_stat = attack_stat(move, attacker, field)
+    if hits is None:
+        hits = bc.resolve_hits(move.name, move.hits, attacker.item)
+    min_hits, max_hits = hits[0], hits[1]
+
+    eff_mult, def_boost, def_stat_mult, xmod_val = damage_modifiers(attacker, move, defender, field)
+
+    def_stat = defender.stats["Def"] if is_phys else defender.stats["SpD"]
+    hp_stat = defender.stats["HP"]
+    def_stat_eff = effective_defense(def_stat, def_boost, def_stat_mult, cat, field)
+    base_damage = base_damage_value(attacker.level, move.power, atk_stat, def_stat_eff)
+
+    # rango por golpe y total por turno
+    dmin = int(base_damage * 0.85 * xmod_val)
+    dmax = int(base_damage * 1.00 * xmod_val)
+    tdmin = int(dmin * min_hits)
+    tdmax = int(dmax * max_hits)
+
+    min_pct = round(tdmin * 100.0 / hp_stat, 1)
+    max_pct = round(tdmax * 100.0 / hp_stat, 1)
+    ohko_label = "Sí" if tdmin >= hp_stat else ("Posible" if tdmax >= hp_stat else "No")
+
+    n_best = 999 if tdmax <= 0 else math.ceil(hp_stat / tdmax)
+    n_worst = 999 if tdmin <= 0 else math.ceil(hp_stat / max(1, tdmin))
+    if n_best <= 1:
+        ko_label = "OHKO"
+    elif n_best == n_worst:
+        ko_label = f"{n_best}HKO"
+    else:
+        ko_label = f"{n_best}–{n_worst}HKO"
+
+    per_hit_dist = bc.single_hit_roll_dist(base_damage, xmod_val)
+    hits_weights = bc.hits_weights_for_selector(move.hits, min_hits, max_hits)
+    ohko_p = bc.ohko_probability_from_dist(per_hit_dist, hp_stat, hits_weights)
+    recoil, heal = end_of_turn_chip(hp_stat, field.terrain, defender.item)
+    ko_n = ko_chances(roll_values(base_damage, xmod_val), hp_stat, hits_weights,
+                      turns=3, recoil=recoil, heal=heal)
+
+    return DamageResult(
+        set_id=defender.set_id,
+        target=defender.label,
+        hp=hp_stat,
+        def_base=defender.base_def if is_phys else defender.base_spd,
+        def_ev=defender.ev_def if is_phys else defender.ev_spd,
+        def_used=f"{'Def' if is_phys else 'SpD'} {def_stat}",
+        def_item=defender.item,
+        xef=f"×{eff_mult:g}",
+        xef_val=eff_mult,
+        xmod=f"×{xmod_val:.2f}",
+        xmod_val=xmod_val,
+        min=dmin,
+        max=dmax,
+        min_pct=min_pct,
+        max_pct=max_pct,
+        ko=ko_label,
+        ko_best=n_best,
+        ohko_label=ohko_label,
+        ohko_pct=round(ohko_p * 100.0, 1),
+        ko2_pct=round(ko_n[1] * 100.0, 1),
+        ko3_pct=round(ko_n[2] * 100.0, 1),
+    )
+
+
+def compute_damage_list(
+    attacker: AttackerProfile,
+    move: MoveSpec,
+    defenders: Iterable[DefenderProfile],
+    field: FieldConditions,
+) -> list[DamageResult]:
+    """Un atacante + un movimiento contra todos los defensores. Sin llamadas a Tk."""
+    mv = resolve_move(move, attacker, field)
+    atk = attack_stat(mv, attacker, field)
+    hits = bc.resolve_hits(mv.name, mv.hits, attacker.item)
+    return [compute_one(attacker, mv, d, field, atk_stat=atk, hits=hits) for d in defenders]
+
+
+def ko_counts(results: Iterable[DamageResult]) -> tuple[int, int, int]:
+    """(OHKO seguros, posibles, no) para el resumen de la pestaña."""
+    ohko = pos = no = 0
+    for r in results:
+        if r.ohko_label == "Sí":
+            ohko += 1
+        elif r.ohko_label == "Posible":
+            pos += 1
+        else:
+            no += 1
+    return ohko, pos, no
@@ -0,0 +1,291 @@
+# pokemon_app/services/damage_matrix.py
+"""
+Versión vectorizada (NumPy) de damage_engine: un atacante + un movimiento contra
+todos los sets guardados en una sola pasada.
+
+Los defensores se cargan una vez en arrays (DefenderTable); el cálculo replica el
+orden de operaciones de damage_engine.compute_one para dar exactamente los mismos
+números que la ruta escalar.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+from . import battle_calc as bc
+from .ko_probability import end_of_turn_chip, ko_chances_batch
+from .damage_engine import (
+    AttackerProfile, DamageResult, DefenderProfile, FieldConditions, MoveSpec,
+    attack_stat, extra_item_mult, resolve_move,
+)
+from .types import ALL_TYPES, TYPE_CHART, type_effectiveness_batch, type_id, type_pair_code
+
+_TYPE_INDEX = {t: i for i, t in enumerate(ALL_TYPES)}
+_ROLLS = np.array([0.85 + i * 0.01 for i in range(16)], dtype=np.float64)
+
+# baya de resistencia -> índice del tipo que resiste
+_BERRY_TYPE_CODE = [
+    (berry.lower(), _TYPE_INDEX[t]) for t, berry in bc.RESIST_BERRY_BY_TYPE.items()
+]
+
+
+def _type_counts(types: Sequence[str]) -> np.ndarray:
+    row = np.zeros(len(ALL_TYPES), dtype=np.int8)
+    for t in types or ():
+        i = _TYPE_INDEX.get((t or "").capitalize())
+        if i is not None:
+            row[i] += 1
+    return row
+
+
+def _berry_code(item: str) -> int:
+    s = (item or "").strip().lower()
+    if not s:
+        return -1
+    for berry, code in _BERRY_TYPE_CODE:
+        if berry in s:
+            return code
+    return -1
+
+
+def _pair_code(types: Sequence[str]) -> int:
+    code = type_pair_code(types)
+    return -1 if code is None else code
+
+
+@dataclass(frozen=True)
+class DefenderTable:
+    """Struct-of-arrays con lo que el cálculo necesita de cada defensor."""
+    profiles: tuple
+    hp: np.ndarray
+    def_: np.ndarray
+    spd: np.ndarray
+    type_counts: np.ndarray     # (N, len(ALL_TYPES)) nº de veces que aparece cada tipo
+    pair_code: np.ndarray       # código de types.type_pair_code; -1 si tiene más de dos tipos
+    berry_code: np.ndarray      # índice del tipo que resiste la baya; -1 si no hay
+    assault_vest: np.ndarray    # bool
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    @classmethod
+    def from_profiles(cls, defenders: Sequence[DefenderProfile]) -> "DefenderTable":
+        defenders = tuple(defenders)
+        n = len(defenders)
+        counts = np.zeros((n, len(ALL_TYPES)), dtype=np.int8)
+        for i, d in enumerate(defenders):
+            counts[i] = _type_counts(d.types)
+        return cls(
+            profiles=defenders,
+            hp=np.fromiter((d.stats["HP"] for d in defenders), dtype=np.int64, count=n),
+            def_=np.fromiter((d.stats["Def"] for d in defenders), dtype=np.int64, count=n),
+            spd=np.fromiter((d.stats["SpD"] for d in defenders), dtype=np.int64, count=n),
+            type_counts=counts,
+            pair_code=np.fromiter((_pair_code(d.types) for d in defenders), dtype=np.int64, count=n),
+            berry_code=np.fromiter((_berry_code(d.item) for d in defenders), dtype=np.int64, count=n),
+            assault_vest=np.fromiter(("assault vest" in (d.item or "").lower() for d in defenders),
+                                     dtype=bool, count=n),
+        )
+
+
+@dataclass(frozen=True)
+class DamageMatrix:
+    """Resultados por defensor como arrays alineados con table.profiles."""
+    table: DefenderTable
+    move: MoveSpec
+    eff: np.ndarray
+    xmod: np.ndarray
+    rolls: np.ndarray           # (N, 16) daño por golpe de cada roll
+    dmin: np.ndarray
+    dmax: np.ndarray
+    tdmin: np.ndarray
+    tdmax: np.ndarray
+    min_pct: np.ndarray         # sin redondear
+    max_pct: np.ndarray
+    ko_best: np.ndarray
+    ko_worst: np.ndarray
+    ohko_prob: np.ndarray
+    ko_n_prob: np.ndarray       # (N, 3) P(KO en <= 1, 2, 3 turnos) con chip
+
+    def ko_counts(self) -> tuple[int, int, int]:
+        hp = self.table.hp
+        sure = self.tdmin >= hp
+        possible = ~sure & (self.tdmax >= hp)
+        n_sure = int(np.count_nonzero(sure))
+        n_pos = int(np.count_nonzero(possible))
+        return n_sure, n_pos, len(hp) - n_sure - n_pos
+
+    def results(self) -> list[DamageResult]:
+        """Materializa DamageResult (mismo formato que damage_engine) para pintar."""
+        is_phys = self.move.category == "physical"
+        stat_name = "Def" if is_phys else "SpD"
+        out = []
+        hp = self.table.hp.tolist()
+        eff = self.eff.tolist(); xmod = self.xmod.tolist()
+        dmin = self.dmin.tolist(); dmax = self.dmax.tolist()
+        tdmin = self.tdmin.tolist(); tdmax = self.tdmax.tolist()
+        kb = self.ko_best.tolist(); kw = self.ko_worst.tolist()
+        ohko = self.ohko_prob.tolist()
+        ko_n = self.ko_n_prob.tolist()
+        for i, d in enumerate(self.table.profiles):
+            h = hp[i]
+            if kb[i] <= 1:
+                ko_label = "OHKO"
+            elif kb[i] == kw[i]:
+                ko_label = f"{kb[i]}HKO"
+            else:
+                ko_label = f"{kb[i]}–{kw[i]}HKO"
+            out.append(DamageResult(
+                set_id=d.set_id,
+                target=d.label,
+                hp=h,
+                def_base=d.base_def if is_phys else d.base_spd,
+                def_ev=d.ev_def if is_phys else d.ev_spd,
+                def_used=f"{stat_name} {d.stats[stat_name]}",
+                def_item=d.item,
+                xef=f"×{eff[i]:g}",
+                xef_val=eff[i],
+                xmod=f"×{xmod[i]:.2f}",
+                xmod_val=xmod[i],
+                min=dmin[i],
+                max=dmax[i],
+                min_pct=round(tdmin[i] * 100.0 / h, 1),
+                max_pct=round(tdmax[i] * 100.0 / h, 1),
+                ko=ko_label,
+                ko_best=kb[i],
+                ohko_label="Sí" if tdmin[i] >= h else ("Posible" if tdmax[i] >= h else "No"),
+                ohko_pct=round(ohko[i] * 100.0, 1),
+                ko2_pct=round(ko_n[i][1] * 100.0, 1),
+                ko3_pct=round(ko_n[i][2] * 100.0, 1),
+            ))
+        return out
+
+
+def _two_way(fn, eff: np.ndarray) -> np.ndarray:
+    """Evalúa fn(eff_mult) que solo depende de 'eff_mult > 1.0' sin iterar filas."""
+    hi, lo = fn(2.0), fn(1.0)
+    if hi == lo:
+        return np.full(eff.shape, lo, dtype=np.float64)
+    return np.where(eff > 1.0, hi, lo)
+
+
+def _hit_ko_probability(rolls: np.ndarray, hp: np.ndarray, hits: int) -> np.ndarray:
+    """P(suma de `hits` golpes >= hp) por fila, con conteos exactos (como la ruta Counter)."""
+    if hits == 1:
+        return np.count_nonzero(rolls >= hp[:, None], axis=1) / 16
+    base = rolls[:, 0]
+    offs = rolls - base[:, None]
+    width = int(offs.max()) + 1 if offs.size else 1
+    one = np.zeros((len(hp), width), dtype=np.float64)
+    np.add.at(one, (np.repeat(np.arange(len(hp)), 16), offs.ravel()), 1.0)
+    size = hits * (width - 1) + 1
+    spec = np.fft.rfft(one, n=size, axis=1) ** hits
+    counts = np.rint(np.fft.irfft(spec, n=size, axis=1))
+    # cola: nº de combinaciones con suma >= hp
+    tail = np.cumsum(counts[:, ::-1], axis=1)[:, ::-1]
+    need = hp - hits * base
+    idx = np.clip(need, 0, size)
+    tail = np.concatenate([tail, np.zeros((len(hp), 1))], axis=1)
+    ko = tail[np.arange(len(hp)), idx]
+    return ko / (16 ** hits)
+
+
+def compute_damage_matrix(
+    attacker: AttackerProfile,
+    move: MoveSpec,
+    table: DefenderTable,
+    field: FieldConditions,
+) -> DamageMatrix:
+    """Equivalente vectorizado de damage_engine.compute_damage_list."""
+    mv = resolve_move(move, attacker, field)
+    cat = mv.category
+    is_phys = cat == "physical"
+    atk = attack_stat(mv, attacker, field)
+    min_hits, max_hits, _exp, _mode = bc.resolve_hits(mv.name, mv.hits, attacker.item)
+    n = len(table)
+
+    # efectividad: un índice en la tabla atacante × pareja de tipos (o Tera defensivo para todos)
+    mt_id = type_id(mv.type)
+    mt_id = -1 if mt_id is None else mt_id
+    if field.tera_def_on:
+        counts = np.broadcast_to(_type_counts([field.tera_def_type]), table.type_counts.shape)
+        eff = np.full(n, type_effectiveness_batch(mt_id, _pair_code([field.tera_def_type])), dtype=np.float64)
+    else:
+        counts = table.type_counts
+        eff = type_effectiveness_batch(mt_id, np.maximum(table.pair_code, 0))
+        odd = table.pair_code < 0
+        if odd.any():
+            # >2 tipos: producto sobre la máscara de conteos
+            chart = TYPE_CHART.get(mv.type, {})
+            chart_row = np.array([chart.get(t, 1.0) for t in ALL_TYPES], dtype=np.float64)
+            eff = np.where(odd, np.prod(chart_row[None, :] ** counts, axis=1), eff)
+
+    # bayas (x0.5 si SE y coincide el tipo) / Assault Vest del ítem
+    mt_code = _TYPE_INDEX.get(mv.type, -2)
+    eff = np.where((table.berry_code == mt_code) & (eff > 1.0), eff * 0.5, eff)
+    def_stat_mult = np.where(table.assault_vest, 1.5, 1.0) if not is_phys else np.ones(n)
+
+    # boost defensivo por clima (Rock en arena / Ice en nieve)
+    if cat == "special" and field.weather == "Tormenta Arena":
+        def_boost = np.where(counts[:, _TYPE_INDEX["Rock"]] > 0, 1.5, 1.0)
+    elif cat == "physical" and field.weather == "Nieve":
+        def_boost = np.where(counts[:, _TYPE_INDEX["Ice"]] > 0, 1.5, 1.0)
+    else:
+        def_boost = np.ones(n)
+
+    def_stat = table.def_ if is_phys else table.spd
+    def_eff = np.floor(def_stat * def_boost * def_stat_mult)
+    if cat == "special" and field.assault_vest:
+        def_eff = np.floor(def_eff * 1.5)
+
+    L = attacker.level
+    base_damage = (((2 * L / 5) + 2) * mv.power * atk / np.maximum(1, def_eff)) / 50 + 2
+
+    if field.stab_override is not None:
+        stab = 1.5 if field.stab_override else 1.0
+    else:
+        stab = bc.tera_stab_multiplier(mv.type, list(attacker.types), field.tera_off_on, field.tera_off_type)
+    mod = stab * eff
+    mod = mod * _two_way(lambda e: extra_item_mult(field.item_extra, cat, e), eff)
+    mod = mod * bc.weather_move_multiplier(mv.type, field.weather)
+    mod = mod * bc.screen_multiplier(cat, not field.doubles, field.reflect, field.lightscreen, field.veil)
+    if field.crit:
+        mod = mod * 1.5
+    if field.doubles and field.spread:
+        mod = mod * 0.75
+    mod = mod * _two_way(lambda e: bc.attacker_item_multiplier_auto(attacker.item, cat, e, mv.type), eff)
+    xmod = mod * bc.terrain_xmod(field.terrain, mv.type, mv.name)
+
+    rolls = np.floor(base_damage[:, None] * _ROLLS[None, :] * xmod[:, None]).astype(np.int64)
+    dmin = np.floor(base_damage * 0.85 * xmod).astype(np.int64)
+    dmax = np.floor(base_damage * 1.00 * xmod).astype(np.int64)
+    tdmin = dmin * min_hits
+    tdmax = dmax * max_hits
+
+    hp = table.hp
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ko_best = np.where(tdmax <= 0, 999, np.ceil(hp / np.maximum(tdmax, 1))).astype(np.int64)
+        ko_worst = np.where(tdmin <= 0, 999, np.ceil(hp / np.maximum(tdmin, 1))).astype(np.int64)
+
+    weights = bc.hits_weights_for_selector(mv.hits, min_hits, max_hits)
+    ohko = np.zeros(n, dtype=np.float64)
+    for hits, w in weights.items():
+        if hits <= 0 or w <= 0:
+            continue
+        ohko = ohko + w * _hit_ko_probability(rolls, hp, hits)
+    ohko = np.clip(ohko, 0.0, 1.0)
+
+    # KO en 2/3 turnos (daño acumulado + Life Orb / Grassy / Leftovers)
+    chip = [end_of_turn_chip(h, field.terrain, d.item) for h, d in zip(hp.tolist(), table.profiles)]
+    ko_n = ko_chances_batch(rolls, hp, weights, turns=3,
+                            recoil=np.fromiter((c[0] for c in chip), dtype=np.int64, count=n),
+                            heal=np.fromiter((c[1] for c in chip), dtype=np.int64, count=n))
+
+    return DamageMatrix(
+        table=table, move=mv, eff=eff, xmod=xmod, rolls=rolls,
+        dmin=dmin, dmax=dmax, tdmin=tdmin, tdmax=tdmax,
+        min_pct=tdmin * 100.0 / hp, max_pct=tdmax * 100.0 / hp,
+        ko_best=ko_best, ko_worst=ko_worst, ohko_prob=ohko, ko_n_prob=ko_n,
+    )
@@ -0,0 +1,406 @@
+# pokemon_app/services/ev_optimizer.py
+"""
+Optimizador de EVs: los mínimos EVs (y la naturaleza) para superar en
+velocidad a una lista de amenazas y el reparto HP/Def/SpD más barato que
+aguanta una lista de ataques con una probabilidad objetivo.
+
+En vez de probar todos los repartos de 510 EVs:
+- Solo se prueban los EVs donde la stat sube (breakpoints): con pasos de 4 EVs
+  son 64 valores por stat a nivel 100 y unos 33 a nivel 50.
+- Todo es monótono: más Spe nunca va más lento y más HP/Def/SpD nunca
+  aguanta menos. Así la velocidad es un bisect, y para cada EV de HP el mínimo
+  de Def (y de SpD) solo puede bajar al subir HP: un barrido con dos punteros,
+  O(|HP| + |Def|) comprobaciones en lugar de |HP| x |Def|.
+- Los ataques físicos solo dependen de HP/Def y los especiales de HP/SpD, así
+  que Def y SpD se resuelven por separado.
+- Cada ataque precalcula lo que no depende de las stats del defensor
+  (damage_engine.damage_modifiers) y las probabilidades se memoizan por
+  (PS, defensa); los casos seguros (KO siempre / nunca) no pasan por la DP.
+
+    threats = threats_from_records(records, get_move_info)
+    target = bulk_target_from_record(my_set)
+    plan = optimize_spread(target, threats, speed_targets=threat_speeds(ids), survive=0.9)
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field as dc_field, replace
+from typing import Callable, Iterable, Optional, Sequence
+
+from . import battle_calc as bc
+from .calculations import STAT_KEYS, calc_stat
+from .damage_engine import (
+    AttackerProfile, DefenderProfile, FieldConditions, MoveSpec,
+    attack_stat, base_damage_value, damage_modifiers, effective_defense, resolve_move,
+)
+from .ko_probability import end_of_turn_chip, ko_chances, roll_values
+from .speed_index import EV_STEPS, SpeedMods, SpeedRow, SpeedTierIndex, item_speed_mult
+from ..utils.nature import NATURE_NAMES, nature_multipliers
+
+MAX_STAT_EVS = 252
+MAX_TOTAL_EVS = 510
+_EPS = 1e-9
+
+
+@dataclass(frozen=True)
+class BulkTarget:
+    """El set a optimizar: todo menos los EVs."""
+    base: tuple                           # base stats en orden STAT_KEYS
+    level: int = 50
+    ivs: tuple = (31,) * 6
+    types: tuple = ()
+    item: str = ""
+    ability: str = ""
+    species: str = ""
+    label: str = ""
+
+
+@dataclass(frozen=True)
+class Threat:
+    """Un ataque que hay que aguantar `turns` veces (1 = no caer de un golpe)."""
+    attacker: AttackerProfile
+    move: MoveSpec
+    field: FieldConditions = FieldConditions()
+    turns: int = 1
+    label: str = ""
+
+
+@dataclass
+class SpeedPlan:
+    nature: str
+    ev: Optional[int]                     # None: ni con 252 supera a todas
+    speed: int                            # Vel final con `ev` (o con 252 si ev es None)
+    target: int                           # la amenaza más rápida
+    outsped: int                          # amenazas superadas con esa velocidad
+    total: int
+
+
+@dataclass
+class BulkPlan:
+    nature: str
+    evs: dict                             # {"HP": .., "Def": .., "SpD": ..}
+    stats: dict                           # {"HP": .., "Def": .., "SpD": ..}
+    total: int
+    survival: list = dc_field(default_factory=list)      # [(etiqueta, P(aguanta))]
+    unsurvivable: list = dc_field(default_factory=list)  # etiquetas imposibles de aguantar
+
+
+@dataclass
+class SpreadPlan:
+    nature: str
+    evs: dict                             # HP/Def/SpD/Spe
+    total: int
+    speed: Optional[SpeedPlan]
+    bulk: Optional[BulkPlan]
+
+
+# ---------- construcción desde sets guardados ----------
+def bulk_target_from_record(rec) -> BulkTarget:
+    """SetRecord (db/set_records.py, cargado con tipos) -> BulkTarget."""
+    return BulkTarget(base=rec.base, level=rec.level, ivs=rec.ivs, types=rec.types,
+                      item=rec.item, ability=rec.ability, species=rec.species, label=rec.label)
+
+
+def threats_from_records(records, get_move_info: Callable[[str], Optional[dict]],
+                         field: FieldConditions = FieldConditions(), turns: int = 1) -> list[Threat]:
+    """Un Threat por cada movimiento ofensivo de cada set (los de estado o sin potencia se saltan)."""
+    out = []
+    for rec in records:
+        attacker = AttackerProfile(level=rec.level, stats=rec.stats_dict(), types=rec.types, item=rec.item)
+        for name in rec.moves:
+            info = get_move_info(name) if (name or "").strip() else None
+            if not info or info.get("category") not in ("Physical", "Special") or not info.get("power"):
+                continue
+            move = MoveSpec(name=info.get("name", name), type=info.get("type") or "Normal",
+                            category=info["category"].lower(), power=int(info["power"]))
+            out.append(Threat(attacker, move, field, turns, f"{rec.label}: {move.name}"))
+    return out
+
+
+def threat_speeds(set_ids: Iterable[int], mods: SpeedMods = SpeedMods(),
+                  index: Optional[SpeedTierIndex] = None) -> list[int]:
+    """Vel final de sets guardados con `mods` (services/speed_index.py)."""
+    if index is None:
+        from .speed_index import get_speed_index
+        index = get_speed_index()
+    speeds = (index.speed_of(i, mods) for i in set_ids)
+    return [v for v in speeds if v is not None]
+
+
+# ---------- naturalezas ----------
+def nature_classes(keys: Sequence[str] = ("Def", "SpD", "Spe")) -> list[str]:
+    """Una naturaleza por cada combinación distinta de multiplicadores en `keys` (neutra primero)."""
+    seen: dict = {}
+    for name in ("Hardy",) + tuple(n for n in NATURE_NAMES if n != "Hardy"):
+        mults = nature_multipliers(name)
+        seen.setdefault(tuple(mults[k] for k in keys), name)
+    return list(seen.values())
+
+
+def ev_breakpoints(key: str, base: int, iv: int, level: int, nature: Optional[str]) -> list[tuple[int, int]]:
+    """[(EVs, stat)] con los EVs mínimos para cada valor distinto de la stat (0..252, pasos de 4)."""
+    out: list[tuple[int, int]] = []
+    for ev in EV_STEPS:
+        value = calc_stat(key, base, iv, ev, level, nature)
+        if not out or value != out[-1][1]:
+            out.append((ev, value))
+    return out
+
+
+# ---------- velocidad ----------
+def optimize_speed(
+    base_spe: int,
+    level: int,
+    targets: Sequence[int],
+    *,
+    natures: Sequence[str] = ("Hardy", "Jolly"),
+    iv: int = 31,
+    mods: SpeedMods = SpeedMods(),
+    item: str = "",
+    ability: str = "",
+    species: str = "",
+) -> list[SpeedPlan]:
+    """
+    Menos EVs en Spe para superar (estrictamente) a todas las velocidades de
+    `targets` con cada naturaleza; basta con superar a la más rápida. Ordenado
+    del plan más barato al más caro (los imposibles al final).
+    """
+    ordered = sorted(targets)
+    target = ordered[-1] if ordered else -1
+    probe = SpeedRow(id=0, species=species, display=species, nature="", item=item, ability=ability,
+                     base=base_spe, iv=iv, ev=0, calc=0, item_mult=item_speed_mult(item, species))
+    plans = []
+    for nature in natures:
+        def speed_with(ev: int, nature=nature) -> int:
+            calc = calc_stat("Spe", base_spe, iv, ev, level, nature)
+            return SpeedTierIndex.final_speed(replace(probe, calc=calc), mods)
+
+        k = bisect_right(EV_STEPS, target, key=speed_with)
+        ev = EV_STEPS[k] if k < len(EV_STEPS) else None
+        speed = speed_with(ev if ev is not None else MAX_STAT_EVS)
+        plans.append(SpeedPlan(nature=nature, ev=ev, speed=speed, target=target,
+                               outsped=bisect_left(ordered, speed), total=len(ordered)))
+    plans.sort(key=lambda p: (p.ev is None, p.ev if p.ev is not None else -p.outsped))
+    return plans
+
+
+# ---------- aguante ----------
+class _PreparedThreat:
+    """Un Threat con todo lo que no depende de PS/Def/SpD ya calculado."""
+    __slots__ = ("label", "physical", "level", "power", "atk", "xmod", "boost", "mult",
+                 "field", "weights", "hmin", "hmax", "turns", "item", "_cache")
+
+    def __init__(self, threat: Threat, target: BulkTarget):
+        f = threat.field
+        mv = resolve_move(threat.move, threat.attacker, f)
+        dummy = DefenderProfile(set_id=0, label="", level=target.level, stats={}, base_def=0, base_spd=0,
+                                ev_def=0, ev_spd=0, types=tuple(target.types), item=target.item)
+        _eff, self.boost, self.mult, self.xmod = damage_modifiers(threat.attacker, mv, dummy, f)
+        min_hits, max_hits = bc.resolve_hits(mv.name, mv.hits, threat.attacker.item)[:2]
+        self.weights = bc.hits_weights_for_selector(mv.hits, min_hits, max_hits)
+        self.hmin = min((h for h, w in self.weights.items() if w > 0), default=0)
+        self.hmax = max((h for h, w in self.weights.items() if w > 0), default=0)
+        self.label = threat.label or f"{mv.name}"
+        self.physical = mv.category == "physical"
+        self.level = threat.attacker.level
+        self.power = mv.power
+        self.atk = attack_stat(mv, threat.attacker, f)
+        self.field = f
+        self.turns = max(1, int(threat.turns))
+        self.item = target.item
+        self._cache: dict = {}
+
+    def ko_prob(self, hp: int, defense: int) -> float:
+        """P(KO en <= turns turnos) con esos PS y esa Def/SpD."""
+        key = (hp, defense)
+        p = self._cache.get(key)
+        if p is not None:
+            return p
+        cat = "physical" if self.physical else "special"
+        def_eff = effective_defense(defense, self.boost, self.mult, cat, self.field)
+        rolls = roll_values(base_damage_value(self.level, self.power, self.atk, def_eff), self.xmod)
+        # a un turno, como la columna OHKO de Daños: sin chip (el retroceso de Life Orb
+        # del defensor llega después del golpe); a más turnos, con chip como 2HKO/3HKO
+        recoil, heal = end_of_turn_chip(hp, self.field.terrain, self.item) if self.turns > 1 else (0, 0)
+        if not self.hmax or max(rolls) <= 0:
+            p = 0.0
+        elif min(rolls) * self.hmin >= hp:
+            p = 1.0
+        elif (max(rolls) * self.hmax + recoil) * self.turns < hp:
+            p = 0.0
+        else:
+            p = ko_chances(rolls, hp, self.weights, turns=self.turns, recoil=recoil, heal=heal)[-1]
+        self._cache[key] = p
+        return p
+
+
+def _min_defense_sweep(hps: list[tuple[int, int]], defs: list[tuple[int, int]],
+                       threats: list[_PreparedThreat], max_ko: float):
+    """
+    Generador: para cada breakpoint de HP (en orden), el índice del mínimo
+    breakpoint de Def/SpD que aguanta todos los `threats` (None si ni con 252).
+    """
+    order = list(threats)
+
+    def ok(hp: int, defense: int) -> bool:
+        for i, t in enumerate(order):
+            if t.ko_prob(hp, defense) > max_ko + _EPS:
+                if i:                       # el que falla primero se prueba antes la próxima vez
+                    order.insert(0, order.pop(i))
+                return False
+        return True
+
+    j = None
+    for _ev, hp in hps:
+        if not order:
+            yield 0
+            continue
+        if j is None:
+            if not ok(hp, defs[-1][1]):
+                yield None
+                continue
+            lo, hi = 0, len(defs) - 1
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if ok(hp, defs[mid][1]):
+                    hi = mid
+                else:
+                    lo = mid + 1
+            j = lo
+        else:
+            while j > 0 and ok(hp, defs[j - 1][1]):
+                j -= 1
+        yield j
+
+
+def _cheapest(bp: dict, phys: list[_PreparedThreat], spec: list[_PreparedThreat], max_ko: float,
+              budget: float) -> Optional[tuple[int, int, int, int]]:
+    """(total, EVs de HP, índice Def, índice SpD) del reparto más barato que aguanta phys + spec; None si no cabe."""
+    sweep_def = _min_defense_sweep(bp["HP"], bp["Def"], phys, max_ko)
+    sweep_spd = _min_defense_sweep(bp["HP"], bp["SpD"], spec, max_ko)
+    found = None
+    for (hp_ev, _hp), jd, js in zip(bp["HP"], sweep_def, sweep_spd):
+        if found is not None and hp_ev >= found[0]:
+            break                               # solo con HP ya no mejora
+        if jd is None or js is None:
+            continue
+        total = hp_ev + bp["Def"][jd][0] + bp["SpD"][js][0]
+        if total <= budget and (found is None or total < found[0]):
+            found = (total, hp_ev, jd, js)
+    return found
+
+
+def optimize_bulk(
+    target: BulkTarget,
+    threats: Sequence[Threat],
+    *,
+    survive: float = 1.0,
+    natures: Optional[Sequence[str]] = None,
+    budget: int = MAX_TOTAL_EVS,
+) -> Optional[BulkPlan]:
+    """
+    Reparto HP/Def/SpD con menos EVs en total que aguanta cada ataque de
+    `threats` con probabilidad >= survive (1.0 = siempre). Los ataques que no
+    se aguantan ni con 252/252 se dejan fuera; si los demás juntos no caben en
+    `budget` (físicos y especiales piden Def y SpD a la vez), se van dejando
+    fuera también, el más caro por separado primero. Todos se listan en
+    unsurvivable. natures: naturalezas a probar (por defecto la neutra);
+    budget: EVs libres. Devuelve None solo si no se puede aguantar ninguno.
+    """
+    natures = list(natures or ("Hardy",))
+    max_ko = 1.0 - float(survive)
+    base = dict(zip(STAT_KEYS, target.base))
+    ivs = dict(zip(STAT_KEYS, target.ivs))
+    prepared = [_PreparedThreat(t, target) for t in threats]
+
+    best: Optional[BulkPlan] = None
+    for nature in natures:
+        bp = {k: ev_breakpoints(k, base[k], ivs[k], target.level, nature) for k in ("HP", "Def", "SpD")}
+        hp_max, def_max, spd_max = bp["HP"][-1][1], bp["Def"][-1][1], bp["SpD"][-1][1]
+        # fuera los que ni con todo se aguantan (monotonía: si no con 252/252, con nada)
+        phys, spec, impossible = [], [], []
+        for t in prepared:
+            if t.ko_prob(hp_max, def_max if t.physical else spd_max) > max_ko + _EPS:
+                impossible.append(t)
+            else:
+                (phys if t.physical else spec).append(t)
+
+        found = _cheapest(bp, phys, spec, max_ko, budget)
+        if found is None:
+            # juntos no caben: fuera el más caro por separado hasta que quepan los demás
+            alone = {id(t): _cheapest(bp, [t] if t.physical else [], [] if t.physical else [t],
+                                      max_ko, float("inf"))[0]
+                     for t in phys + spec}
+            for t in sorted(phys + spec, key=lambda t: -alone[id(t)]):
+                (phys if t.physical else spec).remove(t)
+                impossible.append(t)
+                if not (phys or spec):
+                    break
+                found = _cheapest(bp, phys, spec, max_ko, budget)
+                if found is not None:
+                    break
+        if prepared and not (phys or spec):
+            continue                                # con esta naturaleza no se aguanta ninguno
+        if found is None:
+            continue
+        total, hp_ev, jd, js = found
+        # mejor la naturaleza que deja fuera menos ataques; a igualdad, la más barata
+        if best is not None and (len(impossible), total) >= (len(best.unsurvivable), best.total):
+            continue
+        hp = calc_stat("HP", base["HP"], ivs["HP"], hp_ev, target.level, nature)
+        def_ev, def_stat = bp["Def"][jd]
+        spd_ev, spd_stat = bp["SpD"][js]
+        best = BulkPlan(
+            nature=nature,
+            evs={"HP": hp_ev, "Def": def_ev, "SpD": spd_ev},
+            stats={"HP": hp, "Def": def_stat, "SpD": spd_stat},
+            total=total,
+            survival=[(t.label, round(1.0 - t.ko_prob(hp, def_stat if t.physical else spd_stat), 4))
+                      for t in phys + spec],
+            unsurvivable=[t.label for t in impossible],
+        )
+    return best
+
+
+# ---------- los dos a la vez ----------
+def optimize_spread(
+    target: BulkTarget,
+    threats: Sequence[Threat] = (),
+    *,
+    speed_targets: Sequence[int] = (),
+    survive: float = 1.0,
+    natures: Optional[Sequence[str]] = None,
+    speed_mods: SpeedMods = SpeedMods(),
+) -> Optional[SpreadPlan]:
+    """
+    Velocidad primero (los EVs mínimos para superar a speed_targets) y con los
+    EVs restantes el aguante más barato, para cada naturaleza candidata (por
+    defecto una por cada combinación distinta de Def/SpD/Spe). Gana el total
+    más bajo entre las que cumplen las dos cosas.
+    """
+    natures = list(natures or nature_classes())
+    best: Optional[SpreadPlan] = None
+    for nature in natures:
+        speed = None
+        spe_ev = 0
+        if speed_targets:
+            speed = optimize_speed(target.base[5], target.level, speed_targets, natures=(nature,),
+                                   iv=target.ivs[5], mods=speed_mods, item=target.item,
+                                   ability=target.ability, species=target.species)[0]
+            if speed.ev is None:
+                continue
+            spe_ev = speed.ev
+        bulk = None
+        bulk_evs = {"HP": 0, "Def": 0, "SpD": 0}
+        if threats:
+            bulk = optimize_bulk(target, threats, survive=survive, natures=(nature,),
+                                 budget=MAX_TOTAL_EVS - spe_ev)
+            if bulk is None:
+                continue
+            bulk_evs = bulk.evs
+        total = spe_ev + sum(bulk_evs.values())
+        left_out = len(bulk.unsurvivable) if bulk else 0
+        if best is None or (left_out, total) < (len(best.bulk.unsurvivable) if best.bulk else 0, best.total):
+            best = SpreadPlan(nature=nature, evs={**bulk_evs, "Spe": spe_ev}, total=total,
+                              speed=speed, bulk=bulk)
+    return best
@@ -0,0 +1,203 @@
+# pokemon_app/services/http_client.py
+"""
+Cliente HTTP compartido por todos los providers (PokéAPI, sprites).
+
+- Una sola requests.Session con pool de conexiones (keep-alive).
+- Reintentos con backoff exponencial ante errores de red, 429 y 5xx
+  (respeta Retry-After si viene).
+- Revalidación condicional: guarda ETag / Last-Modified de cada respuesta y
+  manda If-None-Match / If-Modified-Since; un 304 devuelve el cuerpo guardado.
+- Caché negativa con TTL para los 404: una especie mal escrita no vuelve a
+  golpear la red en cada refresco.
+- Límite de peticiones simultáneas por host.
+- En modo offline (pokeapi.offline_mode()) no sale a la red: lanza Offline.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .pokeapi import offline_mode
+
+log = logging.getLogger(__name__)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class NotFound(requests.HTTPError):
+    """404 (real o recordado por la caché negativa)."""
+
+
+class Offline(requests.ConnectionError):
+    """Petición bloqueada por el modo offline."""
+
+
+@dataclass
+class _Entry:
+    content: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+class HttpClient:
+    def __init__(
+        self,
+        timeout: float = 15.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_per_host: int = 4,
+        negative_ttl: float = 600.0,
+        cache_size: int = 512,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_per_host = max_per_host
+        self.negative_ttl = negative_ttl
+        self.cache_size = cache_size
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max(8, max_per_host * 2))
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._host_slots: dict[str, threading.BoundedSemaphore] = {}
+        self._cache: "OrderedDict[str, _Entry]" = OrderedDict()   # url -> cuerpo + validadores (LRU)
+        self._not_found: dict[str, float] = {}                      # url -> instante de caducidad
+
+    # ---------- API ----------
+    def get(self, url: str, timeout: Optional[float] = None) -> bytes:
+        """Cuerpo de la respuesta. Lanza NotFound en 404 y requests.HTTPError en otros errores."""
+        if offline_mode():
+            raise Offline(f"Modo offline: {url}")
+        self._check_negative(url)
+        entry = self._cached(url)
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        with self._slot(url):
+            r = self._request(url, headers, timeout or self.timeout)
+
+        if r.status_code == 304 and entry is not None:
+            return entry.content
+        if r.status_code == 404:
+            with self._lock:
+                self._not_found[url] = time.monotonic() + self.negative_ttl
+                self._cache.pop(url, None)
+            raise NotFound(f"404 Not Found: {url}", response=r)
+        r.raise_for_status()
+        self._store(url, r)
+        return r.content
+
+    def get_json(self, url: str, timeout: Optional[float] = None):
+        return json.loads(self.get(url, timeout))
+
+    def forget(self, url: Optional[str] = None) -> None:
+        """Olvida caché y 404 recordados de una URL (o de todas)."""
+        with self._lock:
+            if url is None:
+                self._cache.clear()
+                self._not_found.clear()
+            else:
+                self._cache.pop(url, None)
+                self._not_found.pop(url, None)
+
+    def close(self) -> None:
+        self._session.close()
+
+    # ---------- internos ----------
+    def _check_negative(self, url: str) -> None:
+        with self._lock:
+            until = self._not_found.get(url)
+            if until is None:
+                return
+            if time.monotonic() < until:
+                raise NotFound(f"404 Not Found (cache): {url}")
+            del self._not_found[url]
+
+    def _cached(self, url: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._cache.get(url)
+            if entry is not None:
+                self._cache.move_to_end(url)
+            return entry
+
+    def _store(self, url: str, r: requests.Response) -> None:
+        etag = r.headers.get("ETag")
+        last_modified = r.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return      # sin validadores no hay nada que revalidar
+        with self._lock:
+            self._cache[url] = _Entry(r.content, etag, last_modified)
+            self._cache.move_to_end(url)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            sem = self._host_slots.get(host)
+            if sem is None:
+                sem = self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return sem
+
+    def _request(self, url: str, headers: dict, timeout: float) -> requests.Response:
+        attempt = 0
+        while True:
+            try:
+                r = self._session.get(url, headers=headers, timeout=timeout)
+                if r.status_code not in RETRY_STATUS or attempt >= self.retries:
+                    return r
+                delay = self._retry_after(r)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.retries:
+                    raise
+                delay = None
+            if delay is None:
+                delay = self.backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+            attempt += 1
+            log.debug("reintento %d de %s en %.2fs", attempt, url, delay)
+            time.sleep(delay)
+
+    def _retry_after(self, r: requests.Response) -> Optional[float]:
+        try:
+            return min(30.0, float(r.headers.get("Retry-After", "")))
+        except ValueError:
+            return None
+
+
+_CLIENT: Optional[HttpClient] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """Instancia única del proceso."""
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = HttpClient()
+    return _CLIENT
+
+
+def get_json(url: str, timeout: Optional[float] = None):
+    return get_client().get_json(url, timeout)
+
+
+def get_bytes(url: str, timeout: Optional[float] = None) -> bytes:
+    return get_client().get(url, timeout)
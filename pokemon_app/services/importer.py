@@ -0,0 +1,265 @@
+# pokemon_app/services/importer.py
+"""
+Importación en bloque de sets en formato Showdown (un equipo exportado, un
+volcado de usage con cientos de sets, varios archivos...).
+
+1. Se separa el texto en bloques por líneas en blanco (las cabeceras
+   "=== [gen9] Equipo ===" de los exports de equipos se ignoran).
+2. Se parsean los bloques; con muchos bloques y workers > 1, en varios procesos.
+3. Se resuelven de una vez las base stats de todas las especies: tabla species,
+   almacén local y, para las que falten, un solo prefetch() en paralelo
+   (services/prefetch.py) en vez de una petición por set.
+4. Se insertan todos los sets válidos en UNA transacción
+   (repository.save_pokemon_sets, INSERT por lotes).
+
+Los sets que no se pueden parsear o cuya especie no se encuentra no frenan al
+resto: quedan en ImportReport.errors con su posición y su primera línea.
+
+Uso por consola:
+    python -m pokemon_app.services.importer equipo.txt usage_dump.txt
+    python -m pokemon_app.services.importer - < equipo.txt          # stdin
+    python -m pokemon_app.services.importer dump.txt --dry-run      # solo parsear y resolver
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+from ..db import data_store
+from ..parsing.showdown_parser import iter_showdown_blocks, parse_set_lines
+from ..utils.species_normalize import normalize_species_name
+
+log = logging.getLogger(__name__)
+
+# parsear un set cuesta ~25 µs: por debajo de esto arrancar procesos y serializar
+# los bloques cuesta más que parsear en serie
+PARALLEL_MIN_BLOCKS = 5000
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+Progress = Callable[[str, int, int], None]      # (fase, hechos, total)
+
+
+@dataclass
+class SetError:
+    index: int                       # posición del bloque (1..n) en la entrada
+    header: str                      # primera línea del bloque
+    message: str
+
+
+@dataclass
+class ImportReport:
+    total: int = 0                   # bloques encontrados
+    ids: list[int] = field(default_factory=list)
+    errors: list[SetError] = field(default_factory=list)
+    fetched_species: int = 0         # especies que hubo que traer de snapshot/PokéAPI
+    elapsed: float = 0.0
+
+    @property
+    def inserted(self) -> int:
+        return len(self.ids)
+
+
+# ---------- parseo ----------
+def split_sets(text: str) -> list[str]:
+    """Separa un texto con varios sets Showdown en bloques (uno por set)."""
+    return ["\n".join(lines) for _start, lines in iter_showdown_blocks((text or "").splitlines())]
+
+
+def read_sets(path: str) -> list[str]:
+    """Bloques de un archivo, leído línea a línea (parsing/showdown_parser.iter_showdown_blocks)."""
+    return ["\n".join(lines) for _start, lines in iter_showdown_blocks(path)]
+
+
+def parse_block(block: str) -> dict:
+    """Un bloque -> dict con el formato de repository.save_pokemon_sets. Lanza ValueError si no vale."""
+    pd = parse_set_lines(block.splitlines())
+    if not (1 <= int(pd.level) <= 100):
+        raise ValueError(f"Nivel fuera de rango: {pd.level}")
+    return {
+        "name": normalize_species_name(pd.name, pd.ability, pd.gender),
+        "gender": pd.gender,
+        "item": pd.item,
+        "ability": pd.ability,
+        "level": int(pd.level),
+        "tera_type": pd.tera_type,
+        "nature": pd.nature,
+        "evs": pd.evs,
+        "ivs": pd.ivs,
+        "moves": pd.moves,
+        "raw_text": block,
+    }
+
+
+def _parse_safe(block: str) -> tuple[Optional[dict], Optional[str]]:
+    # a nivel de módulo para poder mandarla a otros procesos
+    try:
+        return parse_block(block), None
+    except Exception as e:
+        return None, str(e) or e.__class__.__name__
+
+
+def parse_blocks(blocks: list[str], workers: int = 1,
+                 progress: Optional[Progress] = None) -> list[tuple[Optional[dict], Optional[str]]]:
+    """[(entrada, None) | (None, error)] en el mismo orden que `blocks`."""
+    total = len(blocks)
+    if workers > 1 and total >= PARALLEL_MIN_BLOCKS:
+        chunk = max(1, total // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = []
+            for n, res in enumerate(pool.map(_parse_safe, blocks, chunksize=chunk), 1):
+                results.append(res)
+                if progress and (n % chunk == 0 or n == total):
+                    progress("parse", n, total)
+            return results
+    results = []
+    for n, block in enumerate(blocks, 1):
+        results.append(_parse_safe(block))
+        if progress and (n % 100 == 0 or n == total):
+            progress("parse", n, total)
+    return results
+
+
+# ---------- especies ----------
+def _valid_stats(bs) -> bool:
+    try:
+        return all(isinstance(bs[k], int) and bs[k] > 0 for k in ("HP", "Atk", "Def", "SpA", "SpD", "Spe"))
+    except Exception:
+        return False
+
+
+def resolve_species(refs: dict[str, Optional[str]], *, fetch: bool = True,
+                    progress: Optional[Progress] = None) -> tuple[dict, dict[str, str], int]:
+    """
+    refs: {especie: género}. Devuelve (registro de base stats para las especies
+    que no están en la tabla species, {especie: motivo} de las que no se
+    encontraron, cuántas hubo que traer). Las que faltan en el almacén se piden
+    todas juntas con prefetch().
+    """
+    from ..db.base import session_scope
+    from ..db.models import Species
+
+    with session_scope() as s:
+        in_db = {name for (name,) in s.query(Species.name).filter(Species.name.in_(list(refs)))}
+
+    registry: dict = {}
+    missing: dict[str, Optional[str]] = {}
+    for name, gender in refs.items():
+        if name in in_db:
+            continue
+        bs = data_store.get_base_stats(name)
+        if _valid_stats(bs):
+            registry[name] = bs
+        else:
+            missing[name] = gender
+
+    fetched = 0
+    if missing and fetch:
+        from .prefetch import prefetch
+        rep = prefetch(list(missing.items()), (),
+                       progress=(lambda d, t: progress("species", d, t)) if progress else None)
+        fetched = rep.species
+
+    unresolved: dict[str, str] = {}
+    for name in missing:
+        bs = data_store.get_base_stats(name)
+        if _valid_stats(bs):
+            registry[name] = bs
+        else:
+            unresolved[name] = f"Especie desconocida o sin base stats: {name}"
+    return registry, unresolved, fetched
+
+
+# ---------- importación ----------
+def import_sets(
+    blocks: Iterable[str],
+    *,
+    workers: int = 1,
+    fetch: bool = True,
+    dry_run: bool = False,
+    progress: Optional[Progress] = None,
+) -> ImportReport:
+    """
+    Importa bloques Showdown (ver split_sets). fetch=False no sale a buscar
+    especies desconocidas (quedan como error); dry_run=True parsea y resuelve
+    sin escribir nada.
+    """
+    from ..db.repository import save_pokemon_sets
+
+    t0 = time.perf_counter()
+    blocks = list(blocks)
+    report = ImportReport(total=len(blocks))
+
+    parsed = parse_blocks(blocks, workers=workers, progress=progress)
+    good: list[tuple[int, dict]] = []
+    for i, (block, (entry, err)) in enumerate(zip(blocks, parsed), 1):
+        if entry is None:
+            report.errors.append(SetError(i, block.splitlines()[0] if block else "", err or "No se pudo parsear"))
+        else:
+            good.append((i, entry))
+
+    refs: dict[str, Optional[str]] = {}
+    for _i, e in good:
+        refs.setdefault(e["name"], e["gender"])
+    registry, unresolved, report.fetched_species = resolve_species(refs, fetch=fetch, progress=progress)
+
+    to_save = []
+    for i, e in good:
+        if e["name"] in unresolved:
+            report.errors.append(SetError(i, e["raw_text"].splitlines()[0], unresolved[e["name"]]))
+        else:
+            to_save.append(e)
+    report.errors.sort(key=lambda err: err.index)
+
+    if to_save and not dry_run:
+        report.ids = save_pokemon_sets(
+            to_save, registry,
+            progress=(lambda d, t: progress("insert", d, t)) if progress else None)
+    report.elapsed = time.perf_counter() - t0
+    return report
+
+
+def import_text(text: str, **kwargs) -> ImportReport:
+    return import_sets(split_sets(text), **kwargs)
+
+
+# ---------- consola ----------
+def main(argv: Optional[list[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Importa en bloque sets en formato Showdown.")
+    ap.add_argument("files", nargs="+", help="archivos de texto con sets separados por líneas en blanco ('-' = stdin)")
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="procesos para parsear volcados grandes")
+    ap.add_argument("--no-fetch", action="store_true", help="no pedir especies desconocidas a snapshot/PokéAPI")
+    ap.add_argument("--dry-run", action="store_true", help="parsear y resolver especies sin guardar")
+    args = ap.parse_args(argv)
+
+    from ..db.repository import init_db
+    init_db()
+
+    blocks: list[str] = []
+    for path in args.files:
+        if path == "-":
+            blocks += ["\n".join(lines) for _start, lines in iter_showdown_blocks(sys.stdin)]
+        else:
+            blocks += read_sets(path)
+
+    def _progress(phase, done, total):
+        print(f"  {phase}: {done}/{total}")
+
+    rep = import_sets(blocks, workers=args.workers, fetch=not args.no_fetch,
+                      dry_run=args.dry_run, progress=_progress)
+    verb = "Válidos" if args.dry_run else "Guardados"
+    valid = rep.total - len(rep.errors)
+    print(f"Sets: {rep.total}  {verb}: {valid if args.dry_run else rep.inserted}  Errores: {len(rep.errors)}  "
+          f"Especies descargadas: {rep.fetched_species}  ({rep.elapsed:.2f}s)")
+    for err in rep.errors:
+        print(f"  #{err.index} '{err.header}': {err.message}")
+    return 1 if rep.errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,161 @@
+# pokemon_app/services/ko_probability.py
+"""
+Probabilidad de KO en 1..n turnos a partir de los 16 rolls de daño por golpe.
+
+- Distribuciones convolucionadas con arrays (np.convolve) y memoizadas por
+  (vector de rolls, nº de golpes) / (vector de rolls, pesos de golpes).
+- Daño acumulado entre turnos con chip al final de cada turno: retroceso de
+  Life Orb del defensor (daño) y curación de Grassy Terrain / Leftovers.
+- ko_chances es la función de referencia; ko_chances_batch la aplica a muchas
+  filas y resuelve sin DP las triviales (0 % / 100 %), así la ruta escalar y la
+  vectorizada dan exactamente los mismos números.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Sequence
+
+import numpy as np
+
+ROLLS = tuple(0.85 + i * 0.01 for i in range(16))
+
+_GRASSY = {"grassy", "grassy terrain", "hierba", "campo hierba", "planta"}
+_HEAL_ITEMS = {"leftovers", "restos"}
+_RECOIL_ITEMS = {"life orb", "life-orb", "lifeorb", "vidasfera"}
+
+
+def roll_values(base_damage: float, xmod: float) -> tuple[int, ...]:
+    """Daño de cada uno de los 16 rolls (mismo truncado que single_hit_roll_dist)."""
+    return tuple(int(base_damage * r * xmod) for r in ROLLS)
+
+
+def end_of_turn_chip(hp: int, terrain: str = "", defender_item: str = "") -> tuple[int, int]:
+    """
+    (retroceso, curación) del defensor por turno, en PS:
+    - Life Orb del defensor: pierde floor(hp/10) al atacar.
+    - Grassy Terrain y Leftovers: recupera floor(hp/16) cada uno al final del turno.
+    """
+    item = (defender_item or "").strip().lower()
+    recoil = max(1, hp // 10) if item in _RECOIL_ITEMS else 0
+    heal = 0
+    if (terrain or "").strip().lower() in _GRASSY:
+        heal += max(1, hp // 16)
+    if item in _HEAL_ITEMS:
+        heal += max(1, hp // 16)
+    return recoil, heal
+
+
+# ---------- Distribuciones memoizadas ----------
+def _weights_key(hits_weights: dict) -> tuple:
+    return tuple(sorted((int(h), float(w)) for h, w in hits_weights.items() if h > 0 and w > 0))
+
+
+@lru_cache(maxsize=8192)
+def hit_sum_distribution(rolls: tuple, hits: int) -> tuple[int, np.ndarray]:
+    """
+    Distribución de la suma de `hits` golpes: (daño mínimo, probabilidades).
+    probs[j] = P(suma == mínimo + j). Se construye convolucionando la de hits-1.
+    """
+    lo = min(rolls)
+    one = np.zeros(max(rolls) - lo + 1, dtype=np.float64)
+    for v in rolls:
+        one[v - lo] += 1.0 / len(rolls)
+    if hits <= 1:
+        return lo, one
+    prev_lo, prev = hit_sum_distribution(rolls, hits - 1)
+    return prev_lo + lo, np.convolve(prev, one)
+
+
+@lru_cache(maxsize=8192)
+def turn_distribution(rolls: tuple, weights: tuple) -> tuple[int, np.ndarray]:
+    """Daño de un turno como mezcla de nº de golpes: weights = ((hits, peso), ...)."""
+    parts = [(w, *hit_sum_distribution(rolls, h)) for h, w in weights]
+    lo = min(p[1] for p in parts)
+    hi = max(p[1] + len(p[2]) - 1 for p in parts)
+    out = np.zeros(hi - lo + 1, dtype=np.float64)
+    for w, plo, probs in parts:
+        out[plo - lo: plo - lo + len(probs)] += w * probs
+    return lo, out
+
+
+# ---------- KO en n turnos ----------
+@lru_cache(maxsize=65536)
+def _ko_chances(rolls: tuple, weights: tuple, hp: int, turns: int, recoil: int, heal: int) -> tuple:
+    if hp <= 0:
+        return (1.0,) * turns
+    if not weights:
+        return (0.0,) * turns
+    lo, turn = turn_distribution(rolls, weights)
+    alive = np.zeros(hp, dtype=np.float64)      # alive[d] = P(sigue en pie habiendo recibido d)
+    alive[0] = 1.0
+    out = []
+    for _ in range(turns):
+        # daño del turno
+        conv = np.convolve(alive, turn)
+        nxt = np.zeros(hp, dtype=np.float64)
+        if lo < hp:
+            take = conv[: hp - lo]
+            nxt[lo: lo + len(take)] = take
+        # Life Orb del defensor (puede debilitarlo)
+        if recoil:
+            shifted = np.zeros(hp, dtype=np.float64)
+            if recoil < hp:
+                shifted[recoil:] = nxt[: hp - recoil]
+            nxt = shifted
+        # curación de fin de turno (no baja de 0 daño recibido)
+        if heal and nxt.any():
+            healed = np.zeros(hp, dtype=np.float64)
+            healed[0] = nxt[: heal + 1].sum()
+            healed[1: hp - heal] = nxt[heal + 1:]
+            nxt = healed
+        alive = nxt
+        out.append(1.0 - float(alive.sum()))
+    # redondeo fijo: quita el ruido de coma flotante para que los % sean estables
+    return tuple(min(1.0, max(0.0, round(p, 10))) for p in out)
+
+
+def ko_chances(
+    rolls: Sequence[int],
+    hp: int,
+    hits_weights: dict,
+    turns: int = 3,
+    recoil: int = 0,
+    heal: int = 0,
+) -> tuple:
+    """P(KO en <= t turnos) para t = 1..turns (el chip se aplica al final de cada turno)."""
+    return _ko_chances(tuple(int(v) for v in rolls), _weights_key(hits_weights),
+                       int(hp), int(turns), int(recoil), int(heal))
+
+
+def ko_chances_batch(
+    rolls: np.ndarray,
+    hp: np.ndarray,
+    hits_weights: dict,
+    turns: int = 3,
+    recoil: np.ndarray | None = None,
+    heal: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Versión por filas: rolls (N, 16), hp (N,) -> (N, turns).
+    Filas sin KO posible en `turns` turnos o con KO seguro al primero se resuelven
+    directo; el resto pasa por ko_chances (memoizado).
+    """
+    n = len(hp)
+    out = np.zeros((n, turns), dtype=np.float64)
+    if n == 0:
+        return out
+    recoil = np.zeros(n, dtype=np.int64) if recoil is None else np.asarray(recoil, dtype=np.int64)
+    heal = np.zeros(n, dtype=np.int64) if heal is None else np.asarray(heal, dtype=np.int64)
+    wk = _weights_key(hits_weights)
+    if not wk:
+        return out
+    hmin = min(h for h, _w in wk); hmax = max(h for h, _w in wk)
+    rmin = rolls.min(axis=1); rmax = rolls.max(axis=1)
+
+    sure = (rmin * hmin >= hp)
+    out[sure] = 1.0
+    # cota superior: daño máximo + retroceso acumulado en `turns` turnos sin curar
+    possible = ~sure & ((rmax * hmax + recoil) * turns >= hp)
+    for i in np.flatnonzero(possible):
+        out[i] = _ko_chances(tuple(rolls[i].tolist()), wk, int(hp[i]), turns, int(recoil[i]), int(heal[i]))
+    return out
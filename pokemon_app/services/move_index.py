@@ -0,0 +1,334 @@
+# pokemon_app/services/move_index.py
+"""
+Índice de movimientos por nombre canónico (sin acentos, guiones ni mayúsculas)
+sobre el almacén local. Se construye en la primera consulta, no al importar.
+
+MoveTable (get_move_table) es la versión resuelta para los bucles de cálculo:
+cada movimiento distinto recibe un id entero y sus datos empaquetados (código
+de tipo, potencia, categoría, precisión, spread, preset de golpes), una sola
+vez por proceso. prefill() resuelve de una pasada todos los nombres que va a
+usar un cálculo: los que no están en el almacén se piden juntos con
+prefetch() y el índice se recarga una vez, en lugar de una petición y una
+recarga por cada fallo. Los que no se encuentran quedan anotados y no se
+vuelven a pedir mientras no cambie el almacén.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+_lock = threading.Lock()
+_MOVES_CACHE: Optional[dict] = None
+_MOVES_BY_CANON: dict = {}
+
+
+# movimientos conocidos (almacén local, db/data_store.py)
+def _load_moves():
+    try:
+        from ..db import data_store
+        return data_store.all_moves()
+    except Exception:
+        return {}
+
+def _strip_accents(s: str) -> str:
+    s = unicodedata.normalize("NFD", s)
+    return "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+
+def _canon(s: str) -> str:
+    s = _strip_accents((s or "").strip().lower())
+    s = re.sub(r"[–—\-]+", " ", s)
+    s = re.sub(r"\s+", " ", s)
+    return s
+
+# alias ES → EN (extiéndelo según uses)
+_MOVE_ALIASES = {
+    _canon("A Bocajarro"): "Close Combat",
+    _canon("Puño Férreo"): "Iron Fist",   # (ej. habilidad si la usaras)
+    _canon("Tajo Umbrío"): "Throat Chop",
+    _canon("Cascada"): "Waterfall",
+    _canon("Demolición"): "Brick Break",
+    _canon("Nudo Hierba"): "Grass Knot",
+    # ...
+}
+
+# índice canónico del cache actual
+def _build_index(moves: dict) -> dict:
+    idx = {}
+    for name, meta in moves.items():
+        c = _canon(name)
+        idx[c] = (name, meta)
+        idx[c.replace(" ", "")] = (name, meta)
+    return idx
+
+def _reload() -> None:
+    global _MOVES_CACHE, _MOVES_BY_CANON
+    moves = _load_moves()
+    with _lock:
+        _MOVES_CACHE = moves
+        _MOVES_BY_CANON = _build_index(moves)
+
+def canonical_move_name(name: str) -> str:
+    """Clave canónica de un nombre (con los alias ES -> EN aplicados)."""
+    raw = (name or "").strip()
+    return _canon(_MOVE_ALIASES.get(_canon(raw), raw))
+
+def get_move_info(name: str, fetch: bool = True):
+    """
+    {name, type, power, category, accuracy} o None. Con fetch=False no sale a
+    PokéAPI si el movimiento no está en el almacén.
+    """
+    raw = (name or "").strip()
+    if not raw:
+        return None
+    if _MOVES_CACHE is None:
+        _reload()
+
+    key = canonical_move_name(raw)
+
+    hit = _MOVES_BY_CANON.get(key) or _MOVES_BY_CANON.get(key.replace(" ", ""))
+    meta = None
+    if hit:
+        name, meta = hit
+    elif fetch:
+        # fallback: intentar rellenar desde PokéAPI y recargar una vez
+        try:
+            from .move_provider import ensure_move_in_json
+            ensure_move_in_json(raw)
+            _reload()
+            hit = _MOVES_BY_CANON.get(key) or _MOVES_BY_CANON.get(key.replace(" ", ""))
+            if hit:
+                name, meta = hit
+        except Exception:
+            pass
+
+    if not meta:
+        # último intento exacto (por si el cache viene con capitalización distinta)
+        meta = _MOVES_CACHE.get(raw) or _MOVES_CACHE.get(raw.title())
+        if not meta:
+            return None
+        name = meta.get("name", raw)
+
+    dmgc = (meta.get("damage_class") or "").lower()
+    return {
+        "name": name,
+        "type": meta.get("type", "Normal"),
+        "power": int(meta.get("power") or 0),  # ver nota de Low Kick abajo
+        "category": "Physical" if dmgc.startswith("phys")
+                    else ("Special" if dmgc.startswith("spec") else "Status"),
+        "accuracy": meta.get("accuracy"),
+    }
+
+
+# ---------- tabla de movimientos resueltos ----------
+CAT_PHYSICAL, CAT_SPECIAL, CAT_STATUS = 0, 1, 2
+CATEGORY_NAMES = ("Physical", "Special", "Status")
+
+
+@dataclass(frozen=True, slots=True)
+class ResolvedMove:
+    id: int
+    name: str
+    type_code: int       # services.types.TYPE_ID; -1 si no es uno de ALL_TYPES
+    power: int           # 0 = de estado o potencia variable
+    category: int        # CAT_PHYSICAL | CAT_SPECIAL | CAT_STATUS
+    accuracy: int        # 0 = sin dato (no falla)
+    spread: bool         # golpea a varios objetivos (x0.75 en Dobles)
+    min_hits: int        # preset de battle_calc.resolve_hits en "Auto" y sin ítem
+    max_hits: int
+
+    @property
+    def type(self) -> str:
+        from .types import ALL_TYPES
+        return ALL_TYPES[self.type_code] if self.type_code >= 0 else "???"
+
+    @property
+    def category_name(self) -> str:
+        return CATEGORY_NAMES[self.category]
+
+    @property
+    def multi_hit(self) -> bool:
+        return self.max_hits > 1
+
+    def info(self) -> dict:
+        """Mismo formato que get_move_info."""
+        return {"name": self.name, "type": self.type, "power": self.power,
+                "category": self.category_name, "accuracy": self.accuracy or None}
+
+
+def _pack(move_id: int, info: dict) -> ResolvedMove:
+    from .battle_calc import is_spread_move, resolve_hits
+    from .types import type_id
+
+    name = info.get("name") or ""
+    code = type_id(info.get("type"))
+    cat = info.get("category")
+    min_hits, max_hits, _exp, _mode = resolve_hits(name, "Auto", "")
+    return ResolvedMove(
+        id=move_id, name=name,
+        type_code=-1 if code is None else code,
+        power=int(info.get("power") or 0),
+        category=CATEGORY_NAMES.index(cat) if cat in CATEGORY_NAMES else CAT_STATUS,
+        accuracy=int(info.get("accuracy") or 0),
+        spread=is_spread_move(name),
+        min_hits=min_hits, max_hits=max_hits,
+    )
+
+
+class MoveTable:
+    """
+    Nombre canónico -> ResolvedMove con id entero, memoizado (también los que
+    no existen). lookup(nombre) -> dict como get_move_info; con el de por
+    defecto prefill() pide los que faltan en un solo prefetch().
+    """
+
+    def __init__(self, lookup: Optional[Callable[[str], Optional[dict]]] = None):
+        self._lookup = lookup
+        self._lock = threading.Lock()
+        self._ids: dict[str, int] = {}          # clave canónica consultada -> id
+        self._raw: dict[str, int] = {}          # nombre tal cual -> id (-1 = sin datos); evita canonizar
+        self._by_name: dict[str, int] = {}      # clave canónica del nombre resuelto -> id
+        self._rows: list[ResolvedMove] = []
+        self._missing: set[str] = set()         # sin datos (hasta que cambie el almacén)
+        self._rev: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _info(self, name: str, fetch: bool) -> Optional[dict]:
+        if self._lookup is not None:
+            return self._lookup(name)
+        return get_move_info(name, fetch=fetch)
+
+    def _add(self, key: str, info: Optional[dict]) -> Optional[ResolvedMove]:
+        with self._lock:
+            if not info:
+                self._missing.add(key)
+                return None
+            name_key = canonical_move_name(info.get("name") or key)
+            move_id = self._by_name.get(name_key)
+            if move_id is None:
+                move_id = self._by_name[name_key] = len(self._rows)
+                self._rows.append(_pack(move_id, info))
+            self._ids[key] = move_id
+            return self._rows[move_id]
+
+    def _check_store(self) -> None:
+        """Si el almacén cambió, los que faltaban pueden existir ya."""
+        if self._lookup is not None:
+            return
+        try:
+            from ..db import data_store
+            rev = data_store.revision()
+        except Exception:
+            return
+        if rev != self._rev:
+            with self._lock:
+                self._rev = rev
+                self._missing.clear()
+                self._raw = {k: v for k, v in self._raw.items() if v >= 0}
+
+    # ---------- consultas ----------
+    def resolve(self, name: str, fetch: bool = True) -> Optional[ResolvedMove]:
+        move_id = self._raw.get(name)
+        if move_id is not None:
+            return self._rows[move_id] if move_id >= 0 else None
+        key = canonical_move_name(name)
+        if not key:
+            return None
+        move_id = self._ids.get(key)
+        if move_id is not None:
+            rm = self._rows[move_id]
+        elif key in self._missing:
+            rm = None
+        else:
+            rm = self._add(key, self._info(name, fetch))
+        self._raw[name] = -1 if rm is None else rm.id
+        return rm
+
+    def id_of(self, name: str) -> Optional[int]:
+        rm = self.resolve(name)
+        return None if rm is None else rm.id
+
+    def by_id(self, move_id: int) -> ResolvedMove:
+        return self._rows[move_id]
+
+    def info(self, name: str) -> Optional[dict]:
+        """Sustituto memoizado de get_move_info."""
+        rm = self.resolve(name)
+        return None if rm is None else rm.info()
+
+    # ---------- precarga ----------
+    def prefill(self, names: Iterable[str], fetch: bool = True) -> int:
+        """
+        Resuelve de una vez todos los nombres; devuelve cuántos quedaron sin
+        datos. Los que no están en el almacén se piden juntos (prefetch) y el
+        índice se recarga una sola vez.
+        """
+        self._check_store()
+        pending: dict[str, str] = {}
+        for name in names:
+            if name in self._raw:
+                continue
+            key = canonical_move_name(name)
+            if key and key not in self._ids and key not in self._missing:
+                pending.setdefault(key, (name or "").strip())
+        if not pending:
+            return 0
+        if self._lookup is not None:
+            return sum(self._add(k, self._lookup(n)) is None for k, n in pending.items())
+
+        missing = self._add_found(pending)
+        if missing and fetch:
+            try:
+                from .prefetch import prefetch
+                prefetch((), list(missing.values()))
+            except Exception:
+                pass
+            _reload()
+            missing = self._add_found(missing)
+            try:
+                from ..db import data_store
+                self._rev = data_store.revision()   # lo escribimos nosotros
+            except Exception:
+                pass
+        for key in missing:
+            self._add(key, None)
+        return len(missing)
+
+    def _add_found(self, pending: dict[str, str]) -> dict[str, str]:
+        """Añade los que ya están en el almacén; devuelve los que no."""
+        missing = {}
+        for key, name in pending.items():
+            info = get_move_info(name, fetch=False)
+            if info:
+                self._add(key, info)
+            else:
+                missing[key] = name
+        return missing
+
+    def prefill_db(self, fetch: bool = True) -> int:
+        """prefill() de todos los movimientos que aparecen en los sets guardados."""
+        from sqlalchemy import select
+        from ..db.base import session_scope
+        from ..db.models import Move
+
+        with session_scope() as s:
+            names = s.execute(select(Move.name)).scalars().all()
+        return self.prefill(names, fetch=fetch)
+
+
+_TABLE: Optional[MoveTable] = None
+_TABLE_LOCK = threading.Lock()
+
+
+def get_move_table() -> MoveTable:
+    """Instancia única del proceso."""
+    global _TABLE
+    if _TABLE is None:
+        with _TABLE_LOCK:
+            if _TABLE is None:
+                _TABLE = MoveTable()
+    return _TABLE
@@ -1,8 +1,8 @@
-import json, os, re
-import requests
+import re
 from typing import Optional, Dict
 
-POKEAPI_ROOT_MOVE = "https://pokeapi.co/api/v2/move/"
+from ..db import data_store
+from . import http_client, pokeapi, snapshot
 
 # Mapeos de nombres “Showdown” → slug de PokéAPI (excepciones comunes)
 MOVE_SPECIAL_CASES = {
@@ -35,43 +35,37 @@ def showdown_move_to_slug(name: str) -> str:
     s = re.sub(r"\s+", "-", s)
     return s
 
-def ensure_move_in_json(move_name: str, cache_path: str) -> Dict:
-    """
-    Devuelve dict con:
-      { "name": str, "type": "Fire", "power": int|None, "damage_class": "physical|special|status",
-        "accuracy": int|None }
-    Cachea en JSON local para no golpear PokéAPI siempre.
-    """
-    if os.path.exists(cache_path):
-        with open(cache_path, "r", encoding="utf-8") as f:
-            cache = json.load(f)
-    else:
-        cache = {}
-
-    key = move_name
-    if key in cache and isinstance(cache[key], dict):
-        return cache[key]
-
-    slug = showdown_move_to_slug(move_name)
-    url = POKEAPI_ROOT_MOVE + slug
-    r = requests.get(url, timeout=15)
-    r.raise_for_status()
-    data = r.json()
+def fetch_move_from_api(move_name: str) -> Dict:
+    data = http_client.get_json(pokeapi.endpoint("move", showdown_move_to_slug(move_name)))
+    return move_info_from_payload(move_name, data)
 
+def move_info_from_payload(move_name: str, data: dict) -> Dict:
     mtype = (data["type"]["name"] or "normal").capitalize()
     dmg_class = (data["damage_class"]["name"] or "status").lower()  # "physical"/"special"/"status"
     power = data.get("power", None)  # puede ser null
     acc = data.get("accuracy", None)  # puede ser null
 
-    info = {
+    return {
         "name": move_name,
         "type": mtype,
         "power": power,
         "damage_class": dmg_class,
         "accuracy": acc,
     }
-    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-    cache[key] = info
-    with open(cache_path, "w", encoding="utf-8") as f:
-        json.dump(cache, f, ensure_ascii=False, indent=2)
+
+def ensure_move_in_json(move_name: str, cache_path: Optional[str] = None) -> Dict:
+    """
+    Devuelve dict con:
+      { "name": str, "type": "Fire", "power": int|None, "damage_class": "physical|special|status",
+        "accuracy": int|None }
+    Cachea en el almacén local (db/data_store.py) para no golpear PokéAPI siempre;
+    antes de ir a la red mira el snapshot del paquete (services/snapshot.py).
+    cache_path se ignora; queda por compatibilidad con moves_cache.json.
+    """
+    info = data_store.get_move(move_name)
+    if info:
+        return info
+    snap = snapshot.snapshot_move(showdown_move_to_slug(move_name))
+    info = {**snap, "name": move_name} if snap else fetch_move_from_api(move_name)
+    data_store.upsert_move_data(info)
     return info
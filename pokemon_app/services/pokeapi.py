@@ -0,0 +1,48 @@
+# pokemon_app/services/pokeapi.py
+"""
+URL base de PokéAPI compartida por todos los providers.
+
+Se puede apuntar a otro servidor (un espejo local, o un servidor HTTP con
+respuestas fijas para pruebas) con la variable de entorno POKEAPI_BASE_URL o
+con set_base_url().
+
+Modo offline (POKE_OFFLINE=1 o set_offline_mode(True)): el cliente HTTP no sale a
+la red y los providers resuelven solo con el almacén local y el snapshot del
+paquete (services/snapshot.py).
+"""
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+DEFAULT_BASE_URL = "https://pokeapi.co/api/v2"
+
+_override: Optional[str] = None
+_offline: Optional[bool] = None
+
+
+def base_url() -> str:
+    return (_override or os.environ.get("POKEAPI_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+
+
+def set_base_url(url: Optional[str]) -> None:
+    """Fija la URL base para todo el proceso (None vuelve a la de entorno/por defecto)."""
+    global _override
+    _override = url or None
+
+
+def endpoint(resource: str, slug: str, base: Optional[str] = None) -> str:
+    """endpoint("pokemon", "corviknight") -> <base>/pokemon/corviknight"""
+    return f"{(base or base_url()).rstrip('/')}/{resource}/{slug}"
+
+
+def offline_mode() -> bool:
+    if _offline is not None:
+        return _offline
+    return os.environ.get("POKE_OFFLINE", "").strip().lower() in ("1", "true", "yes", "si", "sí")
+
+
+def set_offline_mode(flag: Optional[bool]) -> None:
+    """True/False fija el modo para el proceso; None vuelve a leer POKE_OFFLINE."""
+    global _offline
+    _offline = flag
@@ -0,0 +1,201 @@
+# pokemon_app/services/prefetch.py
+"""
+Descarga en bloque de datos de PokéAPI hacia el almacén local (db/data_store.py).
+
+En vez de ir pidiendo especies/movimientos de uno en uno a mitad de un cálculo,
+prefetch() pide en paralelo (pool de hilos acotado sobre el cliente HTTP
+compartido, services/http_client.py) todo lo que falta y lo escribe en una sola
+transacción. El cliente limita además las peticiones simultáneas por host. Lo
+que esté en el snapshot del paquete (services/snapshot.py) se copia sin red.
+
+La URL base es configurable (base_url=... o POKEAPI_BASE_URL), así se puede
+apuntar a un servidor local que sirva respuestas fijas.
+
+Uso por consola:
+    python -m pokemon_app.services.prefetch                 # todo lo referenciado en la BD
+    python -m pokemon_app.services.prefetch --species Kingambit "Iron Hands" --moves "Sucker Punch"
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional, Union
+
+from ..db import data_store
+from . import http_client, pokeapi, snapshot
+from .move_provider import move_info_from_payload, showdown_move_to_slug
+from .species_provider import parse_pokemon_payload, showdown_to_pokeapi_slug
+
+log = logging.getLogger(__name__)
+
+SpeciesRef = Union[str, tuple]     # "Kingambit" o ("Basculegion", "F")
+
+
+@dataclass
+class PrefetchReport:
+    species: int = 0                 # especies descargadas y guardadas
+    moves: int = 0
+    skipped: int = 0                 # ya estaban en el almacén
+    failed: list[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+
+# ---------- qué pedir ----------
+def referenced_in_db(session) -> tuple[list[tuple[str, Optional[str]]], list[str]]:
+    """Especies (con género, para las formas que dependen de él) y movimientos usados por los sets."""
+    from ..db.models import PokemonSet, Species
+    species: dict[str, Optional[str]] = {}
+    moves: dict[str, None] = {}
+    rows = session.query(Species.name, PokemonSet.gender, PokemonSet.moves_json) \
+                  .join(PokemonSet, PokemonSet.species_id == Species.id).all()
+    for name, gender, moves_json in rows:
+        species.setdefault(name, gender)
+        try:
+            for m in json.loads(moves_json or "[]") or []:
+                if m and str(m).strip():
+                    moves.setdefault(str(m).strip(), None)
+        except Exception:
+            continue
+    # especies guardadas sin sets también cuentan
+    for (name,) in session.query(Species.name).all():
+        species.setdefault(name, None)
+    return list(species.items()), list(moves)
+
+
+def _species_ref(ref: SpeciesRef) -> tuple[str, Optional[str]]:
+    if isinstance(ref, (tuple, list)):
+        return str(ref[0]).strip(), (ref[1] if len(ref) > 1 else None)
+    return str(ref).strip(), None
+
+
+def _species_complete(name: str) -> bool:
+    sp = data_store.get_species(name)
+    return bool(sp and sp["stats"] and sp["types"])
+
+
+# ---------- descarga ----------
+def prefetch(
+    species: Iterable[SpeciesRef] = (),
+    moves: Iterable[str] = (),
+    *,
+    base_url: Optional[str] = None,
+    workers: int = 8,
+    force: bool = False,
+    timeout: float = 15.0,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> PrefetchReport:
+    """
+    Descarga las especies/movimientos que falten en el almacén y los guarda de una vez.
+    force=True vuelve a pedir también los que ya están. progress(hechos, total) se
+    llama desde el hilo que invoca prefetch.
+    """
+    t0 = time.perf_counter()
+    report = PrefetchReport()
+    base = (base_url or pokeapi.base_url()).rstrip("/")
+
+    todo: list[tuple[str, str, str]] = []          # (tipo, nombre, url)
+    species_rows: list[dict] = []
+    move_rows: list[dict] = []
+    seen = set()
+    for ref in species:
+        name, gender = _species_ref(ref)
+        if not name or ("species", name.lower()) in seen:
+            continue
+        seen.add(("species", name.lower()))
+        if not force and _species_complete(name):
+            report.skipped += 1
+            continue
+        slug = showdown_to_pokeapi_slug(name, gender)
+        snap = snapshot.snapshot_species(slug)
+        if snap is not None:
+            species_rows.append({"name": name, **snap})
+            continue
+        todo.append(("species", name, pokeapi.endpoint("pokemon", slug, base)))
+    for mv in moves:
+        name = (mv or "").strip()
+        if not name or ("move", name.lower()) in seen:
+            continue
+        seen.add(("move", name.lower()))
+        if not force and data_store.get_move(name):
+            report.skipped += 1
+            continue
+        slug = showdown_move_to_slug(name)
+        snap = snapshot.snapshot_move(slug)
+        if snap is not None:
+            move_rows.append({**snap, "name": name})
+            continue
+        todo.append(("move", name, pokeapi.endpoint("move", slug, base)))
+
+    client = http_client.get_client()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="prefetch") as pool:
+        futures = {pool.submit(client.get_json, url, timeout): (kind, name) for kind, name, url in todo}
+        for done, fut in enumerate(as_completed(futures), 1):
+            kind, name = futures[fut]
+            try:
+                data = fut.result()
+                if kind == "species":
+                    species_rows.append({"name": name, **parse_pokemon_payload(data)})
+                else:
+                    move_rows.append(move_info_from_payload(name, data))
+            except Exception as e:
+                log.warning("prefetch: no pude obtener %s '%s': %s", kind, name, e)
+                report.failed.append(f"{kind}:{name}")
+            if progress:
+                progress(done, len(todo))
+
+    # una sola transacción para todo lo descargado
+    data_store.store_batch(species_rows, move_rows)
+    report.species = len(species_rows)
+    report.moves = len(move_rows)
+    report.elapsed = time.perf_counter() - t0
+    return report
+
+
+def prefetch_db_references(**kwargs) -> PrefetchReport:
+    """prefetch() de todas las especies y movimientos que aparecen en los sets guardados."""
+    from ..db.base import session_scope
+    with session_scope() as s:
+        species, moves = referenced_in_db(s)
+    return prefetch(species, moves, **kwargs)
+
+
+# ---------- consola ----------
+def main(argv: Optional[list[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Descarga en bloque datos de PokéAPI al almacén local.")
+    ap.add_argument("--species", nargs="*", default=None, help="especies a descargar (por defecto: las de la BD)")
+    ap.add_argument("--moves", nargs="*", default=None, help="movimientos a descargar (por defecto: los de la BD)")
+    ap.add_argument("--base-url", default=None, help=f"URL base de la API (por defecto {pokeapi.DEFAULT_BASE_URL})")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--force", action="store_true", help="volver a pedir aunque ya estén guardados")
+    args = ap.parse_args(argv)
+
+    from ..db.base import session_scope
+    from ..db.repository import init_db
+    init_db()
+
+    species, moves = args.species, args.moves
+    if species is None or moves is None:
+        with session_scope() as s:
+            db_species, db_moves = referenced_in_db(s)
+        species = db_species if species is None else species
+        moves = db_moves if moves is None else moves
+
+    def _progress(done, total):
+        if done == total or done % 25 == 0:
+            print(f"  {done}/{total}")
+
+    rep = prefetch(species, moves, base_url=args.base_url, workers=args.workers,
+                   force=args.force, progress=_progress)
+    print(f"Especies: {rep.species}  Movimientos: {rep.moves}  Ya estaban: {rep.skipped}  "
+          f"Fallos: {len(rep.failed)}  ({rep.elapsed:.2f}s)")
+    for f in rep.failed:
+        print("  fallo:", f)
+    return 1 if rep.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,288 @@
+# pokemon_app/services/snapshot.py
+"""
+Snapshot de datos de referencia que viaja con el paquete (data/dex_snapshot.sqlite).
+
+Es un SQLite de solo lectura, compacto (tablas WITHOUT ROWID + VACUUM) y
+versionado (tabla meta), con especies (stats, tipos, peso, habilidades),
+movimientos y learnsets de una generación. Los providers lo consultan antes de
+ir a la red; en modo offline (pokeapi.offline_mode()) es la única fuente.
+
+Se construye sin red a partir de un volcado local con la estructura de
+PokéAPI/api-data (<dump>/pokemon/<id>/index.json, <dump>/move/<id>/index.json;
+también vale <dump>/pokemon/<slug>.json):
+
+    python -m pokemon_app.services.snapshot build /ruta/a/api-data/data/api/v2
+    python -m pokemon_app.services.snapshot info
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, Optional
+
+SNAPSHOT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "dex_snapshot.sqlite"))
+FORMAT_VERSION = 1
+
+# version groups de cada generación (para filtrar learnsets y especies)
+GENERATION_VERSION_GROUPS = {
+    9: {"scarlet-violet", "the-teal-mask", "the-indigo-disk"},
+}
+
+_STATS_MAP = {"hp": "hp", "attack": "atk", "defense": "def",
+              "special-attack": "spa", "special-defense": "spd", "speed": "spe"}
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+CREATE TABLE species (
+    slug TEXT PRIMARY KEY, name TEXT NOT NULL,
+    hp INTEGER, atk INTEGER, def INTEGER, spa INTEGER, spd INTEGER, spe INTEGER,
+    type1 TEXT, type2 TEXT, weight_kg REAL
+) WITHOUT ROWID;
+CREATE TABLE abilities (
+    slug TEXT NOT NULL, ability TEXT NOT NULL, is_hidden INTEGER NOT NULL,
+    PRIMARY KEY (slug, ability)
+) WITHOUT ROWID;
+CREATE TABLE moves (
+    slug TEXT PRIMARY KEY, name TEXT NOT NULL, type TEXT, power INTEGER,
+    damage_class TEXT, accuracy INTEGER
+) WITHOUT ROWID;
+CREATE TABLE learnsets (
+    slug TEXT NOT NULL, move TEXT NOT NULL,
+    PRIMARY KEY (slug, move)
+) WITHOUT ROWID;
+"""
+
+
+# ---------- construcción ----------
+def _iter_resource(dump_dir: Path, resource: str) -> Iterator[dict]:
+    base = dump_dir / resource
+    if not base.is_dir():
+        return
+    for path in sorted(base.rglob("*.json")):
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            continue
+        if isinstance(data, dict) and data.get("name") and "results" not in data:
+            yield data
+
+
+def _english_name(data: dict) -> str:
+    for n in data.get("names") or []:
+        if (n.get("language") or {}).get("name") == "en" and n.get("name"):
+            return n["name"]
+    return data["name"].replace("-", " ").title()
+
+
+def build_snapshot(dump_dir: str, out_path: str = SNAPSHOT_PATH, generation: int = 9,
+                   version: Optional[str] = None) -> dict:
+    """
+    Genera el snapshot desde un volcado local. Solo entran las especies con
+    learnset en los version groups de `generation` (todas si no hay mapa para
+    ella). Escribe a un temporal y lo renombra: el archivo anterior sigue válido
+    hasta el final. Devuelve los conteos.
+    """
+    dump = Path(dump_dir)
+    groups = GENERATION_VERSION_GROUPS.get(generation)
+    tmp = out_path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    counts = {"species": 0, "moves": 0, "learnsets": 0, "abilities": 0}
+    try:
+        conn.executescript(_SCHEMA)
+        learned_moves: set[str] = set()
+        for p in _iter_resource(dump, "pokemon"):
+            moves = set()
+            for m in p.get("moves") or []:
+                mname = (m.get("move") or {}).get("name")
+                vgs = {(d.get("version_group") or {}).get("name") for d in m.get("version_group_details") or []}
+                if mname and (groups is None or vgs & groups):
+                    moves.add(mname)
+            if groups is not None and not moves:
+                continue        # la especie/forma no está en esta generación
+            stats = {_STATS_MAP[s["stat"]["name"]]: int(s["base_stat"])
+                     for s in p.get("stats") or [] if s.get("stat", {}).get("name") in _STATS_MAP}
+            if len(stats) < 6:
+                continue
+            types = [t["type"]["name"].capitalize()
+                     for t in sorted(p.get("types") or [], key=lambda t: t.get("slot", 0))]
+            weight = p.get("weight")
+            slug = p["name"]
+            conn.execute(
+                "INSERT OR REPLACE INTO species VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                (slug, slug.replace("-", " ").title().replace(" ", "-"),
+                 stats["hp"], stats["atk"], stats["def"], stats["spa"], stats["spd"], stats["spe"],
+                 types[0] if types else None, types[1] if len(types) > 1 else None,
+                 (weight / 10.0) if isinstance(weight, (int, float)) else None))
+            for a in p.get("abilities") or []:
+                aname = (a.get("ability") or {}).get("name")
+                if aname:
+                    conn.execute("INSERT OR REPLACE INTO abilities VALUES (?,?,?)",
+                                 (slug, aname.replace("-", " ").title(), int(bool(a.get("is_hidden")))))
+                    counts["abilities"] += 1
+            conn.executemany("INSERT OR IGNORE INTO learnsets VALUES (?,?)", [(slug, m) for m in sorted(moves)])
+            counts["learnsets"] += len(moves)
+            learned_moves |= moves
+            counts["species"] += 1
+
+        for m in _iter_resource(dump, "move"):
+            # con filtro de generación solo entran los movimientos que alguien aprende en ella
+            if groups is not None and learned_moves and m["name"] not in learned_moves:
+                continue
+            conn.execute(
+                "INSERT OR REPLACE INTO moves VALUES (?,?,?,?,?,?)",
+                (m["name"], _english_name(m),
+                 ((m.get("type") or {}).get("name") or "normal").capitalize(),
+                 m.get("power"),
+                 ((m.get("damage_class") or {}).get("name") or "status").lower(),
+                 m.get("accuracy")))
+            counts["moves"] += 1
+
+        meta = {
+            "format": str(FORMAT_VERSION),
+            "version": version or datetime.now(timezone.utc).strftime("%Y%m%d"),
+            "generation": str(generation),
+            "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "source": str(dump.resolve()),
+            **{f"count_{k}": str(v) for k, v in counts.items()},
+        }
+        conn.executemany("INSERT INTO meta VALUES (?,?)", list(meta.items()))
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp, out_path)
+    reset_snapshot()
+    return counts
+
+
+# ---------- lectura ----------
+class Snapshot:
+    """Lector de solo lectura; una conexión compartida protegida con un lock."""
+
+    def __init__(self, path: str = SNAPSHOT_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.meta = dict(self._query("SELECT key, value FROM meta"))
+        if int(self.meta.get("format", 0)) != FORMAT_VERSION:
+            self._conn.close()
+            raise ValueError(f"Formato de snapshot no soportado: {self.meta.get('format')}")
+
+    def _query(self, sql: str, args: tuple = ()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    def species(self, slug: str) -> Optional[dict]:
+        """Mismo formato que species_provider.parse_pokemon_payload (None si no está)."""
+        rows = self._query("SELECT hp, atk, def, spa, spd, spe, type1, type2, weight_kg "
+                           "FROM species WHERE slug = ?", (slug,))
+        if not rows:
+            return None
+        hp, atk, df, spa, spd, spe, t1, t2, weight = rows[0]
+        return {
+            "stats": {"HP": hp, "Atk": atk, "Def": df, "SpA": spa, "SpD": spd, "Spe": spe},
+            "types": [t for t in (t1, t2) if t],
+            "weight_kg": weight,
+            "abilities": [(a, bool(h)) for a, h in
+                          self._query("SELECT ability, is_hidden FROM abilities WHERE slug = ?", (slug,))],
+        }
+
+    def move(self, slug: str) -> Optional[dict]:
+        """Mismo formato que move_provider.move_info_from_payload (None si no está)."""
+        rows = self._query("SELECT name, type, power, damage_class, accuracy FROM moves WHERE slug = ?", (slug,))
+        if not rows:
+            return None
+        name, mtype, power, dmg_class, acc = rows[0]
+        return {"name": name, "type": mtype, "power": power, "damage_class": dmg_class, "accuracy": acc}
+
+    def learnset(self, slug: str) -> Optional[list[str]]:
+        """Slugs de los movimientos aprendibles (None si la especie no está)."""
+        moves = [m for (m,) in self._query("SELECT move FROM learnsets WHERE slug = ?", (slug,))]
+        return moves or None
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_SNAPSHOT: Optional[Snapshot] = None
+_SNAPSHOT_LOADED = False
+_SNAPSHOT_LOCK = threading.Lock()
+
+
+def get_snapshot() -> Optional[Snapshot]:
+    """Snapshot del paquete, o None si no se generó (o no se puede abrir)."""
+    global _SNAPSHOT, _SNAPSHOT_LOADED
+    if not _SNAPSHOT_LOADED:
+        with _SNAPSHOT_LOCK:
+            if not _SNAPSHOT_LOADED:
+                path = os.environ.get("POKE_SNAPSHOT_PATH") or SNAPSHOT_PATH
+                try:
+                    _SNAPSHOT = Snapshot(path) if os.path.exists(path) else None
+                except Exception:
+                    _SNAPSHOT = None
+                _SNAPSHOT_LOADED = True
+    return _SNAPSHOT
+
+
+def reset_snapshot() -> None:
+    """Cierra el snapshot abierto; la próxima consulta lo vuelve a abrir."""
+    global _SNAPSHOT, _SNAPSHOT_LOADED
+    with _SNAPSHOT_LOCK:
+        if _SNAPSHOT is not None:
+            _SNAPSHOT.close()
+        _SNAPSHOT, _SNAPSHOT_LOADED = None, False
+
+
+def snapshot_species(slug: str) -> Optional[dict]:
+    snap = get_snapshot()
+    return snap.species(slug) if snap else None
+
+
+def snapshot_move(slug: str) -> Optional[dict]:
+    snap = get_snapshot()
+    return snap.move(slug) if snap else None
+
+
+def snapshot_learnset(slug: str) -> Optional[list[str]]:
+    snap = get_snapshot()
+    return snap.learnset(slug) if snap else None
+
+
+# ---------- consola ----------
+def main(argv: Optional[list[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Snapshot offline de datos de PokéAPI.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="genera el snapshot desde un volcado local (sin red)")
+    b.add_argument("dump_dir")
+    b.add_argument("--out", default=SNAPSHOT_PATH)
+    b.add_argument("--generation", type=int, default=9)
+    b.add_argument("--version", default=None)
+    i = sub.add_parser("info", help="muestra la versión y los conteos del snapshot")
+    i.add_argument("--path", default=SNAPSHOT_PATH)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "build":
+        counts = build_snapshot(args.dump_dir, args.out, args.generation, args.version)
+        size = os.path.getsize(args.out)
+        print(f"{args.out}: {counts} ({size / 1024:.0f} KiB)")
+        return 0
+    if not os.path.exists(args.path):
+        print(f"No hay snapshot en {args.path}")
+        return 1
+    snap = Snapshot(args.path)
+    for k, v in sorted(snap.meta.items()):
+        print(f"{k}: {v}")
+    snap.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
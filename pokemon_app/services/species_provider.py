@@ -1,8 +1,9 @@
-import json, os, re
+import re
 from typing import Dict, Optional
-import requests
 
-POKEAPI_ROOT = "https://pokeapi.co/api/v2/pokemon/"
+from ..db import data_store
+from . import http_client, pokeapi, snapshot
+
 
 SPECIAL_CASES = {
     ("indeedee", "F"): "indeedee-female",
@@ -71,57 +72,68 @@ def showdown_to_pokeapi_slug(name: str, gender: Optional[str]) -> str:
     slug = NAME_ONLY_CASES.get(slug, slug)
     return slug
 
-def fetch_base_stats_from_api(slug: str) -> Dict[str, int]:
-    url = POKEAPI_ROOT + slug
-    r = requests.get(url, timeout=15)
-    r.raise_for_status()
-    data = r.json()
-    stats_map = {"hp":"HP","attack":"Atk","defense":"Def","special-attack":"SpA","special-defense":"SpD","speed":"Spe"}
+_STATS_MAP = {"hp":"HP","attack":"Atk","defense":"Def","special-attack":"SpA","special-defense":"SpD","speed":"Spe"}
+
+def fetch_pokemon_from_api(slug: str) -> dict:
+    return http_client.get_json(pokeapi.endpoint("pokemon", slug))
+
+def _stats_from_payload(data: dict) -> Dict[str, int]:
     out = {}
     for stat_obj in data["stats"]:
-        k = stats_map[stat_obj["stat"]["name"]]
+        k = _STATS_MAP[stat_obj["stat"]["name"]]
         out[k] = int(stat_obj["base_stat"])
     return out
 
-def ensure_species_in_json(name: str, gender: Optional[str], base_stats_json_path: str) -> Dict[str, int]:
-    if os.path.exists(base_stats_json_path):
-        with open(base_stats_json_path, "r", encoding="utf-8") as f:
-            registry = json.load(f)
-    else:
-        registry = {}
-    if name in registry and all(k in registry[name] for k in ("HP","Atk","Def","SpA","SpD","Spe")):
-        return registry[name]
-    slug = showdown_to_pokeapi_slug(name, gender)
-    stats = fetch_base_stats_from_api(slug)
-    registry[name] = stats
-    os.makedirs(os.path.dirname(base_stats_json_path), exist_ok=True)
-    with open(base_stats_json_path, "w", encoding="utf-8") as f:
-        json.dump(registry, f, ensure_ascii=False, indent=2)
-    return stats
-
-# --- NUEVO: cache de tipos ---
-def ensure_types_in_json(name: str, gender: Optional[str], types_json_path: str) -> list[str]:
+def parse_pokemon_payload(data: dict) -> dict:
+    """Lo útil de /pokemon/<slug>: stats, tipos, peso (kg) y habilidades [(nombre, oculta)]."""
+    weight = data.get("weight")   # hectogramos
+    return {
+        "stats": _stats_from_payload(data),
+        "types": [t["type"]["name"].capitalize() for t in data.get("types", [])],
+        "weight_kg": (weight / 10.0) if isinstance(weight, (int, float)) else None,
+        "abilities": [(a["ability"]["name"].replace("-", " ").title(), bool(a.get("is_hidden")))
+                      for a in data.get("abilities", []) if a.get("ability", {}).get("name")],
+    }
+
+def _store_info(name: str, info: dict) -> None:
+    """Guarda de una vez stats, tipos, peso y habilidades (formato de parse_pokemon_payload)."""
+    data_store.upsert_species_data(name, stats=info["stats"], types=info["types"] or None,
+                                   weight_kg=info["weight_kg"])
+    if info["abilities"]:
+        data_store.set_abilities(name, info["abilities"])
+
+def resolve_pokemon(name: str, gender: Optional[str]) -> dict:
     """
-    Devuelve ['Steel','Flying'] por ejemplo. Cachea en JSON para no golpear PokéAPI cada vez.
+    Datos de la especie desde el snapshot del paquete o, si no está, desde PokéAPI
+    (en modo offline esto último lanza http_client.Offline). Se guardan en el almacén.
     """
-    if os.path.exists(types_json_path):
-        with open(types_json_path, "r", encoding="utf-8") as f:
-            cache = json.load(f)
-    else:
-        cache = {}
+    slug = showdown_to_pokeapi_slug(name, gender)
+    info = snapshot.snapshot_species(slug)
+    if info is None:
+        info = parse_pokemon_payload(fetch_pokemon_from_api(slug))
+    _store_info(name, info)
+    return info
 
-    if name in cache and isinstance(cache[name], list) and cache[name]:
-        return cache[name]
+def fetch_base_stats_from_api(slug: str) -> Dict[str, int]:
+    return _stats_from_payload(fetch_pokemon_from_api(slug))
 
-    slug = showdown_to_pokeapi_slug(name, gender)
-    url = POKEAPI_ROOT + slug
-    r = requests.get(url, timeout=15)
-    r.raise_for_status()
-    data = r.json()
-    types = [t["type"]["name"].capitalize() for t in data.get("types", [])]  # ej ['Steel','Flying']
-    cache[name] = types
-
-    os.makedirs(os.path.dirname(types_json_path), exist_ok=True)
-    with open(types_json_path, "w", encoding="utf-8") as f:
-        json.dump(cache, f, ensure_ascii=False, indent=2)
-    return types
+def ensure_species_in_json(name: str, gender: Optional[str], base_stats_json_path: Optional[str] = None) -> Dict[str, int]:
+    """
+    Base stats de la especie desde el almacén local (db/data_store.py); si faltan,
+    se toman del snapshot o de PokéAPI y se guardan. base_stats_json_path ya no se
+    usa (los JSON de data/ solo se importan una vez); se mantiene por compatibilidad.
+    """
+    stats = data_store.get_base_stats(name)
+    if stats:
+        return stats
+    return resolve_pokemon(name, gender)["stats"]
+
+# --- cache de tipos (almacén local) ---
+def ensure_types_in_json(name: str, gender: Optional[str], types_json_path: Optional[str] = None) -> list[str]:
+    """
+    Devuelve ['Steel','Flying'] por ejemplo. Cachea en el almacén local para no golpear PokéAPI cada vez.
+    """
+    types = data_store.get_types(name)
+    if types:
+        return types
+    return resolve_pokemon(name, gender)["types"]  # ej ['Steel','Flying']
@@ -0,0 +1,287 @@
+# pokemon_app/services/speed_index.py
+"""
+Índice de tiers de velocidad sobre todos los sets guardados.
+
+Se construye una vez (load_set_records) y se reconstruye solo cuando cambian
+los sets (repository.sets_generation()). Para cada combinación de
+modificadores (etapas, Tailwind, parálisis, selector de habilidad/clima e
+ítems de cada set: Scarf, Iron Ball...) guarda la lista de velocidades
+finales ordenada; la combinación se calcula la primera vez que se pide y
+queda memoizada. Así las preguntas típicas son bisect en vez de recalcular:
+
+    idx = get_speed_index()
+    mods = SpeedMods(tailwind=True)
+    idx.count_slower(187, mods)            # ¿a cuántos sets supera 187 de Vel?
+    idx.tie_range(187, mods)               # (desde, hasta) de los que empatan
+    idx.rows_between(150, 200, mods)       # filas con Vel final en [150, 200]
+    idx.min_evs_to_outspeed(100, 50, "Jolly", 31, idx.speed_of(12, mods))
+
+La velocidad final por fila usa exactamente la misma expresión que la pestaña
+de Velocidad (mismo orden de multiplicaciones y truncado).
+"""
+from __future__ import annotations
+
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, replace
+from typing import Iterable, Optional
+
+from .calculations import calc_stat
+from ..utils.species_normalize import normalize_species_name
+
+EV_STEPS = tuple(range(0, 253, 4))
+
+# selector de la pestaña -> habilidad de la fila que dobla la velocidad
+_WEATHER_ABILITIES = {
+    "Swift Swim (Lluvia)": "swift swim",
+    "Chlorophyll (Sol)": "chlorophyll",
+    "Sand Rush (Tormenta Arena)": "sand rush",
+    "Slush Rush (Nieve)": "slush rush",
+}
+_HALF_SPEED_ITEMS = {
+    "iron ball", "ironball", "macho brace", "machobrace",
+    "power anklet", "poweranklet", "power band", "powerband",
+    "power belt", "powerbelt", "power bracer", "powerbracer",
+    "power lens", "powerlens", "power weight", "powerweight",
+}
+
+
+# ---------- multiplicadores ----------
+def stage_multiplier(stage) -> float:
+    try:
+        s = int(stage)
+    except Exception:
+        s = 0
+    s = max(-6, min(6, s))
+    if s >= 0:
+        return (2 + s) / 2.0
+    return 2.0 / (2 - s)
+
+def item_speed_mult(item_name: Optional[str], species_name: Optional[str]) -> float:
+    name = (item_name or "").strip().lower()
+    if not name:
+        return 1.0
+    if name in {"choice scarf", "choicescarf"}:
+        return 1.5
+    if name in _HALF_SPEED_ITEMS:
+        return 0.5
+    if name in {"quick powder", "quickpowder"} and (species_name or "").strip().lower() == "ditto":
+        return 2.0
+    return 1.0
+
+def climate_ability_mult(selected_label: Optional[str], ability_name: Optional[str]) -> float:
+    """x2 solo si el selector climático está activo y la fila tiene esa habilidad."""
+    target = _WEATHER_ABILITIES.get((selected_label or "").strip())
+    if target and (ability_name or "").strip().lower() == target:
+        return 2.0
+    return 1.0
+
+def unburden_speed_mult(selected_label: Optional[str], row_ability: Optional[str]) -> float:
+    """x2 solo con el selector en 'Unburden (Objeto consumido)' y la fila con Unburden/Liviano."""
+    if (selected_label or "").strip().lower().startswith("unburden"):
+        return 2.0 if (row_ability or "").strip().lower() in {"unburden", "liviano"} else 1.0
+    return 1.0
+
+
+@dataclass(frozen=True)
+class SpeedMods:
+    """Una combinación de modificadores (clave de las tablas ordenadas)."""
+    stage: int = 0
+    tailwind: bool = False
+    paralysis: bool = False
+    ability: str = "—"          # selector de habilidad/efecto de la pestaña
+    items: bool = True          # aplicar el ítem de cada set (Scarf, Iron Ball...)
+
+    @property
+    def stage_mult(self) -> float:
+        return stage_multiplier(self.stage)
+
+    @property
+    def tailwind_mult(self) -> float:
+        return 2.0 if self.tailwind else 1.0
+
+    @property
+    def para_mult(self) -> float:
+        return 0.5 if self.paralysis else 1.0
+
+
+@dataclass(frozen=True, slots=True)
+class SpeedRow:
+    id: int
+    species: str                # nombre guardado
+    display: str                # normalize_species_name (lo que enseña la tabla)
+    nature: str
+    item: str
+    ability: str
+    base: int
+    iv: int
+    ev: int
+    calc: int                   # Spe sin modificadores
+    item_mult: float
+
+
+def like_matcher(pattern: str):
+    """Patrón LIKE ('%' y '_') -> función que lo evalúa sin distinguir mayúsculas."""
+    rx = "".join(".*" if ch == "%" else "." if ch == "_" else re.escape(ch) for ch in pattern)
+    return re.compile(rx, re.IGNORECASE | re.DOTALL).fullmatch
+
+
+def row_from_record(rec) -> SpeedRow:
+    """SetRecord (db/set_records.py) -> SpeedRow."""
+    return SpeedRow(
+        id=rec.id, species=rec.species,
+        display=normalize_species_name(rec.species, rec.ability or None, rec.gender),
+        nature=rec.nature or "", item=rec.item, ability=rec.ability,
+        base=rec.base[5], iv=rec.ivs[5], ev=rec.evs[5], calc=rec.stats[5],
+        item_mult=item_speed_mult(rec.item, rec.species),
+    )
+
+
+class SpeedTierIndex:
+    """Velocidades finales ordenadas por combinación de modificadores, con consultas por bisect."""
+
+    def __init__(self, rows: Iterable[SpeedRow], generation: Optional[int] = None):
+        self.rows: list[SpeedRow] = list(rows)
+        self.generation = generation
+        self._pos = {r.id: i for i, r in enumerate(self.rows)}
+        self._lock = threading.Lock()
+        self._tiers: dict[SpeedMods, tuple[list[int], list[int], list[int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    # ---------- velocidad de una fila ----------
+    @staticmethod
+    def item_speed(row: SpeedRow, mods: SpeedMods) -> int:
+        """Columna 'Vel (Item)': solo ítem y habilidad climática."""
+        item_mult = row.item_mult if mods.items else 1.0
+        return int(row.calc * item_mult * climate_ability_mult(mods.ability, row.ability))
+
+    @staticmethod
+    def final_speed(row: SpeedRow, mods: SpeedMods) -> int:
+        item_mult = row.item_mult if mods.items else 1.0
+        return int(
+            row.calc * mods.stage_mult * mods.tailwind_mult * mods.para_mult
+            * item_mult * climate_ability_mult(mods.ability, row.ability)
+            * unburden_speed_mult(mods.ability, row.ability)
+        )
+
+    # ---------- tablas ordenadas ----------
+    def tier(self, mods: SpeedMods) -> tuple[list[int], list[int], list[int]]:
+        """(velocidades ascendentes, índice de fila de cada una, velocidad por fila)."""
+        hit = self._tiers.get(mods)
+        if hit is not None:
+            return hit
+        speeds = [self.final_speed(r, mods) for r in self.rows]
+        order = sorted(range(len(speeds)), key=speeds.__getitem__)
+        hit = ([speeds[i] for i in order], order, speeds)
+        with self._lock:
+            return self._tiers.setdefault(mods, hit)
+
+    def warm(self, mods_list: Iterable[SpeedMods]) -> None:
+        for mods in mods_list:
+            self.tier(mods)
+
+    # ---------- consultas ----------
+    def row(self, set_id: int) -> Optional[SpeedRow]:
+        i = self._pos.get(set_id)
+        return None if i is None else self.rows[i]
+
+    def speed_of(self, set_id: int, mods: SpeedMods) -> Optional[int]:
+        i = self._pos.get(set_id)
+        return None if i is None else self.tier(mods)[2][i]
+
+    def count_slower(self, speed: int, mods: SpeedMods) -> int:
+        """Sets a los que supera `speed` (estrictamente más lentos)."""
+        return bisect_left(self.tier(mods)[0], speed)
+
+    def count_faster(self, speed: int, mods: SpeedMods) -> int:
+        sorted_speeds = self.tier(mods)[0]
+        return len(sorted_speeds) - bisect_right(sorted_speeds, speed)
+
+    def tie_range(self, speed: int, mods: SpeedMods) -> tuple[int, int]:
+        """[desde, hasta) en el orden ascendente de los sets con exactamente `speed`."""
+        sorted_speeds = self.tier(mods)[0]
+        return bisect_left(sorted_speeds, speed), bisect_right(sorted_speeds, speed)
+
+    def summary(self, speed: int, mods: SpeedMods) -> dict:
+        lo, hi = self.tie_range(speed, mods)
+        return {"slower": lo, "ties": hi - lo, "faster": len(self.rows) - hi}
+
+    def rows_between(self, vmin: Optional[int], vmax: Optional[int], mods: SpeedMods, *,
+                     species_like: Optional[str] = None,
+                     nature: Optional[str] = None) -> list[tuple[SpeedRow, int]]:
+        """
+        (fila, Vel final) con vmin <= Vel <= vmax (cotas opcionales), en orden
+        ascendente. species_like como ILIKE de list_sets ('%rill%'); nature sin
+        distinguir mayúsculas.
+        """
+        sorted_speeds, order, _speeds = self.tier(mods)
+        lo = bisect_left(sorted_speeds, vmin) if vmin is not None else 0
+        hi = bisect_right(sorted_speeds, vmax) if vmax is not None else len(sorted_speeds)
+        match = like_matcher(species_like) if species_like else None
+        nat = nature.casefold() if nature else None
+        out = []
+        for k in range(lo, hi):
+            row = self.rows[order[k]]
+            if match is not None and not match(row.species):
+                continue
+            if nat is not None and row.nature.casefold() != nat:
+                continue
+            out.append((row, sorted_speeds[k]))
+        return out
+
+    def min_evs_to_outspeed(self, base: int, level: int, nature: Optional[str], iv: int,
+                            target: int, mods: SpeedMods = SpeedMods(),
+                            item: str = "", ability: str = "", species: str = "") -> Optional[int]:
+        """
+        Menos EVs en Velocidad (múltiplos de 4) con los que un set propio supera
+        estrictamente a `target` con `mods`. None si ni con 252 llega.
+        """
+        probe = SpeedRow(id=0, species=species, display=species, nature=nature or "", item=item,
+                         ability=ability, base=base, iv=iv, ev=0, calc=0,
+                         item_mult=item_speed_mult(item, species))
+
+        def speed_with(ev: int) -> int:
+            calc = calc_stat("Spe", base, iv, ev, level, nature)
+            return self.final_speed(replace(probe, calc=calc), mods)
+
+        k = bisect_right(EV_STEPS, target, key=speed_with)
+        return EV_STEPS[k] if k < len(EV_STEPS) else None
+
+
+# ---------- instancia del proceso ----------
+_INDEX: Optional[SpeedTierIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def build_speed_index() -> SpeedTierIndex:
+    from sqlalchemy.orm import Session
+    from ..db.base import engine
+    from ..db.repository import load_set_records, sets_generation
+
+    gen = sets_generation()
+    with Session(engine) as s:
+        records = load_set_records(s, order_by="spe", order_dir="asc")
+    return SpeedTierIndex((row_from_record(r) for r in records), generation=gen)
+
+
+def get_speed_index() -> SpeedTierIndex:
+    """Índice compartido; se reconstruye si hubo escrituras de sets desde la última vez."""
+    global _INDEX
+    from ..db.repository import sets_generation
+
+    idx = _INDEX
+    if idx is not None and idx.generation == sets_generation():
+        return idx
+    with _INDEX_LOCK:
+        if _INDEX is None or _INDEX.generation != sets_generation():
+            _INDEX = build_speed_index()
+        return _INDEX
+
+
+def invalidate() -> None:
+    global _INDEX
+    with _INDEX_LOCK:
+        _INDEX = None
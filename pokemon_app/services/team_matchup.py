@@ -0,0 +1,284 @@
+# pokemon_app/services/team_matchup.py
+"""
+Enfrentamiento equipo contra equipo: para dos equipos de hasta 6 sets
+guardados, el tensor completo atacante × movimiento × defensor en los dos
+sentidos (A ataca a B y B ataca a A).
+
+Lo que no depende del cruce se prepara una sola vez:
+- un SELECT para los dos equipos (load_set_records con ids), con los tipos
+  resueltos una vez por especie/habilidad/género;
+- un DefenderTable por equipo (stats, tipos, bayas, Assault Vest en arrays);
+- cada movimiento distinto se resuelve (get_move_info -> MoveSpec) una vez.
+Cada atacante × movimiento es una pasada de damage_matrix contra la tabla del
+otro equipo, así que los números son los mismos que en la pestaña de Daños.
+
+    m = compute_matchup([1, 2, 3], [4, 5, 6], FieldConditions(doubles=True))
+    m.a_vs_b.max_pct[i, j, k]    # % máximo del movimiento j de A[i] contra B[k]
+    m.b_vs_a.rows(best_only=True)
+
+Uso por consola:
+    python -m pokemon_app.services.team_matchup 1,2,3 4,5,6
+    python -m pokemon_app.services.team_matchup 1,2,3 4,5,6 --doubles --weather Lluvia --best
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass, replace
+from typing import Callable, Iterable, Optional, Sequence
+
+import numpy as np
+
+from .battle_calc import is_spread_move
+from .damage_engine import (
+    FieldConditions, MoveSpec, attacker_from_record, defenders_from_records,
+)
+from .damage_matrix import DefenderTable, compute_damage_matrix
+
+MAX_TEAM = 6
+MAX_MOVES = 4
+NO_KO = 999
+
+
+@dataclass(frozen=True, slots=True)
+class MatchupRow:
+    """Una celda del tensor, lista para pintar."""
+    attacker_id: int
+    attacker: str
+    move: str
+    defender_id: int
+    defender: str
+    min_pct: float
+    max_pct: float
+    ko: str
+    ko_best: int
+    ohko_pct: float
+    ko2_pct: float
+    ko3_pct: float
+
+
+@dataclass(frozen=True)
+class MatchupSide:
+    """
+    Un sentido del enfrentamiento. Los arrays son (atacantes, MAX_MOVES,
+    defensores); los huecos sin movimiento ofensivo valen NaN (y NO_KO en
+    ko_best/ko_worst).
+    """
+    attacker_ids: tuple
+    attackers: tuple             # etiquetas
+    moves: tuple                 # por atacante, nombres de sus movimientos ofensivos
+    defender_ids: tuple
+    defenders: tuple
+    min_pct: np.ndarray          # sin redondear
+    max_pct: np.ndarray
+    ko_best: np.ndarray
+    ko_worst: np.ndarray
+    ohko: np.ndarray             # probabilidades 0..1
+    ko2: np.ndarray
+    ko3: np.ndarray
+
+    @property
+    def shape(self) -> tuple:
+        return self.max_pct.shape
+
+    def best_moves(self) -> np.ndarray:
+        """(atacantes, defensores): índice del movimiento con más % máximo; -1 si no hay ninguno."""
+        filled = np.where(np.isnan(self.max_pct), -np.inf, self.max_pct)
+        best = filled.argmax(axis=1)
+        return np.where(np.isneginf(filled.max(axis=1)), -1, best)
+
+    def rows(self, best_only: bool = False) -> list[MatchupRow]:
+        best = self.best_moves() if best_only else None
+        out = []
+        for i, att in enumerate(self.attackers):
+            for j, move in enumerate(self.moves[i]):
+                for k, dfn in enumerate(self.defenders):
+                    if best is not None and best[i, k] != j:
+                        continue
+                    kb, kw = int(self.ko_best[i, j, k]), int(self.ko_worst[i, j, k])
+                    if kb <= 1:
+                        ko = "OHKO"
+                    elif kb == kw:
+                        ko = f"{kb}HKO"
+                    else:
+                        ko = f"{kb}–{kw}HKO"
+                    out.append(MatchupRow(
+                        attacker_id=self.attacker_ids[i], attacker=att, move=move,
+                        defender_id=self.defender_ids[k], defender=dfn,
+                        min_pct=round(float(self.min_pct[i, j, k]), 1),
+                        max_pct=round(float(self.max_pct[i, j, k]), 1),
+                        ko=ko, ko_best=kb,
+                        ohko_pct=round(float(self.ohko[i, j, k]) * 100.0, 1),
+                        ko2_pct=round(float(self.ko2[i, j, k]) * 100.0, 1),
+                        ko3_pct=round(float(self.ko3[i, j, k]) * 100.0, 1),
+                    ))
+        return out
+
+
+@dataclass(frozen=True)
+class TeamMatchup:
+    a_vs_b: MatchupSide
+    b_vs_a: MatchupSide
+    field: FieldConditions
+
+
+# ---------- movimientos ----------
+def move_spec_from_info(name: str, info: Optional[dict]) -> Optional[MoveSpec]:
+    """dict de move_index.get_move_info -> MoveSpec; None si es de estado o sin potencia fija."""
+    if not info or info.get("category") not in ("Physical", "Special") or not info.get("power"):
+        return None
+    return MoveSpec(name=info.get("name", name), type=info.get("type") or "Normal",
+                    category=info["category"].lower(), power=int(info["power"]))
+
+
+def _resolve_moves(records, get_move_info: Callable[[str], Optional[dict]]) -> list[list[MoveSpec]]:
+    """Movimientos ofensivos de cada set (máx MAX_MOVES); cada nombre distinto se consulta una vez."""
+    cache: dict[str, Optional[MoveSpec]] = {}
+    out = []
+    for rec in records:
+        specs = []
+        for name in rec.moves:
+            key = (name or "").strip().lower()
+            if not key:
+                continue
+            if key not in cache:
+                cache[key] = move_spec_from_info(name, get_move_info(name))
+            if cache[key] is not None:
+                specs.append(cache[key])
+        out.append(specs[:MAX_MOVES])
+    return out
+
+
+# ---------- cálculo ----------
+def _side(att_records, att_moves: list[list[MoveSpec]], def_records, table: DefenderTable,
+          field: FieldConditions, check: Callable[[], None]) -> MatchupSide:
+    shape = (len(att_records), MAX_MOVES, len(def_records))
+    arrays = {k: np.full(shape, np.nan) for k in ("min_pct", "max_pct", "ohko", "ko2", "ko3")}
+    ko_best = np.full(shape, NO_KO, dtype=np.int64)
+    ko_worst = np.full(shape, NO_KO, dtype=np.int64)
+    for i, rec in enumerate(att_records):
+        check()
+        attacker = attacker_from_record(rec)
+        for j, move in enumerate(att_moves[i]):
+            mf = replace(field, spread=field.doubles and is_spread_move(move.name))
+            m = compute_damage_matrix(attacker, move, table, mf)
+            arrays["min_pct"][i, j] = m.min_pct
+            arrays["max_pct"][i, j] = m.max_pct
+            arrays["ohko"][i, j] = m.ohko_prob
+            arrays["ko2"][i, j] = m.ko_n_prob[:, 1]
+            arrays["ko3"][i, j] = m.ko_n_prob[:, 2]
+            ko_best[i, j] = m.ko_best
+            ko_worst[i, j] = m.ko_worst
+    return MatchupSide(
+        attacker_ids=tuple(r.id for r in att_records),
+        attackers=tuple(r.label for r in att_records),
+        moves=tuple(tuple(mv.name for mv in specs) for specs in att_moves),
+        defender_ids=tuple(r.id for r in def_records),
+        defenders=tuple(r.label for r in def_records),
+        ko_best=ko_best, ko_worst=ko_worst, **arrays,
+    )
+
+
+def matchup_from_records(team_a: Sequence, team_b: Sequence, field: FieldConditions = FieldConditions(), *,
+                         get_move_info: Optional[Callable[[str], Optional[dict]]] = None,
+                         check: Optional[Callable[[], None]] = None) -> TeamMatchup:
+    """Igual que compute_matchup pero con SetRecord ya cargados (con tipos)."""
+    if not team_a or not team_b:
+        raise ValueError("Cada equipo necesita al menos un set.")
+    if len(team_a) > MAX_TEAM or len(team_b) > MAX_TEAM:
+        raise ValueError(f"Un equipo tiene como mucho {MAX_TEAM} sets.")
+    if get_move_info is None:
+        from .move_index import get_move_info
+    check = check or (lambda: None)
+
+    table_a = DefenderTable.from_profiles(defenders_from_records(team_a))
+    table_b = DefenderTable.from_profiles(defenders_from_records(team_b))
+    moves_a = _resolve_moves(team_a, get_move_info)
+    moves_b = _resolve_moves(team_b, get_move_info)
+    return TeamMatchup(
+        a_vs_b=_side(team_a, moves_a, team_b, table_b, field, check),
+        b_vs_a=_side(team_b, moves_b, team_a, table_a, field, check),
+        field=field,
+    )
+
+
+def record_types(species: str, ability: Optional[str], gender: Optional[str]) -> list[str]:
+    """get_types por defecto para load_set_records (forma normalizada, índice de tipos)."""
+    from .type_index import get_species_types
+    from ..utils.species_normalize import normalize_species_name
+    return get_species_types(normalize_species_name(species, ability, gender), gender)
+
+
+def load_teams(team_a: Iterable[int], team_b: Iterable[int], *, get_types=None, session=None) -> tuple[list, list]:
+    """Los sets de los dos equipos en un solo SELECT, en el orden pedido. LookupError si falta alguno."""
+    from sqlalchemy.orm import Session
+    from ..db.base import engine
+    from ..db.repository import load_set_records
+
+    team_a, team_b = list(team_a), list(team_b)
+    ids = set(team_a) | set(team_b)
+    if session is None:
+        with Session(engine) as s:
+            records = load_set_records(s, get_types=get_types or record_types, ids=ids)
+    else:
+        records = load_set_records(session, get_types=get_types or record_types, ids=ids)
+    by_id = {r.id: r for r in records}
+    missing = sorted(ids - set(by_id))
+    if missing:
+        raise LookupError(f"Sets inexistentes: {', '.join(f'#{i}' for i in missing)}")
+    return [by_id[i] for i in team_a], [by_id[i] for i in team_b]
+
+
+def compute_matchup(team_a: Iterable[int], team_b: Iterable[int], field: FieldConditions = FieldConditions(), *,
+                    get_move_info: Optional[Callable[[str], Optional[dict]]] = None,
+                    get_types=None, session=None,
+                    check: Optional[Callable[[], None]] = None) -> TeamMatchup:
+    """
+    Tensor completo de dos equipos de sets guardados (ids). `check` se llama
+    entre atacantes (token.check del ComputeExecutor para poder cancelar).
+    """
+    recs_a, recs_b = load_teams(team_a, team_b, get_types=get_types, session=session)
+    return matchup_from_records(recs_a, recs_b, field, get_move_info=get_move_info, check=check)
+
+
+# ---------- consola ----------
+def _parse_ids(text: str) -> list[int]:
+    try:
+        return [int(x) for x in text.replace(" ", "").split(",") if x]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Lista de ids no válida: {text!r}")
+
+
+def _print_side(title: str, side: MatchupSide, best_only: bool) -> None:
+    print(title)
+    for r in side.rows(best_only=best_only):
+        print(f"  {r.attacker:<32} {r.move:<18} -> {r.defender:<32} "
+              f"{r.min_pct:>6.1f}-{r.max_pct:<6.1f}% {r.ko:<9} "
+              f"OHKO {r.ohko_pct:5.1f}%  2HKO {r.ko2_pct:5.1f}%  3HKO {r.ko3_pct:5.1f}%")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Daño de todos los movimientos de un equipo contra otro, en los dos sentidos.")
+    ap.add_argument("team_a", type=_parse_ids, help="ids de sets separados por comas (máx. 6)")
+    ap.add_argument("team_b", type=_parse_ids, help="ids de sets separados por comas (máx. 6)")
+    ap.add_argument("--doubles", action="store_true", help="formato Dobles (spread x0.75, pantallas 2/3)")
+    ap.add_argument("--weather", default="Ninguno", choices=["Ninguno", "Lluvia", "Sol", "Tormenta Arena", "Nieve"])
+    ap.add_argument("--terrain", default="Ninguno", choices=["Ninguno", "Grassy", "Electric", "Psychic", "Misty"])
+    ap.add_argument("--best", action="store_true", help="solo el mejor movimiento de cada atacante por defensor")
+    args = ap.parse_args(argv)
+
+    from ..db.repository import init_db
+    init_db()
+
+    field = FieldConditions(weather=args.weather, terrain=args.terrain, doubles=args.doubles)
+    try:
+        m = compute_matchup(args.team_a, args.team_b, field)
+    except (LookupError, ValueError) as e:
+        print(e)
+        return 1
+    _print_side("A -> B", m.a_vs_b, args.best)
+    _print_side("B -> A", m.b_vs_a, args.best)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+# pokemon_app/services/type_index.py
+"""
+Índice en memoria especie -> tipos, compartido por todo el proceso.
+
+Se carga una vez desde el almacén local (db/data_store.py) y se invalida solo si
+cambia su revisión o si alguien llama a bump(). Las consultas son O(1) sobre un
+dict indexado por el nombre normalizado (normalize_species_name + minúsculas).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Optional
+
+from ..db import data_store
+from ..utils.species_normalize import normalize_species_name
+
+# cada cuánto (s) se vuelve a mirar la revisión del almacén como mucho
+_REV_CHECK_INTERVAL = 1.0
+
+
+def _key(name: str, gender: Optional[str] = None) -> str:
+    return (normalize_species_name((name or "").strip(), None, gender) or "").strip().lower()
+
+
+class SpeciesTypeIndex:
+    """Especie -> tipos con recarga por revisión / bump() y contadores de aciertos."""
+
+    def __init__(self, fetch_missing: bool = True):
+        self.fetch_missing = fetch_missing
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._index: Optional[dict[str, list[str]]] = None
+        self._missing: set[str] = set()     # sin tipos tras intentar PokéAPI (hasta el próximo bump)
+        self._rev: Optional[int] = None
+        self._checked_at = 0.0
+
+    # ---------- carga / invalidación ----------
+    def _load(self) -> None:
+        try:
+            rev = data_store.revision()
+            index = data_store.all_types()
+        except Exception:
+            rev, index = None, {}
+        # las claves del almacén son el nombre en minúsculas; se pasan por _key
+        # para que coincidan con las consultas (Lycanroc -> Lycanroc-Midday, ...)
+        self._index = {_key(k): v for k, v in index.items()}
+        self._missing.clear()
+        self._rev = rev
+        self._checked_at = time.monotonic()
+
+    def _ensure_fresh(self) -> None:
+        if self._index is None:
+            self._load()
+            return
+        now = time.monotonic()
+        if now - self._checked_at < _REV_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        try:
+            rev = data_store.revision()
+        except Exception:
+            return
+        if rev != self._rev:
+            self._load()
+
+    def bump(self) -> None:
+        """Invalida el índice; la próxima consulta recarga desde el almacén."""
+        with self._lock:
+            self._index = None
+
+    # ---------- consultas ----------
+    def lookup(self, species_name: str, gender: Optional[str] = None) -> list[str]:
+        """Tipos capitalizados de la especie (lista vacía si no se conocen)."""
+        key = _key(species_name, gender)
+        if not key:
+            return []
+        with self._lock:
+            self._ensure_fresh()
+            types = self._index.get(key)
+            if types is not None:
+                self.hits += 1
+                return list(types)
+            self.misses += 1
+            if not self.fetch_missing or key in self._missing:
+                return []
+        return self._fetch(species_name, gender, key)
+
+    def _fetch(self, species_name: str, gender: Optional[str], key: str) -> list[str]:
+        # Fuera del lock: PokéAPI puede tardar y no debe bloquear otras consultas
+        try:
+            from .types_provider import ensure_types_in_json
+            types = ensure_types_in_json(normalize_species_name(species_name.strip(), None, gender))
+        except Exception:
+            types = []
+        with self._lock:
+            if types:
+                if self._index is not None:
+                    self._index[key] = list(types)
+                    self._rev = data_store.revision()   # lo escribimos nosotros: no hace falta recargar
+            else:
+                self._missing.add(key)
+        return list(types)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "size": len(self._index or {}),
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+_INDEX: Optional[SpeciesTypeIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_type_index() -> SpeciesTypeIndex:
+    """Instancia única del proceso."""
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                _INDEX = SpeciesTypeIndex()
+    return _INDEX
+
+
+def get_species_types(species_name: str, gender: Optional[str] = None) -> list[str]:
+    return get_type_index().lookup(species_name, gender)
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 from typing import Iterable
 
 ALL_TYPES = [
@@ -30,8 +32,8 @@ TYPE_CHART = {
     "Fairy":   {"Fire":0.5,"Fighting":2.0,"Poison":0.5,"Dragon":2.0,"Dark":2.0,"Steel":0.5},
 }
 
-def type_effectiveness(move_type: str, defender_types: Iterable[str]) -> float:
-    """Devuelve el multiplicador de efectividad combinando los tipos del defensor."""
+def _type_effectiveness_loop(move_type: str, defender_types: Iterable[str]) -> float:
+    """Cálculo directo sobre TYPE_CHART (referencia y fallback para >2 tipos)."""
     mt = (move_type or "").capitalize()
     chart = TYPE_CHART.get(mt, {})
     mult = 1.0
@@ -39,3 +41,91 @@ def type_effectiveness(move_type: str, defender_types: Iterable[str]) -> float:
         m = chart.get((dt or "").capitalize(), 1.0)
         mult *= m
     return mult
+
+
+# ---------- Tabla densa por índices enteros ----------
+# TYPE_ID[nombre] -> 0..18 (mismo orden que ALL_TYPES). Un tipo desconocido no
+# tiene id y se trata como neutro, igual que en type_effectiveness clásico.
+TYPE_ID = {t: i for i, t in enumerate(ALL_TYPES)}
+N_TYPES = len(ALL_TYPES)
+NO_TYPE = N_TYPES                       # hueco para monotipo / tipo desconocido
+N_PAIRS = (N_TYPES + 1) * (N_TYPES + 1)
+
+# CHART_19[atk][def] = multiplicador (19×19; Stellar siempre neutro)
+CHART_19 = [[TYPE_CHART.get(a, {}).get(d, 1.0) for d in ALL_TYPES] for a in ALL_TYPES]
+
+
+def type_id(name: str) -> int | None:
+    return TYPE_ID.get((name or "").capitalize())
+
+
+def pair_code_ids(t1: int, t2: int = NO_TYPE) -> int:
+    """Código de la combinación defensiva (el orden de los tipos no importa)."""
+    if t2 < t1:
+        t1, t2 = t2, t1
+    return t1 * (N_TYPES + 1) + t2
+
+
+def type_pair_code(defender_types: Iterable[str]) -> int | None:
+    """
+    Código entero para una lista de 0, 1 o 2 tipos (tipo Tera = monotipo).
+    Devuelve None si hay más de dos tipos (se resuelve con el bucle clásico).
+    """
+    ids = [type_id(t) for t in (defender_types or [])]
+    ids = [i for i in ids if i is not None]
+    if len(ids) > 2:
+        return None
+    ids += [NO_TYPE] * (2 - len(ids))
+    return pair_code_ids(ids[0], ids[1])
+
+
+def _build_eff_table() -> list[list[float]]:
+    table = []
+    for a in range(N_TYPES):
+        row = CHART_19[a] + [1.0]           # columna extra = sin tipo
+        out = [1.0] * N_PAIRS
+        for t1 in range(N_TYPES + 1):
+            for t2 in range(t1, N_TYPES + 1):
+                out[pair_code_ids(t1, t2)] = row[t1] * row[t2]
+        table.append(out)
+    return table
+
+
+# EFF_TABLE[atk_id][pair_code] = efectividad contra esa combinación
+EFF_TABLE = _build_eff_table()
+
+
+def type_effectiveness(move_type: str, defender_types: Iterable[str]) -> float:
+    """Devuelve el multiplicador de efectividad combinando los tipos del defensor."""
+    a = type_id(move_type)
+    code = type_pair_code(defender_types)
+    if code is None:
+        return _type_effectiveness_loop(move_type, defender_types)
+    if a is None:
+        return 1.0
+    return EFF_TABLE[a][code]
+
+
+_EFF_NP = None
+
+def eff_table_array():
+    """EFF_TABLE como array NumPy (19 × N_PAIRS); se construye la primera vez."""
+    global _EFF_NP
+    if _EFF_NP is None:
+        import numpy as np
+        # fila extra (índice N_TYPES) para movimientos de tipo desconocido: neutro
+        _EFF_NP = np.array(EFF_TABLE + [[1.0] * N_PAIRS], dtype=np.float64)
+    return _EFF_NP
+
+
+def type_effectiveness_batch(move_type_ids, pair_codes):
+    """
+    Versión vectorizada: arrays (broadcastables) de ids de tipo atacante y de
+    códigos de pareja defensiva -> array de multiplicadores.
+    Un id de movimiento < 0 o >= N_TYPES se trata como tipo desconocido (x1).
+    """
+    import numpy as np
+    table = eff_table_array()
+    a = np.asarray(move_type_ids, dtype=np.int64)
+    a = np.where((a < 0) | (a >= N_TYPES), N_TYPES, a)
+    return table[a, np.asarray(pair_codes, dtype=np.int64)]
@@ -1,9 +1,8 @@
 # pokemon_app/services/types_provider.py
-import json
-import os
 import re
 
-import requests
+from ..db import data_store
+from . import http_client, pokeapi, snapshot
 
 
 def _normalize_slug(name: str) -> str:
@@ -58,10 +57,7 @@ def fetch_types_from_pokeapi(species_name: str) -> list[str]:
     Lanza Exception si no se pudo obtener.
     """
     slug = _normalize_slug(species_name)
-    url = f"https://pokeapi.co/api/v2/pokemon/{slug}"
-    r = requests.get(url, timeout=15)
-    r.raise_for_status()
-    data = r.json()
+    data = http_client.get_json(pokeapi.endpoint("pokemon", slug))
     types = []
     for t in data.get("types", []):
         # soporta {"type":{"name":"steel"}}
@@ -74,30 +70,19 @@ def fetch_types_from_pokeapi(species_name: str) -> list[str]:
     return types
 
 
-def ensure_types_in_json(species_name: str, json_path: str) -> list[str]:
+def ensure_types_in_json(species_name: str, json_path: str | None = None) -> list[str]:
     """
-    Asegura que species_name exista en json_path con su lista de tipos.
-    Si no existe, intenta descargar de PokéAPI, almacena en el JSON y devuelve los tipos.
+    Asegura que species_name tenga sus tipos en el almacén local (db/data_store.py).
+    Si no están, intenta descargar de PokéAPI, los guarda y devuelve los tipos.
+    json_path se ignora; queda por compatibilidad con el cache JSON anterior.
     """
-    os.makedirs(os.path.dirname(json_path), exist_ok=True)
-    data = {}
-    if os.path.exists(json_path):
-        try:
-            with open(json_path, "r", encoding="utf-8") as f:
-                data = json.load(f) or {}
-        except Exception:
-            data = {}
-
     # ya está cacheado
-    if species_name in data and isinstance(data[species_name], list) and data[species_name]:
-        return [str(x).capitalize() for x in data[species_name]]
-
-    # intenta obtener de PokéAPI
-    types = fetch_types_from_pokeapi(species_name)
-
-    # guarda
-    data[species_name] = types
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
+    types = data_store.get_types(species_name)
+    if types:
+        return types
+
+    # snapshot del paquete; si no está, PokéAPI (salvo modo offline). Se guarda con upsert atómico
+    snap = snapshot.snapshot_species(_normalize_slug(species_name))
+    types = snap["types"] if snap and snap["types"] else fetch_types_from_pokeapi(species_name)
+    data_store.upsert_species_data(species_name, types=types)
     return types
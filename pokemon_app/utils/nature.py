@@ -28,6 +28,15 @@ NATURE_EFFECTS = {
     "Quirky": (None, None),
 }
 
+# índice fijo de cada naturaleza (tablas vectorizadas: services/calculations.nature_table)
+NATURE_NAMES = tuple(NATURE_EFFECTS)
+NATURE_INDEX = {name: i for i, name in enumerate(NATURE_NAMES)}
+NEUTRAL_NATURE = NATURE_INDEX["Serious"]
+
+def nature_index(nature: str | None) -> int:
+    """Índice en NATURE_NAMES; vacía o desconocida -> una neutra (como nature_multipliers)."""
+    return NATURE_INDEX.get(nature, NEUTRAL_NATURE) if nature else NEUTRAL_NATURE
+
 def nature_multipliers(nature: str | None) -> Dict[str, float]:
     mults = {k: 1.0 for k in ["Atk", "Def", "SpA", "SpD", "Spe"]}
     if not nature:
@@ -0,0 +1,86 @@
+# pokemon_app/utils/startup_timing.py
+"""
+Tiempos de arranque: cuánto tarda cada import diferido y cada fase hasta la
+primera pintura, para detectar regresiones de arranque en frío.
+
+    from pokemon_app.utils import startup_timing as st
+    mod = st.timed_import("pokemon_app.gui.tabs.damage_tab")
+    with st.phase("init_db"):
+        ...
+    st.mark("primera pintura")
+    st.log_report()
+
+El reloj empieza al importar este módulo (lo primero que hace gui/app.py).
+Con POKE_STARTUP_REPORT=1 el informe completo sale a nivel INFO; si no, solo
+el resumen.
+"""
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from types import ModuleType
+
+log = logging.getLogger(__name__)
+
+_T0 = time.perf_counter()
+_entries: list[tuple[str, str, float, float]] = []    # (tipo, etiqueta, inicio desde T0, duración)
+
+
+def elapsed() -> float:
+    return time.perf_counter() - _T0
+
+
+def timed_import(name: str) -> ModuleType:
+    """importlib.import_module con medición (0 s si ya estaba importado)."""
+    if name in sys.modules:
+        return sys.modules[name]
+    t = time.perf_counter()
+    mod = importlib.import_module(name)
+    _entries.append(("import", name, t - _T0, time.perf_counter() - t))
+    return mod
+
+
+@contextmanager
+def phase(label: str):
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        _entries.append(("fase", label, t - _T0, time.perf_counter() - t))
+
+
+def mark(label: str) -> float:
+    """Hito (p.ej. 'primera pintura'): guarda y devuelve los segundos desde el inicio."""
+    now = elapsed()
+    _entries.append(("hito", label, now, 0.0))
+    return now
+
+
+def entries() -> list[tuple[str, str, float, float]]:
+    return list(_entries)
+
+
+def report() -> str:
+    lines = [f"{'tipo':<7}{'inicio ms':>10}{'dur ms':>9}  etiqueta"]
+    for kind, label, start, dur in _entries:
+        lines.append(f"{kind:<7}{start * 1000:>10.1f}{dur * 1000:>9.1f}  {label}")
+    return "\n".join(lines)
+
+
+def summary() -> str:
+    imports = sum(d for k, _l, _s, d in _entries if k == "import")
+    hitos = ", ".join(f"{label} {start * 1000:.0f} ms" for k, label, start, _d in _entries if k == "hito")
+    return f"arranque: {hitos or 'sin hitos'} (imports diferidos {imports * 1000:.0f} ms)"
+
+
+def log_report() -> None:
+    verbose = os.environ.get("POKE_STARTUP_REPORT", "").strip() not in ("", "0")
+    log.info(summary())
+    if verbose:
+        log.info("tiempos de arranque:\n%s", report())
+    else:
+        log.debug("tiempos de arranque:\n%s", report())
@@ -0,0 +1,4 @@
+from pokemon_app.services.prefetch import main
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,12 @@
+# tests/conftest.py
+"""
+Los tests nunca tocan pokemon.db: db/base.py crea el engine al importarse con
+POKE_DB_URL, así que se apunta a una SQLite temporal antes de importar nada
+del paquete.
+"""
+import os
+import tempfile
+
+_TMP = tempfile.TemporaryDirectory(prefix="pokemon_app_tests_")
+os.environ["POKE_DB_URL"] = f"sqlite:///{os.path.join(_TMP.name, 'test.db')}"
+os.environ.pop("POKEAPI_BASE_URL", None)
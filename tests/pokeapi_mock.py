@@ -0,0 +1,132 @@
+# tests/pokeapi_mock.py
+"""
+Servidor local que hace de PokéAPI con respuestas fijas, para probar la descarga
+(services/prefetch.py) sin red. Sirve /pokemon/<slug> y /move/<slug> con el
+mismo formato JSON que la API real (solo los campos que lee el paquete) y
+devuelve 404 para cualquier otra cosa.
+
+    with MockPokeApi() as api:                  # puerto libre en 127.0.0.1
+        prefetch(["Mockachu"], ["Mock Beam"], base_url=api.base_url)
+"""
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+_STAT_NAMES = ("hp", "attack", "defense", "special-attack", "special-defense", "speed")
+
+
+def pokemon_payload(slug: str, stats: tuple, types: tuple, weight_hg: int,
+                    abilities: tuple = (), hidden: Optional[str] = None) -> dict:
+    """Respuesta de /pokemon/<slug> (stats en el orden HP/Atk/Def/SpA/SpD/Spe, tipos en minúsculas)."""
+    abil = [{"ability": {"name": a}, "is_hidden": False, "slot": n} for n, a in enumerate(abilities, 1)]
+    if hidden:
+        abil.append({"ability": {"name": hidden}, "is_hidden": True, "slot": 3})
+    return {
+        "name": slug,
+        "stats": [{"base_stat": v, "effort": 0, "stat": {"name": k}} for k, v in zip(_STAT_NAMES, stats)],
+        "types": [{"slot": n, "type": {"name": t}} for n, t in enumerate(types, 1)],
+        "weight": weight_hg,
+        "abilities": abil,
+    }
+
+
+def move_payload(slug: str, move_type: str, damage_class: str,
+                 power: Optional[int], accuracy: Optional[int]) -> dict:
+    """Respuesta de /move/<slug>."""
+    return {"name": slug, "type": {"name": move_type}, "damage_class": {"name": damage_class},
+            "power": power, "accuracy": accuracy}
+
+
+# nombres inventados: no están en el snapshot ni en los JSON de data/
+FIXTURES: dict[str, dict[str, dict]] = {
+    "pokemon": {
+        "mockachu": pokemon_payload("mockachu", (35, 55, 40, 50, 50, 90), ("electric",), 60,
+                                    ("static",), "lightning-rod"),
+        "testoise": pokemon_payload("testoise", (79, 83, 100, 85, 105, 78), ("water", "steel"), 855,
+                                    ("torrent",), "rain-dish"),
+    },
+    "move": {
+        "mock-beam": move_payload("mock-beam", "electric", "special", 90, 100),
+        "fixture-slam": move_payload("fixture-slam", "steel", "physical", 120, 85),
+        "stub-guard": move_payload("stub-guard", "normal", "status", None, None),
+    },
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+
+    def do_GET(self):
+        parts = self.path.split("?", 1)[0].strip("/").split("/")
+        self.server.count(self.path)
+        data = None
+        if len(parts) == 2:
+            data = self.server.fixtures.get(parts[0], {}).get(parts[1].lower())
+        if data is None:
+            self.send_error(404)
+            return
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):      # sin ruido en stderr
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, fixtures: dict):
+        super().__init__(addr, _Handler)
+        self.fixtures = fixtures
+        self.hits: list[str] = []
+        self._hits_lock = threading.Lock()
+
+    def count(self, path: str) -> None:
+        with self._hits_lock:
+            self.hits.append(path)
+
+
+class MockPokeApi:
+    """Servidor en un hilo aparte; base_url sirve para prefetch(base_url=...) o POKEAPI_BASE_URL."""
+
+    def __init__(self, fixtures: Optional[dict] = None, host: str = "127.0.0.1", port: int = 0):
+        self._server = _Server((host, port), FIXTURES if fixtures is None else fixtures)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def hits(self) -> list[str]:
+        """Rutas pedidas hasta ahora (copia)."""
+        with self._server._hits_lock:
+            return list(self._server.hits)
+
+    def start(self) -> "MockPokeApi":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever,
+                                            name="pokeapi-mock", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "MockPokeApi":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
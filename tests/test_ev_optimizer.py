@@ -0,0 +1,208 @@
+# tests/test_ev_optimizer.py
+"""
+optimize_bulk (breakpoints + barrido con dos punteros + descarte de ataques)
+frente a fuerza bruta sobre todos los repartos HP/Def/SpD en pasos de 4 EVs.
+
+Los casos son aleatorios (semilla fija) y siempre mezclan ataques físicos y
+especiales, que son los que obligan a repartir Def y SpD bajo el tope de 510;
+el primero es fijo (el que antes devolvía None). La fuerza bruta no usa los
+atajos del optimizador: cada (PS, Def/SpD) se evalúa con damage_engine y
+ko_probability directamente. Por cada caso y naturaleza se comprueba que:
+
+- el reparto devuelto aguanta los ataques que dice aguantar, con esa
+  probabilidad, y cabe en el presupuesto;
+- no hay un reparto más barato que aguante esos mismos ataques;
+- si deja alguno fuera, ningún reparto aguanta todos a la vez;
+- si devuelve None, ningún reparto aguanta ni un solo ataque.
+"""
+from __future__ import annotations
+
+import random
+from typing import Optional
+
+import pytest
+
+from pokemon_app.services import battle_calc as bc
+from pokemon_app.services.calculations import calc_stat
+from pokemon_app.services.damage_engine import (
+    AttackerProfile, DefenderProfile, MoveSpec,
+    attack_stat, base_damage_value, damage_modifiers, effective_defense, resolve_move,
+)
+from pokemon_app.services.ev_optimizer import MAX_TOTAL_EVS, BulkTarget, Threat, optimize_bulk
+from pokemon_app.services.ko_probability import end_of_turn_chip, ko_chances, roll_values
+from pokemon_app.services.speed_index import EV_STEPS
+
+_TYPES = ("Normal", "Fire", "Water", "Fighting", "Ground", "Ice", "Dark", "Steel")
+_NATURES = ("Hardy", "Bold", "Calm", "Impish", "Careful")
+_EPS = 1e-9
+
+
+# ---------- casos ----------
+def _threat(level: int, atk: int, physical: bool, power: int, move_type: str,
+            attacker_types: tuple, turns: int = 1) -> Threat:
+    stats = {"HP": 200, "Atk": 100, "Def": 100, "SpA": 100, "SpD": 100, "Spe": 100}
+    stats["Atk" if physical else "SpA"] = atk
+    cat = "physical" if physical else "special"
+    return Threat(AttackerProfile(level, stats, attacker_types), MoveSpec("Test", move_type, cat, power),
+                  turns=turns, label=f"{cat[:4]} {move_type} {power} ({atk})")
+
+
+def fixed_case() -> dict:
+    """Cada ataque por separado se aguanta (392 y 296 EVs); juntos no caben en 510."""
+    return {
+        "target": BulkTarget(base=(100, 100, 90, 80, 100, 70), level=50),
+        "threats": [_threat(50, 340, True, 120, "Normal", ("Normal",)),
+                    _threat(50, 340, False, 120, "Normal", ("Normal",))],
+        "survive": 1.0, "budget": MAX_TOTAL_EVS, "natures": ("Hardy", "Bold", "Calm"),
+    }
+
+
+def random_cases(n: int, seed: int = 0) -> list[dict]:
+    rnd = random.Random(seed)
+    out = [fixed_case()]
+    while len(out) < n:
+        level = rnd.choice((50, 100))
+        threats = []
+        k = rnd.randint(2, 4)
+        for i in range(k):
+            physical = (i % 2 == 0) if i < 2 else rnd.random() < 0.5     # al menos uno de cada
+            move_type = rnd.choice(_TYPES)
+            threats.append(_threat(
+                level, rnd.randint(150, 420) if level == 50 else rnd.randint(250, 700), physical,
+                rnd.choice((60, 80, 90, 100, 120)), move_type,
+                (move_type,) if rnd.random() < 0.6 else (),
+                turns=rnd.choice((1, 1, 2)),
+            ))
+        out.append({
+            "target": BulkTarget(base=tuple(rnd.randint(50, 130) for _ in range(6)), level=level,
+                                 types=(rnd.choice(_TYPES),)),
+            "threats": threats,
+            "survive": rnd.choice((1.0, 1.0, 0.9)),
+            "budget": rnd.choice((MAX_TOTAL_EVS, MAX_TOTAL_EVS, MAX_TOTAL_EVS - 252)),
+            "natures": (rnd.choice(_NATURES),),
+        })
+    return out[:n]
+
+
+# ---------- fuerza bruta ----------
+class _Direct:
+    """P(KO) de cada ataque con PS y Def/SpD dados, sin atajos (memoizada por celda)."""
+
+    def __init__(self, target: BulkTarget, threats: list[Threat]):
+        self.target = target
+        self.threats = threats
+        self._cache: dict = {}
+
+    def ko_prob(self, i: int, hp: int, defense: int) -> float:
+        key = (i, hp, defense)
+        p = self._cache.get(key)
+        if p is None:
+            t = self.threats[i]
+            mv = resolve_move(t.move, t.attacker, t.field)
+            stat = "Def" if mv.category == "physical" else "SpD"
+            d = DefenderProfile(set_id=0, label="", level=self.target.level,
+                                stats={"HP": hp, "Def": defense, "SpD": defense},
+                                base_def=0, base_spd=0, ev_def=0, ev_spd=0,
+                                types=tuple(self.target.types), item=self.target.item)
+            _eff, boost, mult, xmod = damage_modifiers(t.attacker, mv, d, t.field)
+            def_eff = effective_defense(d.stats[stat], boost, mult, mv.category, t.field)
+            rolls = roll_values(base_damage_value(t.attacker.level, mv.power,
+                                                  attack_stat(mv, t.attacker, t.field), def_eff), xmod)
+            lo, hi = bc.resolve_hits(mv.name, mv.hits, t.attacker.item)[:2]
+            weights = bc.hits_weights_for_selector(mv.hits, lo, hi)
+            turns = max(1, int(t.turns))
+            recoil, heal = end_of_turn_chip(hp, t.field.terrain, self.target.item) if turns > 1 else (0, 0)
+            p = ko_chances(rolls, hp, weights, turns=turns, recoil=recoil, heal=heal)[-1]
+            self._cache[key] = p
+        return p
+
+    def physical(self, i: int) -> bool:
+        t = self.threats[i]
+        return resolve_move(t.move, t.attacker, t.field).category == "physical"
+
+
+def brute_min_total(direct: _Direct, covered: list[int], nature: str, max_ko: float) -> Optional[int]:
+    """Menor HP+Def+SpD (pasos de 4, 252 por stat) que aguanta todos los `covered`; None si ninguno."""
+    tg = direct.target
+    stats = {k: [calc_stat(k, tg.base[n], tg.ivs[n], ev, tg.level, nature) for ev in EV_STEPS]
+             for n, k in ((0, "HP"), (2, "Def"), (4, "SpD"))}
+    phys = [i for i in covered if direct.physical(i)]
+    spec = [i for i in covered if not direct.physical(i)]
+    best = None
+    for a, hp_ev in enumerate(EV_STEPS):
+        hp = stats["HP"][a]
+        for b, def_ev in enumerate(EV_STEPS):
+            if best is not None and hp_ev + def_ev >= best:
+                break
+            if any(direct.ko_prob(i, hp, stats["Def"][b]) > max_ko + _EPS for i in phys):
+                continue
+            for c, spd_ev in enumerate(EV_STEPS):
+                total = hp_ev + def_ev + spd_ev
+                if best is not None and total >= best:
+                    break
+                if all(direct.ko_prob(i, hp, stats["SpD"][c]) <= max_ko + _EPS for i in spec):
+                    best = total
+                    break
+    return best
+
+
+# ---------- comparación ----------
+def check_case(case: dict) -> tuple[list[str], int]:
+    """(discrepancias, naturalezas cuyo plan deja algún ataque fuera)."""
+    target, threats = case["target"], case["threats"]
+    survive, budget = case["survive"], case["budget"]
+    max_ko = 1.0 - survive
+    direct = _Direct(target, threats)
+    labels = [t.label for t in threats]
+    errors, dropped = [], 0
+    for nature in case["natures"]:
+        plan = optimize_bulk(target, threats, survive=survive, natures=(nature,), budget=budget)
+        tag = f"{nature} {labels}"
+        everything = brute_min_total(direct, list(range(len(threats))), nature, max_ko)
+        if plan is None:
+            for i in range(len(threats)):
+                alone = brute_min_total(direct, [i], nature, max_ko)
+                if alone is not None and alone <= budget:
+                    errors.append(f"{tag}: None, pero '{labels[i]}' se aguanta solo con {alone} EVs")
+            continue
+
+        dropped += bool(plan.unsurvivable)
+        covered = [labels.index(lb) for lb, _p in plan.survival]
+        if plan.total > budget or plan.total != sum(plan.evs.values()):
+            errors.append(f"{tag}: total {plan.total} (presupuesto {budget}, EVs {plan.evs})")
+        for lb, p in plan.survival:
+            i = labels.index(lb)
+            key = "Def" if direct.physical(i) else "SpD"
+            ko = direct.ko_prob(i, plan.stats["HP"], plan.stats[key])
+            if ko > max_ko + _EPS or abs((1.0 - ko) - p) > 1e-4:
+                errors.append(f"{tag}: '{lb}' P(aguanta) {1.0 - ko:.4f}, el plan dice {p}")
+        brute = brute_min_total(direct, covered, nature, max_ko)
+        if brute != plan.total:
+            errors.append(f"{tag}: {plan.total} EVs para {len(covered)} ataques, la fuerza bruta da {brute}")
+        if plan.unsurvivable and everything is not None and everything <= budget:
+            errors.append(f"{tag}: deja fuera {plan.unsurvivable} pero todos caben con {everything} EVs")
+        if not plan.unsurvivable and everything != plan.total:
+            errors.append(f"{tag}: aguanta todos con {plan.total}, la fuerza bruta da {everything}")
+    return errors, dropped
+
+
+def test_fixed_case_drops_a_threat_instead_of_none():
+    """Regresión: con un ataque físico y uno especial que no caben juntos devolvía None."""
+    case = fixed_case()
+    plan = optimize_bulk(case["target"], case["threats"], survive=case["survive"],
+                         natures=("Hardy",), budget=case["budget"])
+    assert plan is not None
+    assert plan.total == 296
+    assert [lb for lb, _p in plan.survival] == [case["threats"][1].label]
+    assert plan.unsurvivable == [case["threats"][0].label]
+    errors, dropped = check_case(case)
+    assert errors == []
+    assert dropped >= 1
+
+
+@pytest.mark.parametrize("seed", [0, 3])
+def test_matches_brute_force(seed):
+    errors = []
+    for case in random_cases(20, seed)[1:]:        # el 0 es fixed_case, ya probado arriba
+        errors += check_case(case)[0]
+    assert errors == []
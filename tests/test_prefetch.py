@@ -0,0 +1,87 @@
+# tests/test_prefetch.py
+"""prefetch() contra el PokéAPI local de pokeapi_mock.py (sin red)."""
+import pytest
+
+from pokeapi_mock import MockPokeApi
+from pokemon_app.db import data_store
+from pokemon_app.services import pokeapi
+from pokemon_app.services.prefetch import prefetch
+
+SPECIES = ["Mockachu", "Testoise"]
+MOVES = ["Mock Beam", "Fixture Slam", "Stub Guard"]
+MISSING_SPECIES = "Nowhereon"        # el servidor responde 404
+MISSING_MOVE = "Vanishing Act"
+
+EXPECTED_SPECIES = {
+    "Mockachu": {"stats": {"HP": 35, "Atk": 55, "Def": 40, "SpA": 50, "SpD": 50, "Spe": 90},
+                 "types": ["Electric"], "weight_kg": 6.0},
+    "Testoise": {"stats": {"HP": 79, "Atk": 83, "Def": 100, "SpA": 85, "SpD": 105, "Spe": 78},
+                 "types": ["Water", "Steel"], "weight_kg": 85.5},
+}
+EXPECTED_ABILITIES = {
+    "Mockachu": {("Static", False), ("Lightning Rod", True)},
+    "Testoise": {("Torrent", False), ("Rain Dish", True)},
+}
+EXPECTED_MOVES = {
+    "Mock Beam":    {"type": "Electric", "damage_class": "special", "power": 90, "accuracy": 100},
+    "Fixture Slam": {"type": "Steel", "damage_class": "physical", "power": 120, "accuracy": 85},
+    "Stub Guard":   {"type": "Normal", "damage_class": "status", "power": None, "accuracy": None},
+}
+
+
+@pytest.fixture(scope="module")
+def api():
+    pokeapi.set_offline_mode(False)
+    try:
+        with MockPokeApi() as server:
+            yield server
+    finally:
+        pokeapi.set_offline_mode(None)
+
+
+@pytest.fixture(scope="module")
+def first_run(api):
+    """Primera pasada con base_url=..., con un 404 de cada tipo."""
+    return prefetch(SPECIES + [MISSING_SPECIES], MOVES + [MISSING_MOVE], base_url=api.base_url)
+
+
+def test_first_run_counts(first_run):
+    assert (first_run.species, first_run.moves, first_run.skipped) == (len(SPECIES), len(MOVES), 0)
+
+
+def test_not_found_goes_to_failed(first_run):
+    assert sorted(first_run.failed) == sorted([f"species:{MISSING_SPECIES}", f"move:{MISSING_MOVE}"])
+    assert data_store.get_species(MISSING_SPECIES) is None
+    assert data_store.get_move(MISSING_MOVE) is None
+
+
+@pytest.mark.parametrize("name", SPECIES)
+def test_species_rows(first_run, name):
+    sp = data_store.get_species(name)
+    assert sp is not None
+    assert {k: sp[k] for k in ("stats", "types", "weight_kg")} == EXPECTED_SPECIES[name]
+    assert set(data_store.get_abilities(name)) == EXPECTED_ABILITIES[name]
+
+
+@pytest.mark.parametrize("name", MOVES)
+def test_move_rows(first_run, name):
+    mv = data_store.get_move(name)
+    assert mv is not None
+    assert {k: mv[k] for k in EXPECTED_MOVES[name]} == EXPECTED_MOVES[name]
+
+
+def test_second_run_is_all_skipped(first_run, api, monkeypatch):
+    monkeypatch.setenv("POKEAPI_BASE_URL", api.base_url)
+    before = len(api.hits)
+    rep = prefetch(SPECIES, MOVES)
+    assert (rep.species, rep.moves, rep.failed) == (0, 0, [])
+    assert rep.skipped == len(SPECIES) + len(MOVES)
+    assert len(api.hits) == before
+
+
+def test_force_refetches_from_env_base_url(first_run, api, monkeypatch):
+    monkeypatch.setenv("POKEAPI_BASE_URL", api.base_url)
+    before = len(api.hits)
+    rep = prefetch(SPECIES, MOVES, force=True)
+    assert (rep.species, rep.moves, rep.skipped, rep.failed) == (len(SPECIES), len(MOVES), 0, [])
+    assert len(api.hits) - before == len(SPECIES) + len(MOVES)
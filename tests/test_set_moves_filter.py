@@ -0,0 +1,48 @@
+# tests/test_set_moves_filter.py
+"""Filtro por movimiento de list_sets: nombre exacto (moves.key) y patrones con comodines."""
+import pytest
+
+from pokemon_app.db.base import session_scope
+from pokemon_app.db.repository import init_db, list_sets, save_pokemon_sets
+
+_BASE = {"HP": 80, "Atk": 80, "Def": 80, "SpA": 80, "SpD": 80, "Spe": 80}
+_SETS = {
+    "Filtrotest A": ["Protect", "Fake Out", "Close Combat"],
+    "Filtrotest B": ["Protect", "Thunderbolt"],
+    "Filtrotest C": ["Fake Tears", "Moonblast"],
+    "Filtrotest D": ["U-turn", "Knock Off"],
+}
+
+
+@pytest.fixture(scope="module")
+def set_ids():
+    init_db()
+    entries = [dict(name=name, level=50, nature="Hardy", evs={}, ivs={}, moves=moves)
+               for name, moves in _SETS.items()]
+    ids = save_pokemon_sets(entries, {name: _BASE for name in _SETS})
+    return dict(zip(_SETS, ids))
+
+
+def _ids(token: str) -> set[int]:
+    with session_scope() as s:
+        return {pset.id for pset, _sp in list_sets(s, only_species="Filtrotest%", move_contains=[token])}
+
+
+def test_substring_pattern_matches_exact_name(set_ids):
+    expected = {set_ids["Filtrotest A"], set_ids["Filtrotest B"]}
+    assert _ids("Protect") == expected
+    assert _ids("%prot%") == expected
+    assert _ids("%Protect%") == expected
+
+
+@pytest.mark.parametrize("token, names", [
+    ("%fake%", ("Filtrotest A", "Filtrotest C")),
+    ("%fake-out%", ("Filtrotest A",)),
+    ("Fake Out", ("Filtrotest A",)),
+    (" fake  OUT ", ("Filtrotest A",)),
+    ("u-turn", ("Filtrotest D",)),
+    ("%moon%", ("Filtrotest C",)),
+    ("%nothing%", ()),
+])
+def test_move_tokens(set_ids, token, names):
+    assert _ids(token) == {set_ids[n] for n in names}
@@ -0,0 +1,59 @@
+# tests/test_stats_batch.py
+"""compute_stats_batch da exactamente lo mismo que compute_stats, fila a fila."""
+import itertools
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from pokemon_app.services.calculations import STAT_KEYS, compute_stats, compute_stats_batch
+from pokemon_app.utils.nature import NATURE_NAMES, nature_index
+
+# además de las 25: sin naturaleza, vacía y un nombre que no existe (neutras)
+NATURES = list(NATURE_NAMES) + [None, "", "timid"]
+
+
+def _scalar(base, evs, ivs, level, nature) -> list[int]:
+    pd = SimpleNamespace(evs=dict(zip(STAT_KEYS, evs)), level=level, nature=nature)
+    st = compute_stats(pd, dict(zip(STAT_KEYS, base)), dict(zip(STAT_KEYS, ivs)))
+    return [st[k] for k in STAT_KEYS]
+
+
+def _assert_same(sets: list[tuple]) -> None:
+    batch = compute_stats_batch([s[0] for s in sets], [s[1] for s in sets], [s[2] for s in sets],
+                                [s[3] for s in sets], [nature_index(s[4]) for s in sets]).tolist()
+    assert len(batch) == len(sets)
+    for s, row in zip(sets, batch):
+        assert row == _scalar(*s), f"set {s}"
+
+
+def random_sets(n: int, seed: int) -> list[tuple]:
+    rnd = random.Random(seed)
+    return [(tuple(rnd.randint(1, 255) for _ in STAT_KEYS),
+             tuple(rnd.randint(0, 255) for _ in STAT_KEYS),
+             tuple(rnd.randint(0, 31) for _ in STAT_KEYS),
+             rnd.randint(1, 100),
+             rnd.choice(NATURES)) for _ in range(n)]
+
+
+def boundary_sets() -> list[tuple]:
+    """Cada combinación de extremos (base, EV, IV, nivel) con todas las naturalezas."""
+    return [((b,) * 6, (e,) * 6, (i,) * 6, lv, nature)
+            for b, e, i, lv in itertools.product((1, 255), (0, 3, 4, 252, 255), (0, 31), (1, 50, 100))
+            for nature in NATURES]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 7])
+def test_batch_matches_scalar_random(seed):
+    _assert_same(random_sets(20_000, seed))
+
+
+def test_batch_matches_scalar_boundaries():
+    _assert_same(boundary_sets())
+
+
+def test_batch_matches_scalar_mixed_columns():
+    # EVs/IVs distintos por stat, para que un error de columna no pase desapercibido
+    sets = [((45, 49, 49, 65, 65, 45), (0, 4, 252, 0, 252, 0), (31, 0, 31, 30, 31, 0), lv, nature)
+            for lv in (1, 50, 100) for nature in NATURES]
+    _assert_same(sets)